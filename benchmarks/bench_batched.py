@@ -0,0 +1,58 @@
+"""Compare batched and per-task evolution of a `batch_assign` sweep.
+
+Run with `python benchmarks/bench_batched.py`, for each sweep size the wall
+time of `run_callback` with and without `batched=True` and the largest
+deviation between the final states are reported.
+"""
+
+import time
+
+import numpy as np
+
+from bloqade.analog import var
+from bloqade.analog.atom_arrangement import Chain
+
+
+def callback(register, *_):
+    return register.data
+
+
+def program(n_tasks: int):
+    delta = var("delta")
+    return (
+        Chain(12, lattice_spacing=6.1)
+        .rydberg.detuning.uniform.piecewise_linear(
+            [0.1, 1.8, 0.1], [-10, -10, delta, delta]
+        )
+        .amplitude.uniform.piecewise_linear([0.1, 1.8, 0.1], [0, 15, 15, 0])
+        .batch_assign(delta=np.linspace(0, 20, n_tasks).tolist())
+    )
+
+
+def main():
+    options = dict(atol=1e-8, rtol=1e-8, blockade_radius=6.2)
+
+    # compile the numba kernels
+    program(2).bloqade.python().run_callback(callback, **options)
+    program(2).bloqade.python().run_callback(callback, batched=True, **options)
+
+    for n_tasks in [1, 10, 50, 100]:
+        routine = program(n_tasks).bloqade.python()
+
+        start_time = time.perf_counter()
+        expected = routine.run_callback(callback, cache_matrices=True, **options)
+        single = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        results = routine.run_callback(callback, batched=True, **options)
+        batched = time.perf_counter() - start_time
+
+        error = max(np.linalg.norm(a - b) for a, b in zip(results, expected))
+        print(
+            f"{n_tasks:4d} tasks: per task {single:7.2f}s, batched {batched:7.2f}s "
+            f"({single / batched:5.1f}x), max error {error:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the compilation of a hardware batch by the previous per task loop
+over the passes with the compile pipeline.
+
+Run with `python benchmarks/bench_compile.py`, a 1000 point `batch_assign`
+sweep of a parallelized register is compiled for the mock backend by the loop,
+by the pipeline in the main process and by the pipeline with multiprocessing,
+the wall time and the time of each stage of the pipeline are reported.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from bloqade.analog import start
+from bloqade.analog.compiler.passes.hardware import (
+    assign_circuit,
+    analyze_channels,
+    generate_ahs_code,
+    generate_quera_ir,
+    validate_waveforms,
+    canonicalize_circuit,
+)
+
+
+def program(n_tasks: int):
+    return (
+        start.add_position([(0, 0), (0, 6.1), (6.1, 0), (6.1, 6.1)])
+        .rydberg.detuning.uniform.piecewise_linear(
+            [0.1, "t", 0.1], [-10, -10, "delta", "delta"]
+        )
+        .amplitude.uniform.piecewise_linear([0.1, "t", 0.1], [0, 15, 15, 0])
+        .assign(t=2.0)
+        .batch_assign(delta=np.linspace(0, 10, n_tasks).tolist())
+        .parallelize(10.0)
+    )
+
+
+def reference_compile(routine, shots: int):
+    # the loop of `QuEraHardwareRoutine._compile` before the pipeline
+    circuit, params = routine.circuit, routine.params
+    capabilities = routine.backend.get_capabilities()
+
+    task_irs = []
+    for batch_params in params.batch_assignments():
+        assignments = {**batch_params, **params.static_params}
+        final_circuit, metadata = assign_circuit(circuit, assignments)
+
+        level_couplings = analyze_channels(final_circuit)
+        final_circuit = canonicalize_circuit(final_circuit, level_couplings)
+
+        validate_waveforms(level_couplings, final_circuit)
+        ahs_components = generate_ahs_code(capabilities, level_couplings, final_circuit)
+
+        task_irs.append(
+            generate_quera_ir(ahs_components, shots).discretize(capabilities)
+        )
+
+    return task_irs
+
+
+def main():
+    routine = program(1000).quera.mock()
+
+    start_time = time.perf_counter()
+    expected = reference_compile(routine, 100)
+    loop = time.perf_counter() - start_time
+    print(f"per task loop {loop:7.3f}s")
+
+    batch = routine._compile(100)
+    assert [task.task_ir for task in batch.tasks.values()] == expected
+    print(batch.compile_timings)
+
+    batch = routine._compile(100, multiprocessing=True)
+    assert [task.task_ir for task in batch.tasks.values()] == expected
+    print(f"multiprocessing with {os.cpu_count()} processors:")
+    print(batch.compile_timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the configuration lookups of blockade subspaces with and without
+the index table of `Space`.
+
+Run with `python benchmarks/bench_index_table.py`, for each register and bucket
+size of the table the memory of the table and the wall time of building the
+rabi operators of a row of atoms, of `local_trace` on a row of sites and of
+`site_expectations` are reported. A bucket size of `None` uses a binary search
+on all sorted configurations.
+"""
+
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from bloqade.analog.emulate.ir.space import Space
+from bloqade.analog.emulate.ir.emulator import Register
+from bloqade.analog.emulate.ir.atom_type import TwoLevelAtom
+from bloqade.analog.emulate.ir.state_vector import StateVector
+
+X = np.array([[0.0, 1.0], [1.0, 0.0]])
+
+
+def register(n_rows: int, n_cols: int) -> Register:
+    # square lattice with nearest neighbor blockade
+    sites = [
+        (Decimal(5 * (index % n_cols)), Decimal(5 * (index // n_cols)))
+        for index in range(n_rows * n_cols)
+    ]
+    return Register(TwoLevelAtom, sites, Decimal("5.5"))
+
+
+def timed(function) -> float:
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+
+def main():
+    for n_rows, n_cols in [(5, 5), (5, 6), (6, 6)]:
+        space = Space.create(register(n_rows, n_cols))
+        rng = np.random.default_rng(1234)
+        data = rng.normal(size=space.size) + 1j * rng.normal(size=space.size)
+        state = StateVector(data / np.linalg.norm(data), space)
+
+        print(f"{n_rows * n_cols} atoms, {space.size} states")
+        for bucket_size in [None, 0.25, 1.0, 4.0]:
+            build = timed(lambda: space.build_index_table(bucket_size))
+            # compile the numba kernels
+            state.local_trace(X, 0)
+            state.site_expectations(X)
+
+            operators = timed(
+                lambda: [space.transition_state_at(i, 0, 1) for i in range(n_rows)]
+            )
+            local_trace = timed(
+                lambda: [state.local_trace(X, i) for i in range(n_rows)]
+            )
+            site_expectations = timed(lambda: state.site_expectations(X))
+
+            print(
+                f"  bucket size {str(bucket_size):>4s}: "
+                f"table {space.index_table.nbytes / 2**20:7.1f} MiB "
+                f"(built in {build:5.2f}s), "
+                f"{n_rows} operators {operators:6.3f}s, "
+                f"{n_rows} local_trace {local_trace:6.3f}s, "
+                f"site_expectations {site_expectations:6.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
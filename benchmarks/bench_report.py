@@ -0,0 +1,88 @@
+"""Compare the vectorized construction of a `Report` with the previous loop
+over tasks, shots and clusters.
+
+Run with `python benchmarks/bench_report.py`, a batch of 100 tasks with 1000
+shots on a register parallelized into 50 clusters is run on the mock backend,
+the wall time of `report()` and of the reference loop is reported.
+"""
+
+import os
+import time
+import tempfile
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from bloqade.analog import start
+from bloqade.analog.submission.ir.task_results import QuEraShotStatusCode
+
+
+def program(n_tasks: int):
+    return (
+        start.add_position([(0, 0), (0, 6.1)])
+        .rydberg.detuning.uniform.piecewise_linear(
+            [0.1, 1.0, 0.1], [-10, -10, "delta", "delta"]
+        )
+        .amplitude.uniform.piecewise_linear([0.1, 1.0, 0.1], [0, 15, 15, 0])
+        .batch_assign(delta=np.linspace(0, 10, n_tasks).tolist())
+        # 50 clusters on the mock capabilities
+        .parallelize(8.0)
+    )
+
+
+def reference_dataframe(batch) -> pd.DataFrame:
+    # the report construction before vectorization
+    index = []
+    data = []
+    for task_number, task in batch.tasks.items():
+        geometry = task.geometry
+        perfect_sorting = "".join(map(str, geometry.filling))
+        cluster_indices = geometry.parallel_decoder.get_cluster_indices()
+
+        shot_iter = filter(
+            lambda shot: shot.shot_status == QuEraShotStatusCode.Completed,
+            task.result().shot_outputs,
+        )
+        for shot, (cluster_coordinate, cluster_index) in product(
+            shot_iter, cluster_indices.items()
+        ):
+            pre_sequence = "".join(
+                map(str, (shot.pre_sequence[index] for index in cluster_index))
+            )
+            post_sequence = np.asarray(
+                [shot.post_sequence[index] for index in cluster_index], dtype=np.int8
+            )
+            pfc_sorting = "".join([perfect_sorting[index] for index in cluster_index])
+
+            index.append((task_number, cluster_coordinate, pfc_sorting, pre_sequence))
+            data.append(post_sequence)
+
+    index = pd.MultiIndex.from_tuples(
+        index, names=["task_number", "cluster", "perfect_sorting", "pre_sequence"]
+    )
+    return pd.DataFrame(data, index=index)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        state_file = os.path.join(directory, "mock_state.txt")
+        batch = program(100).quera.mock(state_file=state_file).run(1000)
+
+        start_time = time.perf_counter()
+        report = batch.report()
+        vectorized = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        expected = reference_dataframe(batch)
+        loop = time.perf_counter() - start_time
+
+    pd.testing.assert_frame_equal(report.dataframe, expected)
+    print(
+        f"{len(expected)} rows: loop {loop:7.2f}s, vectorized {vectorized:7.2f}s "
+        f"({loop / vectorized:5.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
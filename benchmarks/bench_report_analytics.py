@@ -0,0 +1,91 @@
+"""Compare `Report.bitstrings` and `Report.counts` with the previous per task
+filters of the whole DataFrame.
+
+Run with `python benchmarks/bench_report_analytics.py`, reports of 100 shots
+of 8 sites in 2 clusters are generated for sweeps of 100 to 10000 tasks and
+the wall time of the first and of a repeated call is reported. The previous
+implementation is only run up to 1000 tasks.
+"""
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bloqade.analog.task.base import Report
+
+
+def report(n_tasks: int, n_shots: int = 100, n_sites: int = 8) -> Report:
+    rng = np.random.default_rng(1234)
+    n_rows = 2 * n_tasks * n_shots
+    clusters = np.empty(2, dtype=object)
+    clusters[:] = [(0, 0), (1, 0)]
+
+    index = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(np.arange(n_tasks), 2 * n_shots),
+            np.tile(clusters, n_tasks * n_shots),
+            np.full(n_rows, "1" * n_sites, dtype=object),
+            # a tenth of the shots are not perfectly sorted
+            np.where(
+                rng.random(n_rows) < 0.9, "1" * n_sites, "0" + "1" * (n_sites - 1)
+            ).astype(object),
+        ],
+        names=["task_number", "cluster", "perfect_sorting", "pre_sequence"],
+    )
+    data = (rng.random((n_rows, n_sites)) < 0.3).astype(np.int8)
+    return Report(pd.DataFrame(data, index=index), [{}] * n_tasks, [None] * n_tasks)
+
+
+def reference_counts(report: Report):
+    # one mask over the whole DataFrame and `np.unique` per task
+    dataframe = report.dataframe
+    task_numbers = dataframe.index.get_level_values("task_number")
+    perfect_sorting = dataframe.index.get_level_values("perfect_sorting")
+    pre_sequence = dataframe.index.get_level_values("pre_sequence")
+
+    counts = []
+    for task_number in task_numbers.unique():
+        mask = (task_numbers == task_number) & (perfect_sorting == pre_sequence)
+        unique, unique_counts = np.unique(
+            dataframe.loc[mask].to_numpy(), axis=0, return_counts=True
+        )
+        count_list = [
+            ("".join(map(str, bits)), int(count))
+            for bits, count in zip(unique, unique_counts)
+        ]
+        count_list.sort(key=lambda x: x[1], reverse=True)
+        counts.append(OrderedDict(count_list))
+
+    return counts
+
+
+def timed(function):
+    start_time = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    for n_tasks in [100, 1000, 10000]:
+        rept = report(n_tasks)
+        _, bitstrings = timed(rept.bitstrings)
+        counts, first = timed(rept.counts)
+        _, repeated = timed(rept.counts)
+
+        line = (
+            f"{n_tasks:6d} tasks, {len(rept.dataframe):8d} rows: "
+            f"bitstrings {bitstrings:6.3f}s, counts {first:6.3f}s, "
+            f"cached counts {repeated:6.3f}s"
+        )
+        if n_tasks <= 1000:
+            expected, loop = timed(lambda: reference_counts(rept))
+            assert counts == expected
+            line += f", per task filters {loop:7.3f}s"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the Krylov exponential integrators against `dop853`.
+
+Run with `python benchmarks/bench_solvers.py`, for each program the wall
+time, the number of Hamiltonian matvecs and the error of the final state
+compared to a tightly converged `dop853` solution are reported.
+"""
+
+import time
+
+import numpy as np
+
+from bloqade.analog import start
+from bloqade.analog.atom_arrangement import Chain
+from bloqade.analog.emulate.ir.state_vector import HamiltonianWorkspace
+
+SOLVERS = [
+    ("dop853", 1e-7),
+    ("dop853", 1e-9),
+    ("magnus2", 1e-7),
+    ("magnus4", 1e-7),
+    ("magnus4", 1e-9),
+]
+
+
+def programs():
+    yield "constant rabi, 10 atoms", (
+        Chain(10, lattice_spacing=6.1)
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 2.0)
+        .detuning.uniform.piecewise_constant([1.0, 1.0], [0.0, 5.0])
+    ), 0.0
+
+    yield "adiabatic sweep, 10 atoms", (
+        Chain(10, lattice_spacing=6.1)
+        .rydberg.detuning.uniform.piecewise_linear([0.1, 3.8, 0.1], [-10, -10, 10, 10])
+        .amplitude.uniform.piecewise_linear([0.1, 3.8, 0.1], [0, 15, 15, 0])
+    ), 0.0
+
+    yield "adiabatic sweep, 20 atoms blockade subspace", (
+        Chain(20, lattice_spacing=6.1)
+        .rydberg.detuning.uniform.piecewise_linear([0.1, 3.8, 0.1], [-10, -10, 10, 10])
+        .amplitude.uniform.piecewise_linear([0.1, 3.8, 0.1], [0, 15, 15, 0])
+    ), 6.2
+
+    yield "phased drive, 3 atoms", (
+        start.add_position([(0, 0), (0, 5), (0, 10)])
+        .rydberg.rabi.amplitude.uniform.piecewise_linear(
+            [0.1, 0.8, 0.1], [0, 15, 15, 0]
+        )
+        .phase.uniform.piecewise_constant([0.5, 0.5], [0.0, 1.5])
+        .detuning.uniform.constant(2.0, 1.0)
+    ), 0.0
+
+
+def main():
+    matvec = HamiltonianWorkspace.matvec
+    counter = [0]
+
+    def counting_matvec(self, *args, **kwargs):
+        counter[0] += 1
+        return matvec(self, *args, **kwargs)
+
+    HamiltonianWorkspace.matvec = counting_matvec
+
+    for name, program, blockade_radius in programs():
+        [emu] = program.bloqade.python().hamiltonian(blockade_radius=blockade_radius)
+        (reference,) = emu.evolve(solver_name="dop853", atol=1e-12, rtol=1e-12)
+
+        print(f"{name} ({emu.hamiltonian.space.size} states)")
+        for solver_name, atol in SOLVERS:
+            counter[0] = 0
+            start_time = time.perf_counter()
+            (state,) = emu.evolve(solver_name=solver_name, atol=atol, rtol=1e-14)
+            elapsed = time.perf_counter() - start_time
+            error = np.linalg.norm(state.data - reference.data)
+            print(
+                f"  {solver_name:>8} atol={atol:.0e}: {elapsed:8.3f} s "
+                f"{counter[0]:8d} matvecs  error={error:.2e}"
+            )
+
+    HamiltonianWorkspace.matvec = matvec
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from beartype import beartype
-from beartype.typing import Set, Dict, FrozenSet
+from beartype.typing import Set, Dict, List, FrozenSet
 from pydantic.v1.dataclasses import dataclass
 
 import bloqade.analog.ir.control.waveform as waveform
@@ -48,3 +50,51 @@ class WaveformScan(BloqadeIRVisitor):
             module: frozenset(imports) for module, imports in self.imports.items()
         }
         return WaveformScanResult(self.bindings, imports)
+
+
+class WaveformBreakpoints(BloqadeIRVisitor):
+    """Collect the boundaries of the segments of an assigned waveform.
+
+    The waveform is smooth in between two consecutive breakpoints, which lets
+    integrators avoid stepping over a discontinuity of the waveform or of its
+    derivatives.
+    """
+
+    def visit_waveform_Sample(self, node: waveform.Sample) -> List[Decimal]:
+        times, _ = node.samples()
+        return list(times)
+
+    def visit_waveform_Append(self, node: waveform.Append) -> List[Decimal]:
+        breakpoints = []
+        offset = Decimal(0)
+        for wf in node.waveforms:
+            breakpoints.extend(offset + time for time in self.visit(wf))
+            offset += wf.duration()
+
+        return breakpoints
+
+    def visit_waveform_Slice(self, node: waveform.Slice) -> List[Decimal]:
+        start, stop = node.start(), node.stop()
+        breakpoints = [
+            time - start for time in self.visit(node.waveform) if start < time < stop
+        ]
+        return [Decimal(0), *breakpoints, stop - start]
+
+    def visit_waveform_Add(self, node: waveform.Add) -> List[Decimal]:
+        return self.visit(node.left) + self.visit(node.right)
+
+    def visit_waveform_Negative(self, node: waveform.Negative) -> List[Decimal]:
+        return self.visit(node.waveform)
+
+    def visit_waveform_Scale(self, node: waveform.Scale) -> List[Decimal]:
+        return self.visit(node.waveform)
+
+    def visit_waveform_Record(self, node: waveform.Record) -> List[Decimal]:
+        return self.visit(node.waveform)
+
+    def generic_visit(self, node: waveform.Waveform) -> List[Decimal]:
+        return [Decimal(0), node.duration()]
+
+    @beartype
+    def scan(self, node: waveform.Waveform) -> List[Decimal]:
+        return sorted(set(self.visit(node)))
@@ -0,0 +1,137 @@
+import numpy as np
+
+import bloqade.analog.ir.control.waveform as waveform
+from bloqade.analog.ir.visitor import BloqadeIRVisitor
+from bloqade.analog.emulate.ir.piecewise_linear import PiecewiseLinearWaveform
+
+
+class NotPiecewiseLinearError(Exception):
+    """Raised when a waveform can not be lowered to a piecewise linear table."""
+
+
+class CodegenPiecewiseLinearWaveform(BloqadeIRVisitor):
+    """Lower an assigned waveform into a `PiecewiseLinearWaveform`.
+
+    Only waveforms built from linear and constant pieces can be lowered, a
+    `NotPiecewiseLinearError` is raised for any other waveform node. Use
+    `can_lower` to check the structure of a waveform before lowering it.
+    """
+
+    valid_nodes = {
+        waveform.Constant,
+        waveform.Linear,
+        waveform.Poly,
+        waveform.Sample,
+        waveform.Add,
+        waveform.Append,
+        waveform.Slice,
+        waveform.Negative,
+        waveform.Scale,
+        waveform.Record,
+    }
+
+    @classmethod
+    def can_lower(cls, node: waveform.Waveform) -> bool:
+        """Check if the waveform can be lowered only looking at node types."""
+        if type(node) not in cls.valid_nodes:
+            return False
+
+        if isinstance(node, waveform.Poly):
+            return len(node.coeffs) <= 2
+        elif isinstance(node, waveform.Sample):
+            # `Sample` only evaluates the sub-waveform at the sample times
+            return node.interpolation is waveform.Interpolation.Linear
+        elif isinstance(node, waveform.Append):
+            return all(map(cls.can_lower, node.waveforms))
+        elif isinstance(node, waveform.Add):
+            return cls.can_lower(node.left) and cls.can_lower(node.right)
+        elif isinstance(
+            node,
+            (waveform.Slice, waveform.Negative, waveform.Scale, waveform.Record),
+        ):
+            return cls.can_lower(node.waveform)
+
+        return True
+
+    def visit_waveform_Constant(
+        self, node: waveform.Constant
+    ) -> PiecewiseLinearWaveform:
+        value = float(node.value())
+        return PiecewiseLinearWaveform([0.0, float(node.duration())], [value, value])
+
+    def visit_waveform_Linear(self, node: waveform.Linear) -> PiecewiseLinearWaveform:
+        duration = node.duration()
+        if duration.is_zero():
+            raise ValueError(
+                f"Duration of linear waveform is zero: {duration}. "
+                "Cannot divide by zero."
+            )
+
+        return PiecewiseLinearWaveform(
+            [0.0, float(duration)], [float(node.start()), float(node.stop())]
+        )
+
+    def visit_waveform_Poly(self, node: waveform.Poly) -> PiecewiseLinearWaveform:
+        if len(node.coeffs) > 2:
+            raise NotPiecewiseLinearError(
+                f"Cannot lower non-linear waveform: {node.print_node()}"
+            )
+
+        duration = float(node.duration())
+        coeffs = [float(coeff()) for coeff in node.coeffs] + [0.0, 0.0]
+        return PiecewiseLinearWaveform(
+            [0.0, duration], [coeffs[0], coeffs[0] + coeffs[1] * duration]
+        )
+
+    def visit_waveform_Sample(self, node: waveform.Sample) -> PiecewiseLinearWaveform:
+        # constant interpolation takes the value on the right of each sample
+        # time, which can not be represented by the breakpoint table.
+        if node.interpolation is not waveform.Interpolation.Linear:
+            raise NotPiecewiseLinearError(f"Cannot lower waveform: {node.print_node()}")
+
+        times, values = node.samples()
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        return PiecewiseLinearWaveform(times, values).simplify()
+
+    def visit_waveform_Add(self, node: waveform.Add) -> PiecewiseLinearWaveform:
+        times, values = PiecewiseLinearWaveform.merge(
+            [self.visit(node.left), self.visit(node.right)]
+        )
+        return PiecewiseLinearWaveform(times, values.sum(axis=0)).simplify()
+
+    def visit_waveform_Append(self, node: waveform.Append) -> PiecewiseLinearWaveform:
+        # accumulate the offsets exactly to avoid drifting breakpoints
+        pwl = self.visit(node.waveforms[0])
+        offset = node.waveforms[0].duration()
+        for wf in node.waveforms[1:]:
+            pwl = pwl.append(self.visit(wf), float(offset))
+            offset += wf.duration()
+
+        return pwl
+
+    def visit_waveform_Slice(self, node: waveform.Slice) -> PiecewiseLinearWaveform:
+        pwl = self.visit(node.waveform)
+        return pwl.slice(float(node.start()), float(node.stop()))
+
+    def visit_waveform_Negative(
+        self, node: waveform.Negative
+    ) -> PiecewiseLinearWaveform:
+        return self.visit(node.waveform).scale(-1.0)
+
+    def visit_waveform_Scale(self, node: waveform.Scale) -> PiecewiseLinearWaveform:
+        return self.visit(node.waveform).scale(float(node.scalar()))
+
+    def visit_waveform_Record(self, node: waveform.Record) -> PiecewiseLinearWaveform:
+        return self.visit(node.waveform)
+
+    def visit(self, node) -> PiecewiseLinearWaveform:
+        if type(node) not in self.valid_nodes:
+            raise NotPiecewiseLinearError(
+                f"Expected one of {self.valid_nodes}, got {type(node)} instead."
+            )
+
+        return super().visit(node)
+
+    def emit(self, node: waveform.Waveform) -> PiecewiseLinearWaveform:
+        return self.visit(node)
@@ -1,6 +1,7 @@
 from .define import (
     assign_circuit,
     analyze_channels,
+    generate_lattice,
     generate_ahs_code,
     generate_quera_ir,
     generate_braket_ir,
@@ -13,6 +14,7 @@ __all__ = [
     "canonicalize_circuit",
     "assign_circuit",
     "validate_waveforms",
+    "generate_lattice",
     "generate_ahs_code",
     "generate_quera_ir",
     "generate_braket_ir",
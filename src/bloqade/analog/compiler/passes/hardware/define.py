@@ -6,6 +6,7 @@ from bloqade.analog.builder.typing import ParamType
 from bloqade.analog.submission.ir.braket import BraketTaskSpecification
 from bloqade.analog.submission.ir.capabilities import QuEraCapabilities
 from bloqade.analog.submission.ir.task_specification import QuEraTaskSpecification
+from bloqade.analog.compiler.codegen.hardware.lattice import AHSLatticeData
 from bloqade.analog.compiler.passes.hardware.components import AHSComponents
 
 
@@ -172,10 +173,43 @@ def validate_waveforms(
         raise ValueError("Circuit Duration must be be non-zero")
 
 
+def generate_lattice(
+    capabilities: Optional[QuEraCapabilities],
+    circuit: analog_circuit.AnalogCircuit,
+) -> AHSLatticeData:
+    """Validate the register of the circuit and generate its lattice data.
+
+    The lattice only depends on the register of the circuit, it can be shared
+    between circuits with the same register, see `generate_ahs_code`.
+
+    Args:
+        capabilities (QuEraCapabilities | None): Capabilities of the hardware.
+        circuit (AnalogCircuit): AnalogCircuit to generate the lattice for.
+
+    Returns:
+        lattice_data (AHSLatticeData): sites, filling and parallel decoder of
+            the register.
+
+    Raises:
+        ValueError: If the capabilities are not provided but the circuit has
+            a ParallelRegister.
+
+    """
+    from bloqade.analog.compiler.codegen.hardware import GenerateLattice
+    from bloqade.analog.compiler.analysis.hardware import BasicLatticeValidation
+
+    if capabilities is not None:
+        # only validate the lattice if capabilities are provided
+        BasicLatticeValidation(capabilities).visit(circuit)
+
+    return GenerateLattice(capabilities).emit(circuit)
+
+
 def generate_ahs_code(
     capabilities: Optional[QuEraCapabilities],
     level_couplings: Dict,
     circuit: analog_circuit.AnalogCircuit,
+    lattice_data: Optional[AHSLatticeData] = None,
 ) -> AHSComponents:
     """5. generate ahs code
 
@@ -188,6 +222,9 @@ def generate_ahs_code(
         level_couplings (Dict): Dictionary containing the given channels for the
             sequence.
         circuit (AnalogCircuit): AnalogCircuit to generate AHS code for.
+        lattice_data (AHSLatticeData | None): lattice of the register of the
+            circuit from `generate_lattice`, it is generated from the circuit
+            if None. Defaults to None.
 
     Returns:
         ahs_components (AHSComponents): A collection of the AHS components
@@ -201,18 +238,13 @@ def generate_ahs_code(
 
     """
     from bloqade.analog.compiler.codegen.hardware import (
-        GenerateLattice,
         GeneratePiecewiseLinearChannel,
         GenerateLatticeSiteCoefficients,
         GeneratePiecewiseConstantChannel,
     )
-    from bloqade.analog.compiler.analysis.hardware import BasicLatticeValidation
-
-    if capabilities is not None:
-        # only validate the lattice if capabilities are provided
-        BasicLatticeValidation(capabilities).visit(circuit)
 
-    ahs_lattice_data = GenerateLattice(capabilities).emit(circuit)
+    if lattice_data is None:
+        lattice_data = generate_lattice(capabilities, circuit)
 
     global_detuning = GeneratePiecewiseLinearChannel(
         sequence.rydberg, pulse.detuning, field.Uniform
@@ -241,7 +273,7 @@ def generate_ahs_code(
         sm = extra_sm.pop()
 
         lattice_site_coefficients = GenerateLatticeSiteCoefficients(
-            parallel_decoder=ahs_lattice_data.parallel_decoder
+            parallel_decoder=lattice_data.parallel_decoder
         ).emit(circuit)
 
         local_detuning = GeneratePiecewiseLinearChannel(
@@ -249,7 +281,7 @@ def generate_ahs_code(
         ).visit(circuit)
 
     return AHSComponents(
-        lattice_data=ahs_lattice_data,
+        lattice_data=lattice_data,
         global_detuning=global_detuning,
         global_amplitude=global_amplitude,
         global_phase=global_phase,
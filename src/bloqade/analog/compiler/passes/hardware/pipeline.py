@@ -0,0 +1,248 @@
+import time
+from dataclasses import dataclass
+
+from beartype.typing import Any, Dict, List, Tuple, Optional, FrozenSet
+
+from bloqade.analog.ir import analog_circuit
+from bloqade.analog.builder.typing import LiteralType, ParamType
+from bloqade.analog.ir.routine.params import Params
+from bloqade.analog.submission.ir.parallel import ParallelDecoder
+from bloqade.analog.submission.ir.capabilities import QuEraCapabilities
+from bloqade.analog.compiler.codegen.hardware.lattice import AHSLatticeData
+from bloqade.analog.submission.ir.task_specification import QuEraTaskSpecification
+from bloqade.analog.compiler.passes.hardware.define import (
+    assign_circuit,
+    analyze_channels,
+    generate_lattice,
+    generate_ahs_code,
+    generate_quera_ir,
+    validate_waveforms,
+    canonicalize_circuit,
+)
+
+STAGES = (
+    "lattice",
+    "assign",
+    "analyze_channels",
+    "canonicalize",
+    "validate",
+    "generate_ahs",
+    "generate_ir",
+)
+
+
+@dataclass(frozen=True)
+class CompiledTask:
+    """Result of the compilation of one parameter set of a batch.
+
+    Attributes:
+        metadata (Dict[str, ParamType]): assignments of the variables.
+        task_ir (QuEraTaskSpecification): discretized QuEra IR of the task.
+        parallel_decoder (ParallelDecoder | None): decoder of the clusters if
+            the register is parallelized.
+    """
+
+    metadata: Dict[str, ParamType]
+    task_ir: QuEraTaskSpecification
+    parallel_decoder: Optional[ParallelDecoder]
+
+
+@dataclass(frozen=True)
+class CompileTimings:
+    """Time spent compiling a batch.
+
+    Attributes:
+        stages (Dict[str, float]): seconds spent in each stage of the pipeline
+            summed over the tasks, measured in the workers with
+            multiprocessing. The `lattice` stage only counts the lattice
+            generated once for all tasks.
+        total (float): wall time of the compilation in seconds.
+        n_tasks (int): number of compiled tasks.
+        hoisted (Tuple[str, ...]): stages run once instead of per task.
+    """
+
+    stages: Dict[str, float]
+    total: float
+    n_tasks: int
+    hoisted: Tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        lines = [f"compiled {self.n_tasks} tasks in {self.total:.3f}s"]
+        for stage, seconds in self.stages.items():
+            hoisted = " (hoisted)" if stage in self.hoisted else ""
+            lines.append(f"  {stage:<16s} {seconds:8.3f}s{hoisted}")
+
+        return "\n".join(lines)
+
+
+class _StageTimer:
+    def __init__(self, stages: Dict[str, float]):
+        self.stages = stages
+        self.start = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] += now - self.start
+        self.start = now
+
+
+def batch_variables(params: Params) -> FrozenSet[str]:
+    """Names of the variables whose values change between the tasks of a
+    batch, i.e. the batch and `args` variables."""
+    names = set(params.arg_names)
+    for batch in params.batch_params:
+        names.update(batch.keys())
+
+    return frozenset(names)
+
+
+def depends_on(node: Any, variables: FrozenSet[str]) -> bool:
+    """Check whether an IR node refers to any of the variables."""
+    from bloqade.analog.compiler.analysis.common import ScanVariables
+
+    result = ScanVariables().scan(node)
+    return not variables.isdisjoint(result.scalar_vars | result.vector_vars)
+
+
+def _compile_task(
+    circuit: analog_circuit.AnalogCircuit,
+    assignments: Dict[str, ParamType],
+    capabilities: Optional[QuEraCapabilities],
+    shots: int,
+    lattice_data: Optional[AHSLatticeData],
+    stages: Dict[str, float],
+) -> CompiledTask:
+    timer = _StageTimer(stages)
+
+    final_circuit, metadata = assign_circuit(circuit, assignments)
+    timer.lap("assign")
+
+    level_couplings = analyze_channels(final_circuit)
+    timer.lap("analyze_channels")
+
+    final_circuit = canonicalize_circuit(final_circuit, level_couplings)
+    timer.lap("canonicalize")
+
+    validate_waveforms(level_couplings, final_circuit)
+    timer.lap("validate")
+
+    ahs_components = generate_ahs_code(
+        capabilities, level_couplings, final_circuit, lattice_data
+    )
+    timer.lap("generate_ahs")
+
+    task_ir = generate_quera_ir(ahs_components, shots).discretize(capabilities)
+    timer.lap("generate_ir")
+
+    return CompiledTask(metadata, task_ir, ahs_components.lattice_data.parallel_decoder)
+
+
+# compilation state of the worker processes, set by `_init_worker`
+_worker_state: Optional[Tuple] = None
+
+
+def _init_worker(circuit, capabilities, shots, lattice_data) -> None:
+    global _worker_state
+    _worker_state = (circuit, capabilities, shots, lattice_data)
+
+
+def _compile_in_worker(
+    assignments: Dict[str, ParamType],
+) -> Tuple[CompiledTask, Dict[str, float]]:
+    circuit, capabilities, shots, lattice_data = _worker_state
+    stages = dict.fromkeys(STAGES, 0.0)
+    task = _compile_task(
+        circuit, assignments, capabilities, shots, lattice_data, stages
+    )
+    return task, stages
+
+
+def compile_quera_tasks(
+    circuit: analog_circuit.AnalogCircuit,
+    params: Params,
+    capabilities: Optional[QuEraCapabilities],
+    shots: int,
+    args: Tuple[LiteralType, ...] = (),
+    multiprocessing: bool = False,
+    num_workers: Optional[int] = None,
+) -> Tuple[List[CompiledTask], CompileTimings]:
+    """Compile a circuit to discretized QuEra IR for each parameter set of a
+    batch.
+
+    Passes that do not depend on the batch variables are hoisted out of the
+    loop over the tasks: when the register does not refer to a batch or
+    `args` variable its lattice is validated and generated once. The other
+    passes run per task, optionally in a pool of processes.
+
+    Args:
+        circuit (AnalogCircuit): circuit to compile.
+        params (Params): static, batch and `args` parameters of the circuit.
+        capabilities (QuEraCapabilities | None): capabilities of the device.
+        shots (int): number of shots of each task.
+        args (Tuple[LiteralType, ...]): values of the `args` variables.
+            Defaults to ().
+        multiprocessing (bool): compile the tasks in a pool of processes.
+            Defaults to False.
+        num_workers (Optional[int]): number of processes with multiprocessing,
+            defaults to the number of processors.
+
+    Returns:
+        Tuple[List[CompiledTask], CompileTimings]: the compiled tasks in the
+            order of the batch and the time spent in each stage.
+
+    Raises:
+        ValueError: If num_workers is given without multiprocessing.
+
+    """
+    if num_workers is not None and not multiprocessing:
+        raise ValueError("num_workers is only used when multiprocessing is enabled.")
+
+    start_time = time.perf_counter()
+    stages = dict.fromkeys(STAGES, 0.0)
+    assignments = [
+        {**batch_params, **params.static_params}
+        for batch_params in params.batch_assignments(*args)
+    ]
+
+    lattice_data = None
+    hoisted = ()
+    if not depends_on(circuit.register, batch_variables(params)):
+        timer = _StageTimer(stages)
+        # the register is the same for all tasks
+        register_circuit, _ = assign_circuit(circuit, assignments[0])
+        lattice_data = generate_lattice(capabilities, register_circuit)
+        timer.lap("lattice")
+        hoisted = ("lattice",)
+
+    if multiprocessing and len(assignments) > 1:
+        from os import cpu_count
+        from concurrent.futures import ProcessPoolExecutor as Pool
+
+        num_workers = min(max(int(num_workers or cpu_count()), 1), len(assignments))
+        chunksize = max(len(assignments) // (4 * num_workers), 1)
+
+        with Pool(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(circuit, capabilities, shots, lattice_data),
+        ) as pool:
+            tasks = []
+            # `map` returns the results in the order of the assignments
+            for task, task_stages in pool.map(
+                _compile_in_worker, assignments, chunksize=chunksize
+            ):
+                tasks.append(task)
+                for stage, seconds in task_stages.items():
+                    stages[stage] += seconds
+    else:
+        tasks = [
+            _compile_task(
+                circuit, task_assignments, capabilities, shots, lattice_data, stages
+            )
+            for task_assignments in assignments
+        ]
+
+    timings = CompileTimings(
+        stages, time.perf_counter() - start_time, len(tasks), hoisted
+    )
+    return tasks, timings
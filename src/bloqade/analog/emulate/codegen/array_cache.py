@@ -0,0 +1,445 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from decimal import Decimal
+from collections.abc import MutableMapping
+from dataclasses import field, dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from numpy.typing import NDArray
+from beartype.typing import Any, Dict, List, Tuple, Union, Callable, Optional
+
+from bloqade.analog.emulate.ir.space import Space, SpaceType
+from bloqade.analog.emulate.ir.emulator import (
+    Register,
+    LevelCoupling,
+    RabiOperatorData,
+    DetuningOperatorData,
+)
+from bloqade.analog.emulate.sparse_operator import IndexMapping, SparseMatrixCSR
+
+# bump when the layout of the entries changes to ignore older entries
+FORMAT_VERSION = 1
+
+META_FILE = "meta.json"
+
+Arrays = Dict[str, NDArray]
+OperatorData = Union[DetuningOperatorData, RabiOperatorData]
+
+
+def _decimal(value: Decimal) -> str:
+    # `Decimal("5.0")` and `Decimal("5")` share the same key
+    return str(Decimal(value).normalize())
+
+
+def _register_data(register: Register, positions: bool) -> Dict[str, Any]:
+    # like `Register.__eq__`, without blockade only the number of atoms
+    # determines the space, the positions are needed for the interaction
+    data = {
+        "atom_type": type(register.atom_type).__name__,
+        "n_atoms": len(register.sites),
+        "blockade_radius": _decimal(register.blockade_radius),
+    }
+    if positions or register.blockade_radius != Decimal("0"):
+        data["sites"] = [list(map(_decimal, site)) for site in register.sites]
+
+    return data
+
+
+def _digest(data: Dict[str, Any]) -> str:
+    data = {"version": FORMAT_VERSION, **data}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class DiskStore:
+    """Content addressed store of numpy arrays on disk.
+
+    Each entry is a directory named after the digest of its key holding a
+    `meta.json` file and one `.npy` file per array. Entries are written to a
+    temporary directory and renamed into place, so concurrent processes
+    never observe partially written entries. Arrays are loaded as read-only
+    memory maps. The total size of the store is bounded by evicting the
+    least recently used entries.
+
+    Attributes:
+        path (str): directory of the store, created if missing.
+        max_bytes (int): maximal total size of the entries in bytes.
+            Defaults to 1 GiB.
+    """
+
+    path: str
+    max_bytes: int = 2**30
+
+    def __post_init__(self):
+        os.makedirs(self.path, exist_ok=True)
+
+    def _entry(self, digest: str) -> str:
+        return os.path.join(self.path, digest)
+
+    def load(self, digest: str) -> Optional[Tuple[Dict[str, Any], Arrays]]:
+        """Load an entry, returns `None` if it does not exist."""
+        entry = self._entry(digest)
+        try:
+            with open(os.path.join(entry, META_FILE)) as io:
+                meta = json.load(io)
+
+            arrays = {
+                name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+                for name in meta["arrays"]
+            }
+            # the access time drives the eviction
+            os.utime(os.path.join(entry, META_FILE))
+        except (OSError, ValueError):
+            # missing, evicted by another process or corrupted
+            return None
+
+        return meta, arrays
+
+    def save(self, digest: str, meta: Dict[str, Any], arrays: Arrays) -> None:
+        """Store an entry, an existing entry with the same digest is kept."""
+        entry = self._entry(digest)
+        if os.path.exists(entry):
+            return
+
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.path)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), np.asarray(array))
+
+            with open(os.path.join(staging, META_FILE), "w") as io:
+                json.dump({**meta, "arrays": list(arrays)}, io)
+
+            os.rename(staging, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self.evict(keep=digest)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Return `(access time, size in bytes, digest)` of all entries."""
+        entries = []
+        for digest in os.listdir(self.path):
+            if digest.startswith("."):
+                continue
+
+            entry = self._entry(digest)
+            try:
+                last_used = os.stat(os.path.join(entry, META_FILE)).st_mtime
+                size = sum(
+                    os.stat(os.path.join(entry, name)).st_size
+                    for name in os.listdir(entry)
+                )
+            except OSError:
+                continue
+
+            entries.append((last_used, size, digest))
+
+        return entries
+
+    def remove(self, digest: str) -> None:
+        # move the entry out of the way first such that readers see either
+        # the full entry or no entry at all
+        trash = tempfile.mkdtemp(prefix=".trash-", dir=self.path)
+        try:
+            os.rename(self._entry(digest), os.path.join(trash, digest))
+        except OSError:
+            pass
+
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove the least recently used entries until the store fits in
+        `max_bytes`, the entry `keep` is never removed."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, digest in entries:
+            if total <= self.max_bytes:
+                break
+
+            if digest == keep:
+                continue
+
+            self.remove(digest)
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, digest in self.entries():
+            self.remove(digest)
+
+    def close(self) -> None:
+        pass
+
+
+# blocks are aligned for the numba kernels reading the arrays
+ALIGNMENT = 64
+
+Layout = List[Tuple[str, str, Tuple[int, ...], int]]
+
+
+@dataclass
+class SharedMemoryStore:
+    """Store of numpy arrays in shared memory blocks.
+
+    The process creating the store owns the blocks, it publishes an entry by
+    copying its arrays into a new block. Other processes, e.g. workers
+    receiving a pickled or forked copy of the store, attach to the blocks and
+    read the arrays without copying them, entries they store are not
+    published. The owner must `close` the store to free the blocks.
+
+    Attributes:
+        index (Dict[str, Tuple[str, Dict[str, Any], Layout]]): name of the
+            block, metadata and layout of the arrays of each entry.
+        pid (int): process id of the owner, defaults to the current process.
+        closed (bool): whether the owner closed the store, nothing is
+            published anymore once closed.
+    """
+
+    index: Dict[str, Tuple[str, Dict[str, Any], Layout]] = field(default_factory=dict)
+    pid: int = field(default_factory=os.getpid)
+    closed: bool = False
+    blocks: Dict[str, SharedMemory] = field(default_factory=dict, repr=False)
+
+    def __getstate__(self):
+        return {
+            "index": dict(self.index),
+            "pid": self.pid,
+            "closed": self.closed,
+            "blocks": {},
+        }
+
+    @property
+    def owner(self) -> bool:
+        return os.getpid() == self.pid
+
+    def _attach(self, name: str) -> SharedMemory:
+        if name not in self.blocks:
+            self.blocks[name] = SharedMemory(name=name)
+
+        return self.blocks[name]
+
+    def load(self, digest: str) -> Optional[Tuple[Dict[str, Any], Arrays]]:
+        """Load an entry, returns `None` if it does not exist."""
+        if digest not in self.index:
+            return None
+
+        name, meta, layout = self.index[digest]
+        try:
+            block = self._attach(name)
+        except FileNotFoundError:
+            # the owner closed the store
+            return None
+
+        arrays = {}
+        for array_name, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[array_name] = array
+
+        return meta, arrays
+
+    def save(self, digest: str, meta: Dict[str, Any], arrays: Arrays) -> None:
+        """Publish an entry, only the owner of the store publishes entries."""
+        if not self.owner or self.closed or digest in self.index:
+            return
+
+        layout, size = [], 0
+        for array_name, array in arrays.items():
+            array = np.asarray(array)
+            layout.append((array_name, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        block = SharedMemory(create=True, size=max(size, 1))
+        for (_, dtype, shape, offset), array in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+
+        self.blocks[block.name] = block
+        self.index[digest] = (block.name, meta, layout)
+
+    def remove(self, digest: str) -> None:
+        self.index.pop(digest, None)
+
+    def close(self) -> None:
+        """Detach from the blocks, the owner also frees the blocks."""
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # arrays still refer to the block, it is unmapped once they
+                # are garbage collected
+                pass
+
+            if self.owner:
+                block.unlink()
+
+        self.blocks.clear()
+        if self.owner:
+            self.index.clear()
+            self.closed = True
+
+
+Store = Union[DiskStore, SharedMemoryStore]
+
+
+class ArrayCache(MutableMapping):
+    """Mapping backed by a store of numpy arrays, either a `DiskStore` or a
+    `SharedMemoryStore`.
+
+    Entries are kept in memory once loaded or stored by this process, the
+    iteration and length only cover those entries. Only the store is
+    pickled, e.g. when the cache is sent to worker processes.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        digest: Callable[[Any], str],
+        encode: Callable[[Any], Tuple[Dict[str, Any], Arrays]],
+        decode: Callable[[Any, Dict[str, Any], Arrays], Any],
+    ):
+        self.store = store
+        self.digest = digest
+        self.encode = encode
+        self.decode = decode
+        self.memory = {}
+
+    def __getstate__(self):
+        return {**self.__dict__, "memory": {}}
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self.memory:
+            return self.memory[key]
+
+        result = self.store.load(self.digest(key))
+        if result is None:
+            raise KeyError(key)
+
+        value = self.decode(key, *result)
+        self.memory[key] = value
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+
+        return True
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.memory[key] = value
+        self.store.save(self.digest(key), *self.encode(value))
+
+    def __delitem__(self, key: Any) -> None:
+        self.memory.pop(key, None)
+        self.store.remove(self.digest(key))
+
+    def __iter__(self):
+        return iter(self.memory)
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+
+def _space_digest(key: Tuple[Register, Tuple, float]) -> str:
+    register, _, interaction_cutoff = key
+    data = {
+        "kind": "space",
+        "register": _register_data(register, True),
+        "interaction_cutoff": float(interaction_cutoff),
+    }
+    return _digest(data)
+
+
+def _encode_space(value: Tuple[Space, NDArray]) -> Tuple[Dict[str, Any], Arrays]:
+    space, rydberg = value
+    meta = {"space_type": space.space_type.value}
+    return meta, {"configurations": space.configurations, "rydberg": rydberg}
+
+
+def _decode_space(
+    key: Tuple[Register, Tuple, float], meta: Dict[str, Any], arrays: Arrays
+) -> Tuple[Space, NDArray]:
+    register, *_ = key
+    space = Space(
+        SpaceType(meta["space_type"]),
+        register.atom_type,
+        register,
+        arrays["configurations"],
+    )
+    return space, arrays["rydberg"]
+
+
+def _operator_digest(key: Tuple[Register, LevelCoupling, OperatorData]) -> str:
+    register, level_coupling, op_data = key
+    data = {
+        "kind": "operator",
+        "register": _register_data(register, False),
+        "level_coupling": level_coupling.value,
+        "operator_data": type(op_data).__name__,
+        "target_atoms": sorted(
+            [int(atom), _decimal(value)] for atom, value in op_data.target_atoms.items()
+        ),
+    }
+    if isinstance(op_data, RabiOperatorData):
+        data["operator_type"] = int(op_data.operator_type)
+
+    return _digest(data)
+
+
+def _encode_indices(
+    name: str, indices: Union[NDArray, slice], meta: Dict[str, Any], arrays: Arrays
+) -> None:
+    if isinstance(indices, slice):
+        meta[name] = [indices.start, indices.stop, indices.step]
+    else:
+        arrays[name] = indices
+
+
+def _encode_operator(value: Any) -> Tuple[Dict[str, Any], Arrays]:
+    if isinstance(value, np.ndarray):
+        return {"type": "diagonal"}, {"diagonal": value}
+
+    if isinstance(value, SparseMatrixCSR):
+        meta = {"type": "csr", "shape": list(value.shape)}
+        arrays = {"data": value.data, "indices": value.indices, "indptr": value.indptr}
+        return meta, arrays
+
+    if isinstance(value, IndexMapping):
+        meta, arrays = {"type": "index_mapping", "n_row": value.n_row}, {}
+        _encode_indices("row_indices", value.row_indices, meta, arrays)
+        _encode_indices("col_indices", value.col_indices, meta, arrays)
+        return meta, arrays
+
+    raise TypeError(f"Cannot store operator of type {type(value).__name__}.")
+
+
+def _decode_operator(key: Any, meta: Dict[str, Any], arrays: Arrays) -> Any:
+    if meta["type"] == "diagonal":
+        return arrays["diagonal"]
+
+    if meta["type"] == "csr":
+        return SparseMatrixCSR(
+            arrays["data"], arrays["indices"], arrays["indptr"], tuple(meta["shape"])
+        )
+
+    def indices(name: str) -> Union[NDArray, slice]:
+        return slice(*meta[name]) if name in meta else arrays[name]
+
+    return IndexMapping(meta["n_row"], indices("row_indices"), indices("col_indices"))
+
+
+def space_cache(store: Store) -> ArrayCache:
+    """Cache of the `Space` and Rydberg interaction of a register."""
+    return ArrayCache(store, _space_digest, _encode_space, _decode_space)
+
+
+def operator_cache(store: Store) -> ArrayCache:
+    """Cache of the detuning diagonals and rabi operators of a register."""
+    return ArrayCache(store, _operator_digest, _encode_operator, _decode_operator)
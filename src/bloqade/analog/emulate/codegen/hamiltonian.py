@@ -1,7 +1,8 @@
-from typing import Dict, Tuple, Union, Optional
+from typing import Dict, Tuple, Union, Callable, Optional
 from dataclasses import field, dataclass
 
 import numpy as np
+from numba import njit
 from numpy.typing import NDArray
 from scipy.sparse import csr_matrix
 
@@ -12,10 +13,12 @@ from bloqade.analog.emulate.ir.emulator import (
     Visitor,
     RabiTerm,
     Register,
+    JITWaveform,
     DetuningTerm,
     LevelCoupling,
     EmulatorProgram,
     RabiOperatorData,
+    WaveformRuntime,
     RabiOperatorType,
     DetuningOperatorData,
 )
@@ -26,23 +29,161 @@ from bloqade.analog.emulate.ir.state_vector import (
     RydbergHamiltonian,
 )
 from bloqade.analog.emulate.sparse_operator import IndexMapping, SparseMatrixCSR
+from bloqade.analog.emulate.codegen import array_cache
+from bloqade.analog.emulate.ir.piecewise_linear import PiecewiseLinearTable
 
 OperatorData = Union[DetuningOperatorData, RabiOperatorData]
 MatrixTypes = Union[csr_matrix, IndexMapping, NDArray]
 
 
+def rydberg_interaction_matrix(
+    register: Register, interaction_cutoff: float = 0.0
+) -> NDArray:
+    """Compute the pairwise Rydberg interactions `C6 / r^6` of a register.
+
+    Args:
+        register (Register): the register of atoms.
+        interaction_cutoff (float, optional): interactions below this value
+            are set to zero, interactions below the machine precision are
+            always dropped. Defaults to 0.0.
+
+    Returns:
+        NDArray: symmetric matrix of the interactions with zero diagonal.
+    """
+    positions = np.asarray(register.sites, dtype=np.float64).reshape(
+        len(register.sites), -1
+    )
+    distances = np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=-1)
+
+    with np.errstate(divide="ignore"):
+        interaction = RB_C6 / distances**6
+
+    np.fill_diagonal(interaction, 0.0)
+    cutoff = max(interaction_cutoff, np.finfo(np.float64).eps)
+    interaction[interaction <= cutoff] = 0.0
+    return interaction
+
+
+@njit(cache=True)
+def _rydberg_interaction_kernel(
+    configurations: NDArray, levels: NDArray, interaction: NDArray, output: NDArray
+) -> None:
+    # `levels` holds the number of levels, the rydberg state and one in the
+    # dtype of the configurations to avoid mixing signed and unsigned integers
+    n_level, rydberg, one = levels[0], levels[1], levels[2]
+    # for two levels the configuration is the bitmask of the rydberg atoms
+    bitmask = n_level == 2 and rydberg == 1
+    n_atoms = interaction.shape[0]
+
+    # consecutive configurations share the states of the most significant
+    # atoms, the following is kept for the atoms `a` and above: the
+    # configuration divided by `n_level**a`, the number of rydberg atoms, their
+    # interaction energy and the field `fields[c]` they apply on the atoms below
+    quotients = np.zeros(n_atoms, dtype=configurations.dtype)
+    states = np.zeros(n_atoms, dtype=configurations.dtype)
+    counts = np.zeros(n_atoms + 1, dtype=np.int64)
+    energies = np.zeros(n_atoms + 1, dtype=np.float64)
+    fields = np.zeros((n_atoms + 1, n_atoms), dtype=np.float64)
+
+    for k in range(configurations.size):
+        # find the atoms whose state changed from the previous configuration
+        quotient = configurations[k]
+        top = 0
+        while top < n_atoms and (k == 0 or quotient != quotients[top]):
+            quotients[top] = quotient
+            if bitmask:
+                states[top] = quotient & one
+                quotient >>= one
+            else:
+                states[top] = quotient % n_level
+                quotient //= n_level
+
+            top += 1
+
+        for atom in range(top - 1, -1, -1):
+            count = counts[atom + 1]
+            energy = energies[atom + 1]
+            if states[atom] == rydberg:
+                energy += fields[count, atom]
+                for other in range(atom):
+                    fields[count + 1, other] = (
+                        fields[count, other] + interaction[atom, other]
+                    )
+
+                count += 1
+
+            counts[atom] = count
+            energies[atom] = energy
+
+        output[k] = energies[0]
+
+
 @dataclass
 class CompileCache:
     """This class is used to cache the results of the code generation."""
 
-    operator_cache: Dict[Tuple[Register, LevelCoupling, OperatorData], MatrixTypes] = (
-        field(default_factory=dict)
-    )
-    space_cache: Dict[Register, Tuple[Space, NDArray]] = field(default_factory=dict)
+    # the disk cache comes first such that validation does not turn it into a dict
+    operator_cache: Union[
+        array_cache.ArrayCache,
+        Dict[Tuple[Register, LevelCoupling, OperatorData], MatrixTypes],
+    ] = field(default_factory=dict)
+    space_cache: Union[
+        array_cache.ArrayCache,
+        Dict[Tuple[Register, Tuple, float], Tuple[Space, NDArray]],
+    ] = field(default_factory=dict)
+
+    @classmethod
+    def persistent(cls, path: str, max_bytes: int = 2**30) -> "CompileCache":
+        """Create a cache stored on disk in the directory `path`.
+
+        The cache can be shared between processes and runs, the arrays are
+        memory mapped when loaded. See `DiskStore` for details.
+
+        Args:
+            path (str): directory of the cache, created if missing.
+            max_bytes (int, optional): maximal size of the cache in bytes, the
+                least recently used entries are evicted first. Defaults to 1 GiB.
+
+        Returns:
+            CompileCache: the cache.
+        """
+        store = array_cache.DiskStore(path, max_bytes)
+        return cls(
+            operator_cache=array_cache.operator_cache(store),
+            space_cache=array_cache.space_cache(store),
+        )
+
+    @classmethod
+    def shared_memory(cls) -> "CompileCache":
+        """Create a cache publishing the matrices in shared memory.
+
+        Worker processes receiving a copy of the cache read the matrices
+        published by this process before the copy was made without copying
+        them. See `SharedMemoryStore` for details, the cache must be closed to
+        free the shared memory.
+
+        Returns:
+            CompileCache: the cache.
+        """
+        store = array_cache.SharedMemoryStore()
+        return cls(
+            operator_cache=array_cache.operator_cache(store),
+            space_cache=array_cache.space_cache(store),
+        )
+
+    def close(self) -> None:
+        """Release the resources held by the cache, e.g. shared memory."""
+        for cache in (self.operator_cache, self.space_cache):
+            if isinstance(cache, array_cache.ArrayCache):
+                cache.store.close()
 
 
 class RydbergHamiltonianCodeGen(Visitor):
-    def __init__(self, compile_cache: Optional[CompileCache] = None):
+    def __init__(
+        self,
+        compile_cache: Optional[CompileCache] = None,
+        interaction_cutoff: float = 0.0,
+    ):
         if compile_cache is None:
             compile_cache = CompileCache()
 
@@ -51,6 +192,8 @@ class RydbergHamiltonianCodeGen(Visitor):
         self.level_coupling = None
         self.level_couplings = set()
         self.compile_cache = compile_cache
+        self.interaction_cutoff = interaction_cutoff
+        self.piecewise_linear_table = PiecewiseLinearTable()
 
     def visit_emulator_program(self, emulator_program: EmulatorProgram):
         self.level_couplings = set(list(emulator_program.pulses.keys()))
@@ -63,32 +206,36 @@ class RydbergHamiltonianCodeGen(Visitor):
     def visit_register(self, register: Register):
         self.register = register
 
-        if register in self.compile_cache.space_cache:
-            self.space, self.rydberg = self.compile_cache.space_cache[register]
+        # registers compare equal if they generate the same space, the
+        # interaction also depends on the positions of the atoms
+        key = (register, tuple(register.sites), self.interaction_cutoff)
+        if key in self.compile_cache.space_cache:
+            self.space, self.rydberg = self.compile_cache.space_cache[key]
             return
 
         self.space = Space.create(register)
-        sites = register.sites
 
         # generate rydberg interaction elements
-        self.rydberg = np.zeros(self.space.size, dtype=np.float64)
-
-        for index_1, site_1 in enumerate(sites):
-            site_1 = np.asarray(list(map(float, site_1)))
-            is_rydberg_1 = self.space.is_rydberg_at(index_1)
-            for index_2, sites_2 in enumerate(sites[index_1 + 1 :], index_1 + 1):
-                sites_2 = np.asarray(list(map(float, sites_2)))
-                distance = np.linalg.norm(site_1 - sites_2)
-
-                rydberg_interaction = RB_C6 / (distance**6)
+        interaction = rydberg_interaction_matrix(register, self.interaction_cutoff)
+        configurations = self.space.configurations
+        levels = np.array(
+            [register.atom_type.n_level, register.atom_type.State.Rydberg.value, 1],
+            dtype=configurations.dtype,
+        )
 
-                if rydberg_interaction <= np.finfo(np.float64).eps:
-                    continue
+        self.rydberg = np.zeros(self.space.size, dtype=np.float64)
+        _rydberg_interaction_kernel(configurations, levels, interaction, self.rydberg)
 
-                mask = np.logical_and(is_rydberg_1, self.space.is_rydberg_at(index_2))
-                self.rydberg[mask] += rydberg_interaction
+        self.compile_cache.space_cache[key] = (self.space, self.rydberg)
 
-        self.compile_cache.space_cache[register] = (self.space, self.rydberg)
+    def cache_operators(self, emulator_program: EmulatorProgram) -> None:
+        """Add the space and operators of a program to the compile cache
+        without generating the Hamiltonian."""
+        self.visit(emulator_program.register)
+        for level_coupling, fields in emulator_program.pulses.items():
+            self.level_coupling = level_coupling
+            for term in fields.detuning + fields.rabi:
+                self.visit(term.operator_data)
 
     def visit_fields(self, fields: Fields):
         terms = fields.detuning + fields.rabi
@@ -185,11 +332,22 @@ class RydbergHamiltonianCodeGen(Visitor):
         ] = operator
         return operator
 
+    def emit_waveform(self, jit_waveform: JITWaveform) -> Callable[[float], float]:
+        if jit_waveform.runtime is not WaveformRuntime.PiecewiseLinear:
+            return jit_waveform.emit()
+
+        # piecewise linear waveforms share a single coefficient table
+        piecewise_linear = jit_waveform.piecewise_linear
+        if piecewise_linear is None:
+            return jit_waveform.emit()
+
+        return self.piecewise_linear_table.add(piecewise_linear)
+
     def visit_detuning_term(self, detuning_term: DetuningTerm):
         self.detuning_ops.append(
             DetuningOperator(
                 diagonal=self.visit(detuning_term.operator_data),
-                amplitude=detuning_term.amplitude.emit(),
+                amplitude=self.emit_waveform(detuning_term.amplitude),
             )
         )
 
@@ -197,8 +355,8 @@ class RydbergHamiltonianCodeGen(Visitor):
         self.rabi_ops.append(
             RabiOperator(
                 op=self.visit(rabi_term.operator_data),
-                amplitude=rabi_term.amplitude.emit(),
-                phase=rabi_term.phase.emit() if rabi_term.phase else None,
+                amplitude=self.emit_waveform(rabi_term.amplitude),
+                phase=self.emit_waveform(rabi_term.phase) if rabi_term.phase else None,
             )
         )
 
@@ -4,9 +4,12 @@ from decimal import Decimal
 from functools import cached_property
 from dataclasses import field, dataclass
 
+import numpy as np
+
 from bloqade.analog.serialize import Serializer
 from bloqade.analog.ir.control.waveform import Waveform
 from bloqade.analog.emulate.ir.atom_type import AtomType
+from bloqade.analog.emulate.ir.piecewise_linear import PiecewiseLinearWaveform
 from bloqade.analog.compiler.codegen.common.json import (
     BloqadeIRSerializer,
     BloqadeIRDeserializer,
@@ -20,6 +23,8 @@ class WaveformRuntime(str, Enum):
     Python = "python"
     Numba = "numba"
     Interpret = "interpret"
+    Numpy = "numpy"
+    PiecewiseLinear = "piecewise_linear"
 
 
 @dataclass
@@ -62,6 +67,32 @@ class JITWaveform:
 
         return ast_canonicalized
 
+    @cached_property
+    def piecewise_linear(self) -> Optional[PiecewiseLinearWaveform]:
+        """Breakpoint table of the waveform, `None` if the waveform
+        is not piecewise linear."""
+        from bloqade.analog.compiler.codegen.python.piecewise_linear import (
+            NotPiecewiseLinearError,
+            CodegenPiecewiseLinearWaveform,
+        )
+
+        if not CodegenPiecewiseLinearWaveform.can_lower(self.canonicalized_ir):
+            return None
+
+        try:
+            return CodegenPiecewiseLinearWaveform().emit(self.canonicalized_ir)
+        except NotPiecewiseLinearError:
+            return None
+
+    @cached_property
+    def breakpoints(self) -> List[float]:
+        """Boundaries of the segments of the waveform, in increasing order."""
+        from bloqade.analog.compiler.analysis.python.waveform import (
+            WaveformBreakpoints,
+        )
+
+        return list(map(float, WaveformBreakpoints().scan(self.canonicalized_ir)))
+
     def emit(self) -> Callable[[float], float]:
         from bloqade.analog.compiler.codegen.python.waveform import (
             CodegenPythonWaveform,
@@ -71,6 +102,24 @@ class JITWaveform:
         if self.runtime is WaveformRuntime.Interpret:
             return self.canonicalized_ir
 
+        if self.runtime is WaveformRuntime.PiecewiseLinear:
+            # fall back to interpreting waveforms that are not piecewise linear
+            if self.piecewise_linear is None:
+                return self.canonicalized_ir
+
+            return self.piecewise_linear
+
+        if self.runtime is WaveformRuntime.Numpy:
+            ast = self.canonicalized_ir
+
+            def stub(time):
+                # accepts both scalar times and arrays of times
+                times = np.asarray(time, dtype=np.float64)
+                values = ast.eval_array(np.atleast_1d(times))
+                return values.reshape(times.shape) if times.ndim else float(values[0])
+
+            return stub
+
         scan_results = WaveformScan().scan(self.canonicalized_ir)
         stub = CodegenPythonWaveform(
             scan_results, jit_compiled=self.runtime is WaveformRuntime.Numba
@@ -81,19 +130,34 @@ class JITWaveform:
 
 @JITWaveform.set_serializer
 def _serialize(obj: JITWaveform) -> Dict[str, Any]:
-    return {
+    d = {
         "assignments": obj.assignments,
         "source": BloqadeIRSerializer().default(obj.source),
+        "runtime": obj.runtime.value,
     }
+    # only store the breakpoint table if it has already been generated
+    if "piecewise_linear" in obj.__dict__:
+        d["piecewise_linear"] = obj.piecewise_linear
+
+    return d
 
 
 @JITWaveform.set_deserializer
 def _deserializer(d: Dict[str, Any]) -> JITWaveform:
     from json import dumps, loads
 
+    has_piecewise_linear = "piecewise_linear" in d
+    piecewise_linear = d.pop("piecewise_linear", None)
+
     source_str = dumps(d["source"])
     d["source"] = loads(source_str, object_hook=BloqadeIRDeserializer.object_hook)
-    return JITWaveform(**d)
+    d["runtime"] = WaveformRuntime(d.get("runtime", WaveformRuntime.Interpret))
+    jit_waveform = JITWaveform(**d)
+
+    if has_piecewise_linear:
+        jit_waveform.__dict__["piecewise_linear"] = piecewise_linear
+
+    return jit_waveform
 
 
 class RabiOperatorType(int, Enum):
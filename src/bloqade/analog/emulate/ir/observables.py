@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numba import njit
+from numpy.typing import NDArray
+from beartype.typing import Tuple, Callable
+
+from bloqade.analog.emulate.ir.state_vector import RydbergHamiltonian
+
+# computes the value of an observable for a state at a given time into `out`
+Evaluator = Callable[[NDArray, float, NDArray], None]
+
+
+def _levels(hamiltonian: RydbergHamiltonian, state: str) -> NDArray:
+    # the number of levels, the measured state and one in the dtype of the
+    # configurations to avoid mixing signed and unsigned integers
+    space = hamiltonian.space
+    atom_type = space.atom_type
+    if state not in atom_type.str_to_int:
+        raise ValueError(
+            f"state: {state} is not a valid state for {type(atom_type).__name__}."
+        )
+
+    return np.array(
+        [atom_type.n_level, atom_type.str_to_int[state], 1],
+        dtype=space.configurations.dtype,
+    )
+
+
+@njit(cache=True)
+def _find_atoms(config, levels: NDArray, atoms: NDArray) -> int:
+    # write the atoms in the measured state into `atoms`, returns their number
+    n_level, target, one = levels[0], levels[1], levels[2]
+    count = 0
+    atom = 0
+    if n_level == 2 and target == 1:
+        # for two levels the configuration is the bitmask of the rydberg atoms
+        while config > 0:
+            if config & one:
+                atoms[count] = atom
+                count += 1
+
+            config >>= one
+            atom += 1
+    else:
+        for atom in range(atoms.size):
+            if config % n_level == target:
+                atoms[count] = atom
+                count += 1
+
+            config //= n_level
+
+    return count
+
+
+@njit(cache=True)
+def _densities_kernel(
+    configurations: NDArray, levels: NDArray, state: NDArray, out: NDArray
+) -> None:
+    atoms = np.empty(out.shape[0], dtype=np.int64)
+
+    out[:] = 0.0
+    for k in range(configurations.size):
+        probability = state[k].real ** 2 + state[k].imag ** 2
+        if probability == 0.0:
+            continue
+
+        count = _find_atoms(configurations[k], levels, atoms)
+        for i in range(count):
+            out[atoms[i]] += probability
+
+
+@njit(cache=True)
+def _correlations_kernel(
+    configurations: NDArray, levels: NDArray, state: NDArray, out: NDArray
+) -> None:
+    atoms = np.empty(out.shape[0], dtype=np.int64)
+
+    out[:, :] = 0.0
+    for k in range(configurations.size):
+        probability = state[k].real ** 2 + state[k].imag ** 2
+        if probability == 0.0:
+            continue
+
+        count = _find_atoms(configurations[k], levels, atoms)
+        for i in range(count):
+            for j in range(count):
+                out[atoms[i], atoms[j]] += probability
+
+
+class Observable:
+    """Observable computed during the evolution of a state vector."""
+
+    def shape(self, hamiltonian: RydbergHamiltonian) -> Tuple[int, ...]:
+        """Shape of the value of the observable."""
+        raise NotImplementedError
+
+    def compile(self, hamiltonian: RydbergHamiltonian) -> Evaluator:
+        """Precompute the data of the observable for the Hamiltonian.
+
+        Returns:
+            Evaluator: function called as `evaluate(state, time, out)` writing
+                the value for the state vector data `state` at time `time`
+                into the array `out`.
+        """
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class SiteDensities(Observable):
+    """Population of a state on each atom of the register, e.g. the rydberg
+    densities `<n_i>`.
+
+    Attributes:
+        state (str): the measured state, one of "g", "h" or "r" depending on
+            the atom type. Defaults to "r".
+    """
+
+    state: str = "r"
+
+    def shape(self, hamiltonian: RydbergHamiltonian) -> Tuple[int, ...]:
+        return (hamiltonian.space.n_atoms,)
+
+    def compile(self, hamiltonian: RydbergHamiltonian) -> Evaluator:
+        configurations = hamiltonian.space.configurations
+        levels = _levels(hamiltonian, self.state)
+
+        def evaluate(state: NDArray, time: float, out: NDArray) -> None:
+            _densities_kernel(configurations, levels, state, out)
+
+        return evaluate
+
+
+@dataclass(frozen=True)
+class DensityCorrelations(Observable):
+    """Correlations `<n_i n_j>` of the population of a state on each pair of
+    atoms of the register, the diagonal holds the densities `<n_i>`.
+
+    Attributes:
+        state (str): the measured state, one of "g", "h" or "r" depending on
+            the atom type. Defaults to "r".
+    """
+
+    state: str = "r"
+
+    def shape(self, hamiltonian: RydbergHamiltonian) -> Tuple[int, ...]:
+        n_atoms = hamiltonian.space.n_atoms
+        return (n_atoms, n_atoms)
+
+    def compile(self, hamiltonian: RydbergHamiltonian) -> Evaluator:
+        configurations = hamiltonian.space.configurations
+        levels = _levels(hamiltonian, self.state)
+
+        def evaluate(state: NDArray, time: float, out: NDArray) -> None:
+            _correlations_kernel(configurations, levels, state, out)
+
+        return evaluate
+
+
+@dataclass(frozen=True)
+class Energy(Observable):
+    """Average energy `<H(t)>` of the state."""
+
+    def shape(self, hamiltonian: RydbergHamiltonian) -> Tuple[int, ...]:
+        return ()
+
+    def compile(self, hamiltonian: RydbergHamiltonian) -> Evaluator:
+        workspace = hamiltonian.workspace
+        buffer = np.zeros(hamiltonian.space.size, dtype=np.complex128)
+
+        def evaluate(state: NDArray, time: float, out: NDArray) -> None:
+            workspace.update(time, hamiltonian.detuning_ops, hamiltonian.rabi_ops)
+            workspace.matvec(hamiltonian.rydberg, state, buffer)
+            out[...] = np.vdot(state, buffer).real
+
+        return evaluate
@@ -0,0 +1,251 @@
+from functools import cached_property
+from dataclasses import field, dataclass
+
+import numpy as np
+from numba import njit
+from numpy.typing import NDArray
+from beartype.typing import Any, Dict, List, Tuple, Optional
+
+from bloqade.analog.serialize import Serializer
+
+
+@njit(cache=True)
+def _piecewise_linear_impl(times, values, slopes, time, output):
+    if time > times[-1]:
+        output[:] = 0.0
+        return output
+
+    # segments are closed on the right, e.g. `times[i] < time <= times[i + 1]`
+    index = np.searchsorted(times, time) - 1
+    index = min(max(index, 0), times.size - 2)
+
+    dt = time - times[index]
+    for k in range(values.shape[0]):
+        output[k] = values[k, index] + slopes[k, index] * dt
+
+    return output
+
+
+def _slopes(times: NDArray, values: NDArray) -> NDArray:
+    dt = np.diff(times)
+    dv = np.diff(values, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(dt > 0, dv / dt, 0.0)
+
+
+@dataclass(frozen=True, eq=False)
+@Serializer.register
+class PiecewiseLinearWaveform:
+    """Breakpoint representation of a piecewise linear waveform.
+
+    Discontinuities are encoded by repeating a breakpoint, the first value is
+    the limit from the left and the second value is the limit from the right.
+    Like the `Append` waveform, the waveform takes the value of the segment
+    ending at a breakpoint and is zero after the last breakpoint.
+
+    Attributes:
+        times (NDArray): non-decreasing float64 array of breakpoints,
+            starting at 0.
+        values (NDArray): float64 array of values at each breakpoint.
+    """
+
+    times: NDArray
+    values: NDArray
+
+    def __post_init__(self):
+        times = np.asarray(self.times, dtype=np.float64)
+        values = np.asarray(self.values, dtype=np.float64)
+
+        if times.ndim != 1 or times.shape != values.shape or times.size < 2:
+            raise ValueError(
+                "Expecting `times` and `values` to be 1D arrays of the same size "
+                f"with at least two elements, got shapes {times.shape} "
+                f"and {values.shape}."
+            )
+
+        object.__setattr__(self, "times", times)
+        object.__setattr__(self, "values", values)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, PiecewiseLinearWaveform):
+            return False
+
+        return np.array_equal(self.times, other.times) and np.array_equal(
+            self.values, other.values
+        )
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1])
+
+    @cached_property
+    def slopes(self) -> NDArray:
+        return _slopes(self.times, self.values)
+
+    def _eval(self, times: NDArray, side: str) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        index = np.searchsorted(self.times, times, side=side) - 1
+        index = np.clip(index, 0, self.times.size - 2)
+        values = self.values[index] + self.slopes[index] * (times - self.times[index])
+
+        if side == "left":
+            return np.where(times > self.duration, 0.0, values)
+        else:
+            return np.where(times >= self.duration, 0.0, values)
+
+    def eval_left(self, times: NDArray) -> NDArray:
+        """Evaluate the limit from the left, i.e. the value of the waveform."""
+        return self._eval(times, "left")
+
+    def eval_right(self, times: NDArray) -> NDArray:
+        """Evaluate the limit from the right, zero at the end of the waveform."""
+        return self._eval(times, "right")
+
+    def __call__(self, time: float) -> float:
+        return float(self.eval_left(time))
+
+    def scale(self, value: float) -> "PiecewiseLinearWaveform":
+        return PiecewiseLinearWaveform(self.times, value * self.values)
+
+    def append(
+        self, other: "PiecewiseLinearWaveform", offset: Optional[float] = None
+    ) -> "PiecewiseLinearWaveform":
+        """Append `other` starting at `offset`, defaults to the duration."""
+        offset = self.duration if offset is None else offset
+        times = np.concatenate((self.times, other.times + offset))
+        values = np.concatenate((self.values, other.values))
+        return PiecewiseLinearWaveform(times, values).simplify()
+
+    def slice(self, start: float, stop: float) -> "PiecewiseLinearWaveform":
+        # a discontinuity at `start` is kept as a jump at the origin
+        inner = np.logical_and(self.times > start, self.times < stop)
+        times = np.concatenate(([start, start], self.times[inner], [stop]))
+        values = np.concatenate(
+            (
+                self.eval_left([start]),
+                self.eval_right([start]),
+                self.values[inner],
+                self.eval_left([stop]),
+            )
+        )
+        return PiecewiseLinearWaveform(times - start, values).simplify()
+
+    def simplify(self) -> "PiecewiseLinearWaveform":
+        """Remove redundant breakpoints.
+
+        Only the first and last of a run of repeated breakpoints are kept and
+        repeated breakpoints without a discontinuity are merged.
+        """
+        times, values = self.times, self.values
+
+        same_as_prev = np.zeros(times.size, dtype=bool)
+        same_as_next = np.zeros(times.size, dtype=bool)
+        same_as_prev[1:] = times[1:] == times[:-1]
+        same_as_next[:-1] = same_as_prev[1:]
+        keep = np.logical_not(np.logical_and(same_as_prev, same_as_next))
+        times, values = times[keep], values[keep]
+
+        continuous = np.zeros(times.size, dtype=bool)
+        continuous[1:] = np.logical_and(
+            times[1:] == times[:-1], values[1:] == values[:-1]
+        )
+        keep = np.logical_not(continuous)
+
+        if np.count_nonzero(keep) < 2:
+            return PiecewiseLinearWaveform(times[:2], values[:2])
+
+        return PiecewiseLinearWaveform(times[keep], values[keep])
+
+    @staticmethod
+    def merge(
+        waveforms: List["PiecewiseLinearWaveform"],
+    ) -> Tuple[NDArray, NDArray]:
+        """Express a list of waveforms on a common set of breakpoints.
+
+        Args:
+            waveforms (List[PiecewiseLinearWaveform]): waveforms to merge.
+
+        Returns:
+            Tuple[NDArray, NDArray]: the common breakpoints and a 2D array with
+            the values of each waveform (rows) at those breakpoints.
+        """
+        unique_times = np.unique(np.concatenate([wf.times for wf in waveforms]))
+        left = np.array([wf.eval_left(unique_times) for wf in waveforms])
+        right = np.array([wf.eval_right(unique_times) for wf in waveforms])
+
+        # no discontinuity needed at the end of the longest waveform
+        right[:, -1] = left[:, -1]
+
+        is_jump = np.any(left != right, axis=0)
+        times = np.repeat(unique_times, 1 + is_jump)
+        left_index = np.arange(unique_times.size) + np.cumsum(is_jump) - is_jump
+
+        values = np.empty((len(waveforms), times.size), dtype=np.float64)
+        values[:, left_index] = left
+        values[:, left_index[is_jump] + 1] = right[:, is_jump]
+
+        return times, values
+
+
+@PiecewiseLinearWaveform.set_serializer
+def _serializer(obj: PiecewiseLinearWaveform) -> Dict[str, Any]:
+    return {"times": obj.times.tolist(), "values": obj.values.tolist()}
+
+
+@PiecewiseLinearWaveform.set_deserializer
+def _deserializer(d: Dict[str, Any]) -> PiecewiseLinearWaveform:
+    times = np.asarray(list(map(float, d["times"])), dtype=np.float64)
+    values = np.asarray(list(map(float, d["values"])), dtype=np.float64)
+    return PiecewiseLinearWaveform(times, values)
+
+
+@dataclass
+class PiecewiseLinearTable:
+    """Coefficient table evaluating many piecewise linear waveforms at once.
+
+    All waveforms are merged onto a common set of breakpoints so a single
+    lookup gives the coefficients of every term at a given time. The result
+    of the last evaluation is memoized such that the terms of a Hamiltonian
+    evaluated at the same time share the lookup.
+    """
+
+    waveforms: List[PiecewiseLinearWaveform] = field(default_factory=list)
+    _time: float = field(init=False, default=np.nan, repr=False)
+    _output: NDArray = field(init=False, default=None, repr=False)
+
+    def add(self, waveform: PiecewiseLinearWaveform) -> "PiecewiseLinearCoefficient":
+        self.waveforms.append(waveform)
+        self.__dict__.pop("tables", None)
+        self._time = np.nan
+        return PiecewiseLinearCoefficient(self, len(self.waveforms) - 1)
+
+    @cached_property
+    def tables(self) -> Tuple[NDArray, NDArray, NDArray]:
+        times, values = PiecewiseLinearWaveform.merge(self.waveforms)
+        return times, np.ascontiguousarray(values), _slopes(times, values)
+
+    def __len__(self) -> int:
+        return len(self.waveforms)
+
+    def __call__(self, time: float) -> NDArray:
+        if time == self._time:
+            return self._output
+
+        times, values, slopes = self.tables
+        if self._output is None or self._output.size != len(self.waveforms):
+            self._output = np.zeros(len(self.waveforms), dtype=np.float64)
+
+        _piecewise_linear_impl(times, values, slopes, float(time), self._output)
+        self._time = time
+        return self._output
+
+
+@dataclass(frozen=True)
+class PiecewiseLinearCoefficient:
+    """Time dependent coefficient backed by a row of a `PiecewiseLinearTable`."""
+
+    table: PiecewiseLinearTable
+    index: int
+
+    def __call__(self, time: float) -> float:
+        return float(self.table(time)[self.index])
@@ -1,9 +1,12 @@
 from enum import Enum
+from functools import cached_property
 from dataclasses import dataclass
 
 import numpy as np
+from numba import njit
 from numpy.typing import NDArray
-from beartype.typing import TYPE_CHECKING, Any
+from scipy.spatial import cKDTree
+from beartype.typing import TYPE_CHECKING, Any, Tuple, ClassVar, Optional
 
 if TYPE_CHECKING:
     from .emulator import Register
@@ -13,6 +16,296 @@ if TYPE_CHECKING:
 MAX_PRINT_SIZE = 30
 
 
+def blockade_neighbors(register: "Register") -> Tuple[NDArray, NDArray]:
+    """Find the pairs of atoms within the blockade radius of each other.
+
+    Candidate pairs are found with a KD-tree, the exact distance check of each
+    candidate is done on the original coordinates of the sites.
+
+    Args:
+        register (Register): the register of atoms.
+
+    Returns:
+        Tuple[NDArray, NDArray]: `indptr` and `indices` in CSR format, the
+            neighbors of atom `i` with a larger index are
+            `indices[indptr[i]:indptr[i + 1]]`.
+    """
+    sites = register.sites
+    n_atom = len(sites)
+    blockade_radius = register.blockade_radius
+
+    pairs = np.zeros((0, 2), dtype=np.int64)
+    if n_atom > 1:
+        positions = np.asarray(sites, dtype=np.float64)
+        # widen the search radius such that rounding does not drop pairs
+        radius = float(blockade_radius) * (1 + 1e-8) + 1e-12
+        candidates = cKDTree(positions).query_pairs(radius, output_type="ndarray")
+        mask = [
+            np.linalg.norm(np.asarray(sites[i]) - np.asarray(sites[j]))
+            <= blockade_radius
+            for i, j in candidates
+        ]
+        pairs = candidates[np.asarray(mask, dtype=bool)].astype(np.int64)
+
+    # query_pairs returns i < j, sort by the first atom
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    indptr = np.zeros(n_atom + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=n_atom), out=indptr[1:])
+
+    return indptr, pairs[:, 1].copy()
+
+
+@njit(cache=True)
+def _enumerate_configurations(
+    values: NDArray, rydberg: int, indptr: NDArray, indices: NDArray, output: NDArray
+) -> int:
+    # depth first search over the states of the atoms starting with the most
+    # significant one, the configurations are therefore found in increasing
+    # order. An atom can only be in the rydberg state if none of its
+    # neighbors with a larger index are. Configurations are only written if
+    # `output` is large enough, the number of configurations is returned.
+    n_atom, n_level = values.shape
+    if n_atom == 0:
+        if output.size > 0:
+            output[0] = 0
+        return 1
+
+    states = np.full(n_atom, -1, dtype=np.int64)
+    max_states = np.zeros(n_atom, dtype=np.int64)
+    prefix = np.zeros(n_atom + 1, dtype=values.dtype)
+
+    count = 0
+    size = output.size
+    atom = n_atom - 1
+    max_states[atom] = n_level - 1
+    while atom < n_atom:
+        state = states[atom] + 1
+        if state > max_states[atom]:
+            states[atom] = -1
+            atom += 1
+            continue
+
+        states[atom] = state
+        prefix[atom] = prefix[atom + 1] + values[atom, state]
+
+        if atom == 0:
+            if count < size:
+                output[count] = prefix[0]
+            count += 1
+            continue
+
+        atom -= 1
+        max_state = n_level - 1
+        for k in range(indptr[atom], indptr[atom + 1]):
+            if states[indices[k]] == rydberg:
+                max_state = n_level - 2
+                break
+
+        if atom == 0:
+            # the states of the last atom are added at once
+            for state in range(max_state + 1):
+                if count < size:
+                    output[count] = prefix[1] + values[0, state]
+                count += 1
+
+            atom = 1
+        else:
+            max_states[atom] = max_state
+
+    return count
+
+
+@njit(cache=True)
+def _build_index_table(configurations: NDArray, table: NDArray) -> None:
+    # `table[b]` is the index of the first configuration whose high bits
+    # `config >> shift` are at least `b`, the last element holds `shift`
+    n_buckets = table.size - 2
+    shift = configurations.dtype.type(table[-1])
+
+    bucket = 0
+    for index in range(configurations.size):
+        key = configurations[index] >> shift
+        while bucket <= key:
+            table[bucket] = index
+            bucket += 1
+
+    while bucket <= n_buckets:
+        table[bucket] = configurations.size
+        bucket += 1
+
+
+@njit(cache=True)
+def lookup_index(configurations: NDArray, table: NDArray, config) -> int:
+    """Index of `config` in the space or -1 if it is not part of the space.
+
+    `table` is the `Space.index_table`. The configuration is the index in the
+    full space and without table all sorted configurations are searched."""
+    size = configurations.size
+    if size == 0:
+        return -1
+
+    if configurations[size - 1] == size - 1:
+        # sorted distinct configurations up to `size - 1` are the full space
+        return np.int64(config) if config < size else -1
+
+    low, high = 0, size
+    if table.size > 0:
+        # only search the configurations sharing the high bits of `config`
+        bucket = np.uint64(config) >> np.uint64(table[-1])
+        if bucket >= table.size - 2:
+            return -1
+
+        low, high = table[bucket], table[bucket + 1]
+
+    while low < high:
+        middle = (low + high) // 2
+        if configurations[middle] < config:
+            low = middle + 1
+        else:
+            high = middle
+
+    if low < size and configurations[low] == config:
+        return low
+
+    return -1
+
+
+@njit(cache=True)
+def lookup_indices(
+    configurations: NDArray, table: NDArray, configs: NDArray
+) -> NDArray:
+    """Vectorized `lookup_index`."""
+    indices = np.empty(configs.size, dtype=np.int64)
+    for k in range(configs.size):
+        indices[k] = lookup_index(configurations, table, configs[k])
+
+    return indices
+
+
+@njit(cache=True)
+def _build_alias_table(weights: NDArray, thresholds: NDArray, aliases: NDArray):
+    # Vose's alias method, the weights are scaled to an average of one
+    size = weights.size
+    small = np.empty(size, dtype=np.int64)
+    large = np.empty(size, dtype=np.int64)
+    n_small = 0
+    n_large = 0
+    for index in range(size):
+        thresholds[index] = weights[index]
+        aliases[index] = index
+        if weights[index] < 1.0:
+            small[n_small] = index
+            n_small += 1
+        else:
+            large[n_large] = index
+            n_large += 1
+
+    while n_small > 0 and n_large > 0:
+        n_small -= 1
+        index = small[n_small]
+        alias = large[n_large - 1]
+
+        aliases[index] = alias
+        thresholds[alias] -= 1.0 - thresholds[index]
+        if thresholds[alias] < 1.0:
+            n_large -= 1
+            small[n_small] = alias
+            n_small += 1
+
+    # the remaining entries are only left over by rounding errors
+    for k in range(n_large):
+        thresholds[large[k]] = 1.0
+
+    for k in range(n_small):
+        thresholds[small[k]] = 1.0
+
+
+@dataclass(frozen=True)
+class AliasTable:
+    """Table to draw samples of a discrete distribution in constant time per
+    sample with the alias method.
+
+    Attributes:
+        outcomes (NDArray): the outcomes with a non-zero probability.
+        thresholds (NDArray): probability to keep the outcome drawn uniformly.
+        aliases (NDArray): position in `outcomes` of the outcome replacing
+            the one drawn uniformly if it is not kept.
+    """
+
+    outcomes: NDArray
+    thresholds: NDArray
+    aliases: NDArray
+
+    @classmethod
+    def create(cls, weights: NDArray) -> "AliasTable":
+        """Build the table for the outcomes `0, ..., len(weights) - 1` with
+        probabilities proportional to `weights`."""
+        weights = np.asarray(weights, dtype=np.float64)
+        total = weights.sum()
+        if np.any(weights < 0) or not total > 0:
+            raise ValueError("weights must be non-negative with a positive finite sum.")
+
+        outcomes = np.flatnonzero(weights)
+        thresholds = np.empty(outcomes.size, dtype=np.float64)
+        aliases = np.empty(outcomes.size, dtype=np.int64)
+        _build_alias_table(
+            weights[outcomes] * (outcomes.size / total), thresholds, aliases
+        )
+        return cls(outcomes, thresholds, aliases)
+
+    def sample(
+        self, n_samples: int, rng: Optional[np.random.Generator] = None
+    ) -> NDArray:
+        """Draw `n_samples` outcomes using the generator `rng`, a new generator
+        seeded by the operating system is used if it is `None`."""
+        rng = np.random.default_rng() if rng is None else rng
+        positions = rng.integers(self.outcomes.size, size=n_samples)
+        keep = rng.random(n_samples) < self.thresholds[positions]
+        return self.outcomes[np.where(keep, positions, self.aliases[positions])]
+
+
+@njit(cache=True)
+def _decode_configurations(
+    configurations: NDArray, levels: NDArray, states: NDArray, output: NDArray
+) -> None:
+    # `output[shot, atom]` is the state of the atom mapped through `states`
+    n_level, one = levels[0], levels[1]
+    for shot in range(configurations.size):
+        config = configurations[shot]
+        for atom in range(output.shape[1]):
+            if n_level == 2:
+                # for two levels the configuration is the bitmask of the atoms
+                output[shot, atom] = states[config & one]
+                config >>= one
+            else:
+                output[shot, atom] = states[config % n_level]
+                config //= n_level
+
+
+@njit(cache=True)
+def _pack_configurations(
+    configurations: NDArray,
+    levels: NDArray,
+    states: NDArray,
+    n_atoms: int,
+    output: NDArray,
+) -> None:
+    # same as `_decode_configurations` followed by `np.packbits(..., axis=1)`
+    n_level, one = levels[0], levels[1]
+    for shot in range(configurations.size):
+        config = configurations[shot]
+        for atom in range(n_atoms):
+            if n_level == 2:
+                state = config & one
+                config >>= one
+            else:
+                state = config % n_level
+                config //= n_level
+
+            if states[state]:
+                output[shot, atom >> 3] |= np.uint8(128 >> (atom & 7))
+
+
 class SpaceType(str, Enum):
     FullSpace = "full_space"
     SubSpace = "sub_space"
@@ -20,6 +313,11 @@ class SpaceType(str, Enum):
 
 @dataclass(frozen=True)
 class Space:
+    # average number of configurations per bucket of the index table, a smaller
+    # value uses more memory for shorter searches. `None` disables the table,
+    # all configurations are then searched with a binary search.
+    INDEX_TABLE_BUCKET_SIZE: ClassVar[Optional[float]] = 1.0
+
     space_type: SpaceType
     atom_type: "AtomType"
     program_register: "Register"
@@ -36,71 +334,117 @@ class Space:
 
         return self.program_register == other.program_register
 
+    @staticmethod
+    def _config_type(register: "Register") -> np.dtype:
+        Ns = register.atom_type.n_level ** len(register.sites)
+        min_int_type = np.min_scalar_type(Ns - 1)
+        return np.result_type(min_int_type, np.uint32)
+
+    @staticmethod
+    def _state_values(register: "Register", config_type: np.dtype) -> NDArray:
+        # contribution of atom i in state s to the configuration integer
+        n_level = register.atom_type.n_level
+        values = [
+            [state * n_level**index for state in range(n_level)]
+            for index in range(len(register.sites))
+        ]
+        return np.array(values, dtype=config_type).reshape(-1, n_level)
+
     @classmethod
-    def create(cls, register: "Register"):
-        sites = register.sites
-        n_atom = len(sites)
-        atom_type = register.atom_type
-        blockade_radius = register.blockade_radius
-        Ns = atom_type.n_level**n_atom
+    def count_configurations(cls, register: "Register") -> int:
+        """Number of configurations of the space created for a register,
+        computed without storing the configurations.
 
-        check_atoms = []
+        Args:
+            register (Register): the register of atoms.
 
-        for index_1, site_1 in enumerate(sites[1:], 1):
-            site_1 = np.asarray(site_1)
-            atoms = []
-            for index_2, site_2 in enumerate(sites[:index_1]):
-                site_2 = np.asarray(site_2)
-                if np.linalg.norm(site_1 - site_2) <= blockade_radius:
-                    atoms.append(index_2)
+        Returns:
+            int: the size of the space.
+        """
+        atom_type = register.atom_type
+        indptr, indices = blockade_neighbors(register)
+
+        if indices.size == 0:
+            return atom_type.n_level ** len(register.sites)
+
+        config_type = cls._config_type(register)
+        return int(
+            _enumerate_configurations(
+                cls._state_values(register, config_type),
+                atom_type.State.Rydberg.value,
+                indptr,
+                indices,
+                np.zeros(0, dtype=config_type),
+            )
+        )
 
-            check_atoms.append(atoms)
+    @classmethod
+    def create(cls, register: "Register"):
+        n_atom = len(register.sites)
+        atom_type = register.atom_type
+        Ns = atom_type.n_level**n_atom
 
-        min_int_type = np.min_scalar_type(Ns - 1)
-        config_type = np.result_type(min_int_type, np.uint32)
+        indptr, indices = blockade_neighbors(register)
+        config_type = cls._config_type(register)
 
-        if all(len(sub_list) == 0 for sub_list in check_atoms):
+        if indices.size == 0:
             # default to 32 bit if smaller than 32 bit
             configurations = np.arange(Ns, dtype=config_type)
             return cls(SpaceType.FullSpace, atom_type, register, configurations)
 
-        states = np.arange(atom_type.n_level, dtype=config_type)
-        configurations = states
-
-        for index_1, indices in enumerate(check_atoms, 1):
-            # assume no configurations are blocked
-            mask = np.ones_like(configurations, dtype=bool)
-
-            # loop over neighbors within blockade radius
-            # find all non-blockaded configurations, e.g.
-            # places where neighbors are in the ground state.
-            # if the list if empty all configruations are
-            # valid and should be included.
-            for index_2 in indices:
-                is_ground = np.logical_not(
-                    atom_type.is_rydberg_at(configurations, index_2)
-                )
-                np.logical_and(is_ground, mask, out=mask)
-
-            non_blockaded = configurations[mask]
-            np.logical_not(mask, out=mask)
-            blockaded = configurations[mask]
+        # count the configurations first to allocate the exact size, they
+        # are enumerated in increasing order
+        values = cls._state_values(register, config_type)
+        rydberg = atom_type.State.Rydberg.value
+        size = _enumerate_configurations(
+            values, rydberg, indptr, indices, np.zeros(0, dtype=config_type)
+        )
+        configurations = np.empty(size, dtype=config_type)
+        _enumerate_configurations(values, rydberg, indptr, indices, configurations)
 
-            # add new configurations
-            # add all configurations because none of the configs are blockading
-            new_non_blockaded = np.kron(non_blockaded, np.ones_like(states)) + np.kron(
-                np.ones_like(non_blockaded), states * atom_type.n_level**index_1
-            )
-            # add all but the rydberg state because some at least one is blockading
-            new_blockaded = np.kron(blockaded, np.ones_like(states[:-1])) + np.kron(
-                np.ones_like(blockaded), states[:-1] * atom_type.n_level**index_1
-            )
+        return cls(SpaceType.SubSpace, atom_type, register, configurations)
 
-            configurations = np.hstack((new_blockaded, new_non_blockaded))
+    @cached_property
+    def index_table(self) -> NDArray:
+        """Table mapping the configurations to their index, see `lookup_index`,
+        built with `INDEX_TABLE_BUCKET_SIZE`."""
+        return self.build_index_table(Space.INDEX_TABLE_BUCKET_SIZE)
+
+    def build_index_table(self, bucket_size: Optional[float] = 1.0) -> NDArray:
+        """Build the `index_table` of the space and cache it.
+
+        The configurations are split into buckets by their most significant
+        bits, the table holds the index of the first configuration of each
+        bucket such that a lookup only searches a single bucket. Unlike a hash
+        table consecutive lookups of increasing configurations access
+        neighboring memory.
+
+        Args:
+            bucket_size (Optional[float], optional): average number of
+                configurations per bucket. `None` disables the table.
+                Defaults to 1.0.
+
+        Returns:
+            NDArray: the table, it is empty for the full space where the
+                configuration is the index or if the table is disabled.
+        """
+        if bucket_size is not None and not bucket_size > 0:
+            raise ValueError(f"bucket_size must be positive, got {bucket_size}.")
+
+        if self.space_type is SpaceType.FullSpace or bucket_size is None:
+            table = np.zeros(0, dtype=self.index_type)
+        else:
+            n_bits = int(self.configurations[-1]).bit_length()
+            bucket_bits = int(np.ceil(np.log2(max(self.size / bucket_size, 1))))
+            bucket_bits = min(bucket_bits, n_bits)
 
-        configurations.sort()
+            table = np.empty((1 << bucket_bits) + 2, dtype=self.index_type)
+            table[-1] = n_bits - bucket_bits
+            _build_index_table(self.configurations, table)
 
-        return cls(SpaceType.SubSpace, atom_type, register, configurations)
+        # bypass the frozen dataclass like `cached_property`
+        self.__dict__["index_table"] = table
+        return table
 
     @property
     def index_type(self) -> np.dtype:
@@ -142,9 +486,10 @@ class Space:
         if self.space_type is SpaceType.FullSpace:
             return (row_indices, col_config)
         else:
-            col_indices = np.searchsorted(self.configurations, col_config)
-            mask = col_indices < self.size
-            mask[mask] = col_config[mask] == self.configurations[col_indices[mask]]
+            col_indices = lookup_indices(
+                self.configurations, self.index_table, col_config
+            )
+            mask = col_indices >= 0
 
             if not np.all(mask):
                 if isinstance(row_indices, slice):
@@ -165,30 +510,31 @@ class Space:
         if self.space_type is SpaceType.FullSpace:
             return (row_indices, col_config)
         else:
-            col_indices = np.searchsorted(self.configurations, col_config)
-
-            mask = col_indices < self.size
-            col_indices = col_indices[mask]
-            row_indices = row_indices[mask]
-
-            mask = col_config[mask] == self.configurations[col_indices]
-            col_indices = col_indices[mask]
-            row_indices = row_indices[mask]
+            col_indices = lookup_indices(
+                self.configurations, self.index_table, col_config
+            )
 
-            return (row_indices, col_indices)
+            mask = col_indices >= 0
+            return (row_indices[mask], col_indices[mask])
 
     def fock_state_to_index(self, fock_state: str) -> int:
         state_int = self.atom_type.string_to_integer(fock_state)
         if self.space_type is SpaceType.FullSpace:
             return state_int
         else:
-            index = np.searchsorted(self.configurations, state_int)
-            if index >= self.size or state_int != self.configurations[index]:
+            configurations = self.configurations
+            if state_int > np.iinfo(configurations.dtype).max:
+                index = -1
+            else:
+                state_int = configurations.dtype.type(state_int)
+                index = lookup_index(configurations, self.index_table, state_int)
+
+            if index < 0:
                 raise ValueError(
-                    "state: {fock_state} not in rydberg blockade subspace."
+                    f"state: {fock_state} not in rydberg blockade subspace."
                 )
 
-            return index
+            return int(index)
 
     def index_to_fock_state(self, index: int) -> str:
         if index < 0 or index >= self.size:
@@ -209,24 +555,52 @@ class Space:
         return StateVector(state, self)
 
     def sample_state_vector(
-        self, state_vector: NDArray, n_samples: int, project_hyperfine: bool = True
+        self,
+        state_vector: NDArray,
+        n_samples: int,
+        project_hyperfine: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        packed: bool = False,
     ) -> NDArray:
+        """Sample the configurations of a state vector.
+
+        Args:
+            state_vector (NDArray): the normalized state vector.
+            n_samples (int): the number of samples.
+            project_hyperfine (bool, optional): map the hyperfine state to the
+                ground state for three level atoms. Defaults to True.
+            rng (Optional[np.random.Generator], optional): the random number
+                generator, see `AliasTable.sample`. Defaults to None.
+            packed (bool, optional): pack the states of the atoms of each
+                sample into bits as `np.packbits(..., axis=1)`, the states must
+                be 0 or 1. Defaults to False.
+
+        Returns:
+            NDArray: uint8 array of shape `(n_samples, n_atoms)` with the state
+                of each atom, `(n_samples, ceil(n_atoms / 8))` if packed.
+        """
         from .atom_type import ThreeLevelAtomType
 
-        p = np.abs(state_vector) ** 2
-        sampled_configs = np.random.choice(self.configurations, size=n_samples, p=p)
+        n_level = self.atom_type.n_level
+        states = np.arange(n_level, dtype=np.uint8)
+        if project_hyperfine and isinstance(self.atom_type, ThreeLevelAtomType):
+            states = np.array([0, 0, 1], dtype=np.uint8)
 
-        sample_fock_states = np.empty((n_samples, self.n_atoms), dtype=np.uint8)
+        if packed and states.max() > 1:
+            raise ValueError("Cannot pack the samples of more than two states.")
 
-        for i in range(self.n_atoms):
-            sample_fock_states[:, i] = sampled_configs % self.atom_type.n_level
-            sampled_configs //= self.atom_type.n_level
+        indices = AliasTable.create(np.abs(state_vector) ** 2).sample(n_samples, rng)
+        configurations = self.configurations[indices]
+        levels = np.array([n_level, 1], dtype=configurations.dtype)
 
-        if project_hyperfine and isinstance(self.atom_type, ThreeLevelAtomType):
-            sample_fock_states[sample_fock_states == 1] = 0
-            sample_fock_states[sample_fock_states == 2] = 1
+        if packed:
+            output = np.zeros((n_samples, (self.n_atoms + 7) // 8), dtype=np.uint8)
+            _pack_configurations(configurations, levels, states, self.n_atoms, output)
+        else:
+            output = np.empty((n_samples, self.n_atoms), dtype=np.uint8)
+            _decode_configurations(configurations, levels, states, output)
 
-        return sample_fock_states
+        return output
 
     def __str__(self):
         # TODO: update this to use unicode
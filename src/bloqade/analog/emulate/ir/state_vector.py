@@ -1,4 +1,5 @@
 from typing import Annotated
+from functools import cached_property
 from dataclasses import field, dataclass
 
 import plum
@@ -8,11 +9,25 @@ from beartype import beartype
 from numpy.typing import NDArray
 from scipy.sparse import diags, csr_matrix
 from beartype.vale import IsAttr, IsEqual
-from beartype.typing import List, Tuple, Union, Callable, Iterator, Optional, Sequence
+from beartype.typing import (
+    Dict,
+    List,
+    Tuple,
+    Union,
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+)
 from scipy.integrate import ode
 
-from bloqade.analog.emulate.ir.space import MAX_PRINT_SIZE, Space
+from bloqade.analog.emulate.krylov import LanczosExpm
+from bloqade.analog.emulate.ir.space import MAX_PRINT_SIZE, Space, lookup_index
 from bloqade.analog.emulate.ir.emulator import EmulatorProgram
+from bloqade.analog.emulate.ir.piecewise_linear import (
+    PiecewiseLinearTable,
+    PiecewiseLinearWaveform,
+)
 from bloqade.analog.emulate.sparse_operator import (
     IndexMapping,
     SparseMatrixCSC,
@@ -28,7 +43,7 @@ StateArray = Union[RealArray, Complexarray]
 
 
 @njit(cache=True)
-def _expt_one_body_op(configs, n_level, psi, site, op):
+def _expt_one_body_op(configs, n_level, psi, site, op, table=None):
     res = np.zeros(psi.shape[1:], dtype=np.complex128)
 
     divisor = n_level**site
@@ -38,16 +53,22 @@ def _expt_one_body_op(configs, n_level, psi, site, op):
         for row, ele in enumerate(op[:, col]):
             new_config = config - (col * divisor) + (row * divisor)
 
-            j = np.searchsorted(configs, new_config)
+            if table is None:
+                j = np.searchsorted(configs, new_config)
+                if j >= configs.size or configs[j] != new_config:
+                    continue
+            else:
+                j = lookup_index(configs, table, new_config)
+                if j < 0:
+                    continue
 
-            if j < configs.size and configs[j] == new_config:
-                res += ele * psi[i, ...] * np.conj(psi[j, ...])
+            res += ele * psi[i, ...] * np.conj(psi[j, ...])
 
     return res
 
 
 @njit(cache=True)
-def _expt_two_body_op(configs, n_level, psi, sites, data, indices, indptr):
+def _expt_two_body_op(configs, n_level, psi, sites, data, indices, indptr, table=None):
     res = np.zeros(psi.shape[1:], dtype=np.complex128)
 
     divisor_1 = n_level ** sites[1]
@@ -72,14 +93,145 @@ def _expt_two_body_op(configs, n_level, psi, sites, data, indices, indptr):
                 + (row_2 * divisor_2)
             )
 
-            j = np.searchsorted(configs, new_config)
+            if table is None:
+                j = np.searchsorted(configs, new_config)
+                if j >= configs.size or configs[j] != new_config:
+                    continue
+            else:
+                j = lookup_index(configs, table, new_config)
+                if j < 0:
+                    continue
 
-            if j < configs.size and configs[j] == new_config:
-                res += ele * psi[i, ...] * np.conj(psi[j, ...])
+            res += ele * psi[i, ...] * np.conj(psi[j, ...])
 
     return res
 
 
+@njit(cache=True)
+def _group_atoms(config, levels: NDArray, order: NDArray, starts: NDArray) -> None:
+    # sort the atoms by their local state, the atoms in state `s` are
+    # `order[starts[s]:starts[s + 1]]`
+    n_level, one = levels[0], levels[1]
+    n_atoms = order.size
+    digits = np.empty(n_atoms, dtype=np.int64)
+
+    starts[:] = 0
+    for atom in range(n_atoms):
+        if n_level == 2:
+            digits[atom] = config & one
+            config >>= one
+        else:
+            digits[atom] = config % n_level
+            config //= n_level
+
+        starts[digits[atom] + 1] += 1
+
+    for state in range(starts.size - 1):
+        starts[state + 1] += starts[state]
+
+    filled = starts[:-1].copy()
+    for atom in range(n_atoms):
+        order[filled[digits[atom]]] = atom
+        filled[digits[atom]] += 1
+
+
+@njit(cache=True)
+def _site_expectations_kernel(
+    configurations: NDArray,
+    table: NDArray,
+    values: NDArray,
+    levels: NDArray,
+    psi: NDArray,
+    op: NDArray,
+    out: NDArray,
+) -> None:
+    # `values[a, s]` is the contribution of atom `a` in state `s` to the
+    # configuration, only the columns of `op` with nonzero elements are visited
+    n_atoms, n_level = values.shape
+    order = np.empty(n_atoms, dtype=np.int64)
+    starts = np.empty(n_level + 1, dtype=np.int64)
+
+    for k in range(configurations.size):
+        amplitude = psi[k]
+        if amplitude == 0:
+            continue
+
+        config = configurations[k]
+        _group_atoms(config, levels, order, starts)
+
+        for col in range(n_level):
+            for row in range(n_level):
+                ele = op[row, col]
+                if ele == 0:
+                    continue
+
+                for atom in order[starts[col] : starts[col + 1]]:
+                    if row == col:
+                        j = k
+                    else:
+                        new_config = config - values[atom, col] + values[atom, row]
+                        j = lookup_index(configurations, table, new_config)
+                        if j < 0:
+                            continue
+
+                    out[atom] += ele * amplitude * np.conj(psi[j])
+
+
+@njit(cache=True)
+def _pair_expectations_kernel(
+    configurations: NDArray,
+    table: NDArray,
+    values: NDArray,
+    levels: NDArray,
+    psi: NDArray,
+    data: NDArray,
+    indices: NDArray,
+    indptr: NDArray,
+    out: NDArray,
+) -> None:
+    # the column of the two body operator acting on atoms `(a, b)` is
+    # `n_level * s_a + s_b`, `data`, `indices` and `indptr` are in CSC format
+    n_atoms, n_level = values.shape
+    order = np.empty(n_atoms, dtype=np.int64)
+    starts = np.empty(n_level + 1, dtype=np.int64)
+
+    for k in range(configurations.size):
+        amplitude = psi[k]
+        if amplitude == 0:
+            continue
+
+        config = configurations[k]
+        _group_atoms(config, levels, order, starts)
+
+        for col in range(n_level * n_level):
+            if indptr[col] == indptr[col + 1]:
+                continue
+
+            col_a, col_b = divmod(col, n_level)
+            for atom_a in order[starts[col_a] : starts[col_a + 1]]:
+                for atom_b in order[starts[col_b] : starts[col_b + 1]]:
+                    if atom_a == atom_b:
+                        continue
+
+                    for e in range(indptr[col], indptr[col + 1]):
+                        row_a, row_b = divmod(indices[e], n_level)
+                        if row_a == col_a and row_b == col_b:
+                            j = k
+                        else:
+                            new_config = (
+                                config
+                                - values[atom_a, col_a]
+                                + values[atom_a, row_a]
+                                - values[atom_b, col_b]
+                                + values[atom_b, row_b]
+                            )
+                            j = lookup_index(configurations, table, new_config)
+                            if j < 0:
+                                continue
+
+                        out[atom_a, atom_b] += data[e] * amplitude * np.conj(psi[j])
+
+
 @dataclass(frozen=True)
 class StateVector:
     data: NDArray
@@ -128,6 +280,7 @@ class StateVector:
                 data=csc.data,
                 indices=csc.indices,
                 indptr=csc.indptr,
+                table=self.space.index_table,
             )
 
             return complex(value.real, value.imag)
@@ -170,6 +323,7 @@ class StateVector:
             psi=self.data,
             site=site_index,
             op=matrix,
+            table=self.space.index_table,
         )
 
         return complex(value.real, value.imag) / self.norm()
@@ -201,10 +355,133 @@ class StateVector:
         """
         ...
 
-    def sample(self, shots: int, project_hyperfine: bool = True) -> NDArray:
-        """Sample the state vector and return bitstrings."""
+    def _check_operator(self, matrix: np.ndarray, n_sites: int) -> None:
+        n_level = self.space.atom_type.n_level
+        shape = (n_level**n_sites, n_level**n_sites)
+
+        if matrix.shape != shape:
+            raise ValueError(
+                f"expecting operator to be size {shape}, got {matrix.shape}"
+            )
+
+    def _kernel_args(self) -> Tuple[NDArray, NDArray, NDArray, NDArray]:
+        space = self.space
+        config_type = space.configurations.dtype
+        values = Space._state_values(space.program_register, config_type)
+        levels = np.array([space.atom_type.n_level, 1], dtype=config_type)
+        return space.configurations, space.index_table, values, levels
+
+    def _to_sites(self, values: NDArray) -> NDArray:
+        # map the atoms of the register to the sites of the geometry
+        register = self.space.program_register
+        shape = (self.space.n_sites,) * values.ndim
+        result = np.full(shape, np.nan, dtype=np.complex128)
+
+        sites = list(register.full_index_to_index.keys())
+        atoms = list(register.full_index_to_index.values())
+        result[np.ix_(*[sites] * values.ndim)] = values[np.ix_(*[atoms] * values.ndim)]
+        return result
+
+    def site_expectations(self, matrix: np.ndarray) -> NDArray:
+        """Expectation values of a one body operator on every site in a single
+        pass over the state vector.
+
+        Args:
+            matrix (np.ndarray): Square matrix representing operator in the local
+                hilbert space.
+
+        Returns:
+            NDArray: complex array, the value of site `i` is the same as
+                `local_trace(matrix, i)`, empty sites are `nan`.
+
+        Raises:
+            ValueError: Error is raised when the dimension of `matrix` is not
+            consistent with the number of levels of the atoms.
+        """
+        self._check_operator(matrix, 1)
+
+        out = np.zeros(self.space.n_atoms, dtype=np.complex128)
+        _site_expectations_kernel(
+            *self._kernel_args(),
+            self.data,
+            np.asarray(matrix, dtype=np.complex128),
+            out,
+        )
+        return self._to_sites(out / self.norm() ** 2)
+
+    def pair_correlations(self, matrix: np.ndarray) -> NDArray:
+        """Expectation values of a two body operator on every pair of sites in a
+        single pass over the state vector.
+
+        Args:
+            matrix (np.ndarray): Square matrix representing either a one body
+                operator `O`, the correlations `<O_i O_j>` are computed, or a two
+                body operator as in `local_trace`.
+
+        Returns:
+            NDArray: complex array, the value of the pair `(i, j)` is the same as
+                `local_trace(matrix, (i, j))`. The diagonal holds `<O_i O_i>` for
+                a one body operator and `nan` for a two body operator, empty
+                sites are `nan`.
+
+        Raises:
+            ValueError: Error is raised when the dimension of `matrix` is not
+            consistent with the number of levels of the atoms.
+        """
+        from scipy.sparse import csc_array
+
+        n_level = self.space.atom_type.n_level
+        one_body = matrix.shape == (n_level, n_level)
+        if one_body:
+            two_body = np.kron(matrix, matrix)
+        else:
+            self._check_operator(matrix, 2)
+            two_body = matrix
+
+        csc = csc_array(np.asarray(two_body, dtype=np.complex128))
+        csc.sort_indices()
+
+        n_atoms = self.space.n_atoms
+        out = np.zeros((n_atoms, n_atoms), dtype=np.complex128)
+        _pair_expectations_kernel(
+            *self._kernel_args(),
+            self.data,
+            csc.data,
+            csc.indices.astype(np.int64),
+            csc.indptr.astype(np.int64),
+            out,
+        )
+        out /= self.norm() ** 2
+
+        if one_body:
+            squares = np.zeros(n_atoms, dtype=np.complex128)
+            _site_expectations_kernel(
+                *self._kernel_args(),
+                self.data,
+                np.asarray(matrix @ matrix, dtype=np.complex128),
+                squares,
+            )
+            np.fill_diagonal(out, squares / self.norm() ** 2)
+        else:
+            np.fill_diagonal(out, np.nan)
+
+        return self._to_sites(out)
+
+    def sample(
+        self,
+        shots: int,
+        project_hyperfine: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        packed: bool = False,
+    ) -> NDArray:
+        """Sample the state vector and return bitstrings, see
+        `Space.sample_state_vector`."""
         return self.space.sample_state_vector(
-            self.data, shots, project_hyperfine=project_hyperfine
+            self.data,
+            shots,
+            project_hyperfine=project_hyperfine,
+            rng=rng,
+            packed=packed,
         )
 
     def normalize(self) -> None:
@@ -298,6 +575,293 @@ class RabiOperator:
         return mat + mat.T.conj()
 
 
+@njit(cache=True)
+def _hamiltonian_matvec_impl(
+    offset,
+    diagonals,
+    detuning_coeffs,
+    indptr,
+    run_ptr,
+    run_slots,
+    indices,
+    data,
+    rabi_coeffs,
+    scale,
+    input,
+    output,
+):
+    # single pass over the rows: diagonal terms followed by the off-diagonal
+    # elements of all rabi terms, `input` and `output` must not overlap.
+    for i in range(output.size):
+        diagonal = offset[i]
+        for k in range(detuning_coeffs.size):
+            diagonal += detuning_coeffs[k] * diagonals[i, k]
+
+        row_out = diagonal * input[i]
+
+        # the elements of a row are grouped in runs belonging to the same term
+        # such that each coefficient is applied once per row.
+        for run in range(indptr[i], indptr[i + 1]):
+            # `data` is real, accumulate real and imaginary parts separately
+            term_real = 0.0
+            term_imag = 0.0
+            for j in range(run_ptr[run], run_ptr[run + 1]):
+                value = input[indices[j]]
+                term_real += data[j] * value.real
+                term_imag += data[j] * value.imag
+
+            row_out += rabi_coeffs[run_slots[run]] * complex(term_real, term_imag)
+
+        output[i] = scale * row_out
+
+    return output
+
+
+@njit(cache=True)
+def _hamiltonian_matmat_impl(
+    offset,
+    diagonals,
+    detuning_coeffs,
+    indptr,
+    run_ptr,
+    run_slots,
+    indices,
+    data,
+    rabi_coeffs,
+    scale,
+    input,
+    output,
+):
+    # same as `_hamiltonian_matvec_impl` for a block of states stored as the
+    # columns of `input`, column `t` uses the coefficients in row `t` of
+    # `detuning_coeffs` and `rabi_coeffs`.
+    n_states = input.shape[1]
+    row_out = np.zeros(n_states, dtype=np.complex128)
+    term_real = np.zeros(n_states, dtype=np.float64)
+    term_imag = np.zeros(n_states, dtype=np.float64)
+
+    for i in range(output.shape[0]):
+        for t in range(n_states):
+            diagonal = offset[i]
+            for k in range(detuning_coeffs.shape[1]):
+                diagonal += detuning_coeffs[t, k] * diagonals[i, k]
+
+            row_out[t] = diagonal * input[i, t]
+
+        for run in range(indptr[i], indptr[i + 1]):
+            term_real[:] = 0.0
+            term_imag[:] = 0.0
+            for j in range(run_ptr[run], run_ptr[run + 1]):
+                # the states are contiguous in a row of `input`
+                col = indices[j]
+                for t in range(n_states):
+                    value = input[col, t]
+                    term_real[t] += data[j] * value.real
+                    term_imag[t] += data[j] * value.imag
+
+            slot = run_slots[run]
+            for t in range(n_states):
+                row_out[t] += rabi_coeffs[t, slot] * complex(term_real[t], term_imag[t])
+
+        for t in range(n_states):
+            output[i, t] = scale * row_out[t]
+
+    return output
+
+
+@dataclass(frozen=True)
+class HamiltonianWorkspace:
+    """All terms of a `RydbergHamiltonian` fused into a single operator.
+
+    The detuning diagonals are stored as the columns of `diagonals` and the
+    rabi terms are merged into a single sparse matrix. The elements of each
+    row are grouped into runs belonging to the same term: row `i` has the runs
+    `indptr[i]:indptr[i + 1]` and run `r` has the elements
+    `run_ptr[r]:run_ptr[r + 1]` with coefficient `rabi_coeffs[run_slots[r]]`.
+    The coefficient of rabi term `k` is stored in `rabi_coeffs[2 * k]` and the
+    one of its hermitian conjugate in `rabi_coeffs[2 * k + 1]`. Coefficients
+    and buffers are preallocated such that applying the Hamiltonian does not
+    allocate.
+    """
+
+    diagonals: NDArray
+    indptr: NDArray
+    run_ptr: NDArray
+    run_slots: NDArray
+    indices: NDArray
+    data: NDArray
+    detuning_coeffs: NDArray
+    rabi_coeffs: NDArray
+    zeros: NDArray
+    phases: NDArray
+    register: NDArray
+
+    @staticmethod
+    def create(
+        size: int,
+        detuning_ops: List["DetuningOperator"],
+        rabi_ops: List["RabiOperator"],
+    ) -> "HamiltonianWorkspace":
+        diagonals = np.zeros((size, len(detuning_ops)), dtype=np.float64)
+        for k, detuning_op in enumerate(detuning_ops):
+            diagonals[:, k] = detuning_op.diagonal
+
+        rows = [np.zeros(0, dtype=np.intp)]
+        cols = [np.zeros(0, dtype=np.intp)]
+        data = [np.zeros(0, dtype=np.float64)]
+        slots = [np.zeros(0, dtype=np.intp)]
+        for k, rabi_op in enumerate(rabi_ops):
+            coo = rabi_op.op.tocsr().tocoo()
+            rows.append(coo.row)
+            cols.append(coo.col)
+            data.append(coo.data)
+            slots.append(np.full(coo.nnz, 2 * k))
+
+            if rabi_op.phase is not None:
+                rows.append(coo.col)
+                cols.append(coo.row)
+                data.append(coo.data)
+                slots.append(np.full(coo.nnz, 2 * k + 1))
+
+        rows = np.concatenate(rows)
+        slots = np.concatenate(slots)
+        order = np.lexsort((slots, rows))
+        rows, slots = rows[order], slots[order]
+
+        # keep the index arrays small to reduce the memory traffic
+        index_type = np.result_type(np.int32, np.min_scalar_type(-size))
+        indices = np.concatenate(cols)[order].astype(index_type)
+        data = np.concatenate(data)[order].astype(np.float64)
+
+        # a new run starts whenever the row or the term changes
+        is_start = np.ones(rows.size, dtype=bool)
+        is_start[1:] = (rows[1:] != rows[:-1]) | (slots[1:] != slots[:-1])
+        (run_start,) = np.nonzero(is_start)
+
+        run_ptr = np.append(run_start, rows.size).astype(np.intp)
+        run_slots = slots[run_start].astype(np.min_scalar_type(2 * len(rabi_ops)))
+
+        indptr = np.zeros(size + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows[run_start], minlength=size), out=indptr[1:])
+
+        return HamiltonianWorkspace(
+            diagonals=diagonals,
+            indptr=indptr,
+            run_ptr=run_ptr,
+            run_slots=run_slots,
+            indices=indices,
+            data=data,
+            detuning_coeffs=np.zeros(len(detuning_ops), dtype=np.float64),
+            rabi_coeffs=np.zeros(2 * len(rabi_ops), dtype=np.complex128),
+            zeros=np.zeros(size, dtype=np.float64),
+            phases=np.zeros(size, dtype=np.complex128),
+            register=np.zeros(size, dtype=np.complex128),
+        )
+
+    def update(
+        self,
+        time: float,
+        detuning_ops: List["DetuningOperator"],
+        rabi_ops: List["RabiOperator"],
+    ) -> None:
+        """Evaluate the coefficients of all terms at time `time`."""
+        for k, detuning_op in enumerate(detuning_ops):
+            if detuning_op.amplitude:
+                self.detuning_coeffs[k] = detuning_op.amplitude(time)
+            else:
+                self.detuning_coeffs[k] = 1.0
+
+        for k, rabi_op in enumerate(rabi_ops):
+            amplitude = rabi_op.amplitude(time) / 2
+            if rabi_op.phase is not None:
+                amplitude *= np.exp(-1j * rabi_op.phase(time))
+
+            self.rabi_coeffs[2 * k] = amplitude
+            self.rabi_coeffs[2 * k + 1] = np.conj(amplitude)
+
+    def update_average(
+        self,
+        times: Sequence[float],
+        weights: Sequence[float],
+        detuning_ops: List["DetuningOperator"],
+        rabi_ops: List["RabiOperator"],
+    ) -> None:
+        """Set the coefficients to the weighted sum of the coefficients at
+        `times`, e.g. to apply a linear combination of Hamiltonians."""
+        detuning_coeffs = np.zeros_like(self.detuning_coeffs)
+        rabi_coeffs = np.zeros_like(self.rabi_coeffs)
+
+        for time, weight in zip(times, weights):
+            self.update(time, detuning_ops, rabi_ops)
+            detuning_coeffs += weight * self.detuning_coeffs
+            rabi_coeffs += weight * self.rabi_coeffs
+
+        self.detuning_coeffs[:] = detuning_coeffs
+        self.rabi_coeffs[:] = rabi_coeffs
+
+    def same_structure(self, other: "HamiltonianWorkspace") -> bool:
+        """Check if both workspaces apply the same operators, only differing by
+        the coefficients of the terms."""
+        return all(
+            np.array_equal(getattr(self, name), getattr(other, name))
+            for name in (
+                "diagonals",
+                "indptr",
+                "run_ptr",
+                "run_slots",
+                "indices",
+                "data",
+            )
+        )
+
+    def matmat(
+        self,
+        offset: NDArray,
+        detuning_coeffs: NDArray,
+        rabi_coeffs: NDArray,
+        input: NDArray,
+        output: NDArray,
+        scale: complex = 1.0,
+    ) -> NDArray:
+        """Apply the Hamiltonian to each column of `input`, with the
+        coefficients of column `t` given by the rows `detuning_coeffs[t]` and
+        `rabi_coeffs[t]`."""
+        return _hamiltonian_matmat_impl(
+            offset,
+            self.diagonals,
+            detuning_coeffs,
+            self.indptr,
+            self.run_ptr,
+            self.run_slots,
+            self.indices,
+            self.data,
+            rabi_coeffs,
+            scale,
+            input,
+            output,
+        )
+
+    def matvec(
+        self, offset: NDArray, input: NDArray, output: NDArray, scale: complex = 1.0
+    ) -> NDArray:
+        """Compute `scale * (diag(offset) + H) @ input` using the coefficients
+        of the last call to `update`."""
+        return _hamiltonian_matvec_impl(
+            offset,
+            self.diagonals,
+            self.detuning_coeffs,
+            self.indptr,
+            self.run_ptr,
+            self.run_slots,
+            self.indices,
+            self.data,
+            self.rabi_coeffs,
+            scale,
+            input,
+            output,
+        )
+
+
 @dataclass(frozen=True)
 class RydbergHamiltonian:
     """Hamiltonian for a given task.
@@ -320,18 +884,16 @@ class RydbergHamiltonian:
     detuning_ops: List[DetuningOperator] = field(default_factory=list)
     rabi_ops: List[RabiOperator] = field(default_factory=list)
 
-    def _ode_complex_kernel(self, time: float, register: NDArray, output: NDArray):
-        diagonal = sum(
-            (detuning.get_diagonal(time) for detuning in self.detuning_ops),
-            start=self.rydberg,
+    @cached_property
+    def workspace(self) -> HamiltonianWorkspace:
+        return HamiltonianWorkspace.create(
+            self.space.size, self.detuning_ops, self.rabi_ops
         )
 
-        np.multiply(diagonal, register, out=output)
-        for rabi_op in self.rabi_ops:
-            rabi_op.dot(register, output, time)
-
-        output *= -1j
-        return output
+    def _ode_complex_kernel(self, time: float, register: NDArray, output: NDArray):
+        workspace = self.workspace
+        workspace.update(time, self.detuning_ops, self.rabi_ops)
+        return workspace.matvec(self.rydberg, register, output, scale=-1j)
 
     def _ode_real_kernel(self, time: float, register: NDArray, output: NDArray):
         # this is needed to use solver that only work on real-valued states
@@ -340,22 +902,18 @@ class RydbergHamiltonian:
         ).view(np.float64)
 
     def _ode_complex_kernel_int(self, time: float, register: NDArray, output: NDArray):
-        diagonal = sum(
-            (detuning.get_diagonal(time) for detuning in self.detuning_ops),
-        )
+        workspace = self.workspace
+        workspace.update(time, self.detuning_ops, self.rabi_ops)
 
-        u = np.exp(-1j * self.rydberg * time)
+        u = workspace.phases
+        np.multiply(self.rydberg, -1j * time, out=u)
+        np.exp(u, out=u)
 
-        int_register = u * register
-
-        np.multiply(diagonal, int_register, out=output)
-        for rabi_op in self.rabi_ops:
-            rabi_op.dot(int_register, output, time)
+        int_register = np.multiply(u, register, out=workspace.register)
+        workspace.matvec(workspace.zeros, int_register, output, scale=-1j)
 
         np.conj(u, out=u)
         np.multiply(u, output, out=output)
-
-        output *= -1j
         return output
 
     def _ode_real_kernel_int(self, time: float, register: NDArray, output: NDArray):
@@ -386,16 +944,9 @@ class RydbergHamiltonian:
         if output is None:
             output = np.zeros_like(register, dtype=np.complex128)
 
-        diagonal = sum(
-            (detuning.get_diagonal(time) for detuning in self.detuning_ops),
-            start=self.rydberg,
-        )
-
-        np.multiply(diagonal, register, out=output)
-        for rabi_op in self.rabi_ops:
-            rabi_op.dot(register, output, time)
-
-        return output
+        workspace = self.workspace
+        workspace.update(time, self.detuning_ops, self.rabi_ops)
+        return workspace.matvec(self.rydberg, register, output)
 
     @beartype
     def average(
@@ -484,9 +1035,40 @@ class RydbergHamiltonian:
         return hamiltonian
 
 
+@dataclass(frozen=True)
+class MagnusScheme:
+    """Commutator-free Magnus integrator.
+
+    A step of size `h` from time `t` applies the exponentials
+    `exp(-i h scale H)` in order, where `H = sum_k weights[k] H(t + nodes[k] h)`
+    and the weights of each exponential sum up to one.
+    """
+
+    order: int
+    exponentials: Tuple[Tuple[float, Tuple[float, ...], Tuple[float, ...]], ...]
+
+
+_GAUSS_NODES = (0.5 - np.sqrt(3) / 6, 0.5 + np.sqrt(3) / 6)
+_CF4_WEIGHTS = ((3 - 2 * np.sqrt(3)) / 6, (3 + 2 * np.sqrt(3)) / 6)
+
+MAGNUS_SCHEMES = {
+    # exponential midpoint rule
+    "magnus2": MagnusScheme(2, ((1.0, (0.5,), (1.0,)),)),
+    # fourth order scheme with two exponentials, see Blanes and Moan,
+    # Appl. Numer. Math. 56, 1519 (2006)
+    "magnus4": MagnusScheme(
+        4,
+        (
+            (0.5, _GAUSS_NODES, _CF4_WEIGHTS[::-1]),
+            (0.5, _GAUSS_NODES, _CF4_WEIGHTS),
+        ),
+    ),
+}
+
+
 @dataclass(frozen=True)
 class AnalogGate:
-    SUPPORTED_SOLVERS = ["lsoda", "dop853", "dopri5"]
+    SUPPORTED_SOLVERS = ["lsoda", "dop853", "dopri5", *MAGNUS_SCHEMES]
 
     hamiltonian: RydbergHamiltonian
 
@@ -601,6 +1183,142 @@ class AnalogGate:
 
             yield StateVector(solver.y.view(np.complex128), self.hamiltonian.space)
 
+    def _segments(self) -> List[Tuple[float, float, bool]]:
+        # split the program at the boundaries of the segments of all waveforms,
+        # a segment is constant if all waveforms are known to be constant on it
+        emulator_ir = self.hamiltonian.emulator_ir
+        jit_waveforms = []
+        for fields in emulator_ir.pulses.values():
+            jit_waveforms.extend(term.amplitude for term in fields.detuning)
+            for term in fields.rabi:
+                jit_waveforms.append(term.amplitude)
+                if term.phase is not None:
+                    jit_waveforms.append(term.phase)
+
+        breakpoints = {0.0, float(emulator_ir.duration)}
+        for jit_waveform in jit_waveforms:
+            breakpoints.update(jit_waveform.breakpoints)
+            if jit_waveform.piecewise_linear is not None:
+                breakpoints.update(jit_waveform.piecewise_linear.times.tolist())
+
+        breakpoints = sorted(
+            time for time in breakpoints if 0.0 <= time <= emulator_ir.duration
+        )
+        piecewise_linear = [
+            jit_waveform.piecewise_linear for jit_waveform in jit_waveforms
+        ]
+
+        segments = []
+        for start, stop in zip(breakpoints[:-1], breakpoints[1:]):
+            is_constant = all(
+                pwl is not None and pwl.eval_right([start]) == pwl.eval_left([stop])
+                for pwl in piecewise_linear
+            )
+            segments.append((start, stop, is_constant))
+
+        return segments
+
+    def _apply_magnus(
+        self,
+        state_vec: StateVector,
+        solver_name: str = "magnus4",
+        atol: float = 1e-7,
+        rtol: float = 1e-14,
+        nsteps: int = 2_147_483_647,
+        times: Sequence[float] = (),
+    ) -> Iterator[StateVector]:
+        state_vec, solver_name, atol, rtol, nsteps, times = self._check_args(
+            state_vec, solver_name, atol, rtol, nsteps, times
+        )
+
+        if any(end < start for start, end in zip(times[:-1], times[1:])):
+            raise ValueError(f"'{solver_name}' requires increasing times.")
+
+        hamiltonian = self.hamiltonian
+        workspace = hamiltonian.workspace
+        scheme = MAGNUS_SCHEMES[solver_name]
+        expm = LanczosExpm(hamiltonian.space.size)
+
+        state = np.array(state_vec.data, dtype=np.complex128)
+        full_step = np.empty_like(state)
+        half_step = np.empty_like(state)
+        tol = atol + rtol * np.linalg.norm(state)
+
+        def matvec(input: NDArray, output: NDArray) -> NDArray:
+            return workspace.matvec(hamiltonian.rydberg, input, output)
+
+        def step(psi: NDArray, time: float, h: float):
+            for scale, nodes, weights in scheme.exponentials:
+                workspace.update_average(
+                    [time + node * h for node in nodes],
+                    weights,
+                    hamiltonian.detuning_ops,
+                    hamiltonian.rabi_ops,
+                )
+                # the exponentials must be more accurate than the steps
+                expm.apply(matvec, psi, scale * h, 0.1 * tol)
+
+        segments = self._segments()
+        current_time = 0.0
+        h = None
+        step_count = 0
+
+        for time in times:
+            # never step over the boundary of a segment of the waveforms
+            stops = [
+                (min(stop, time), is_constant)
+                for start, stop, is_constant in segments
+                if start < time and current_time < stop
+            ]
+
+            for stop, is_constant in stops:
+                if is_constant and current_time < stop:
+                    # the Hamiltonian does not change, the exponential is exact
+                    workspace.update(
+                        (current_time + stop) / 2,
+                        hamiltonian.detuning_ops,
+                        hamiltonian.rabi_ops,
+                    )
+                    expm.apply(matvec, state, stop - current_time, tol)
+                    current_time = stop
+
+                while current_time < stop:
+                    h = stop - current_time if h is None else h
+                    dt = min(h, stop - current_time)
+
+                    # estimate the local error by step doubling
+                    np.copyto(full_step, state)
+                    step(full_step, current_time, dt)
+                    np.copyto(half_step, state)
+                    step(half_step, current_time, dt / 2)
+                    step(half_step, current_time + dt / 2, dt / 2)
+
+                    step_count += 1
+                    if step_count > nsteps:
+                        raise RuntimeError(f"{solver_name}: Larger nsteps is needed.")
+
+                    error = np.linalg.norm(half_step - full_step) / (
+                        2**scheme.order - 1
+                    )
+                    step_tol = atol + rtol * np.linalg.norm(state)
+
+                    if error <= step_tol:
+                        state, half_step = half_step, state
+                        current_time = (
+                            stop if dt == stop - current_time else current_time + dt
+                        )
+
+                    if error == 0:
+                        factor = 5.0
+                    else:
+                        factor = 0.9 * (step_tol / error) ** (1 / (scheme.order + 1))
+
+                    # a step clipped by `stop` does not limit the next step
+                    h_new = dt * min(5.0, max(0.2, factor))
+                    h = max(h, h_new) if error <= step_tol and dt < h else h_new
+
+            yield StateVector(state.copy(), hamiltonian.space)
+
     def _apply_interaction_picture(
         self,
         state_vec: StateVector,
@@ -651,7 +1369,21 @@ class AnalogGate:
         times: Union[Sequence[float], RealArray] = (),
         interaction_picture: bool = False,
     ):
-        if interaction_picture:
+        if solver_name in MAGNUS_SCHEMES:
+            if interaction_picture:
+                raise ValueError(
+                    f"'{solver_name}' does not support the interaction picture."
+                )
+
+            return self._apply_magnus(
+                state,
+                solver_name=solver_name,
+                atol=atol,
+                rtol=rtol,
+                nsteps=nsteps,
+                times=times,
+            )
+        elif interaction_picture:
             return self._apply_interaction_picture(
                 state,
                 solver_name=solver_name,
@@ -680,9 +1412,11 @@ class AnalogGate:
         nsteps: int = 2_147_483_647,
         interaction_picture: bool = False,
         project_hyperfine: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        packed: bool = False,
     ) -> NDArray[np.uint8]:
         """Run the emulation with all atoms in the ground state,
-        sampling the final state vector."""
+        sampling the final state vector, see `StateVector.sample`."""
 
         options = dict(
             solver_name=solver_name,
@@ -696,4 +1430,327 @@ class AnalogGate:
         (result,) = self.apply(state, **options)
         result.normalize()
 
-        return result.sample(shots, project_hyperfine=project_hyperfine)
+        return result.sample(
+            shots, project_hyperfine=project_hyperfine, rng=rng, packed=packed
+        )
+
+
+@dataclass(frozen=True)
+class BatchAnalogGate:
+    """Evolve the states of several Hamiltonians together.
+
+    The Hamiltonians must share the same Hilbert space and operators, only
+    differing by the waveforms of the terms, e.g. the tasks of a parameter
+    sweep. The states are stacked as the columns of a `(space.size, n_tasks)`
+    matrix and integrated as a single ODE, the right hand side applies all
+    Hamiltonians in one pass over the sparse structure.
+
+    Attributes:
+        hamiltonians (List[RydbergHamiltonian]): Hamiltonians to evolve,
+            see `BatchAnalogGate.group` to split a list of Hamiltonians into
+            compatible groups.
+    """
+
+    SUPPORTED_SOLVERS = ["lsoda", "dop853", "dopri5"]
+
+    hamiltonians: List[RydbergHamiltonian]
+
+    def __post_init__(self):
+        if len(self.hamiltonians) == 0:
+            raise ValueError("Expecting at least one Hamiltonian.")
+
+        first, *rest = self.hamiltonians
+        if not all(BatchAnalogGate.compatible(first, other) for other in rest):
+            raise ValueError(
+                "All Hamiltonians of a batch must share the same space, "
+                "operators and duration."
+            )
+
+    @staticmethod
+    def compatible(first: RydbergHamiltonian, other: RydbergHamiltonian) -> bool:
+        """Check if two Hamiltonians can be evolved in the same batch."""
+        return (
+            first.space == other.space
+            and first.emulator_ir.duration == other.emulator_ir.duration
+            and np.array_equal(first.rydberg, other.rydberg)
+            and first.workspace.same_structure(other.workspace)
+        )
+
+    @staticmethod
+    def group(hamiltonians: List[RydbergHamiltonian]) -> List[List[int]]:
+        """Split Hamiltonians into batches that can be evolved together.
+
+        Args:
+            hamiltonians (List[RydbergHamiltonian]): Hamiltonians to group.
+
+        Returns:
+            List[List[int]]: indices of the Hamiltonians of each batch, in
+            order of first appearance.
+        """
+        # the register and duration are cheap to compare and rule out most
+        # candidates before the operators are compared
+        candidates: Dict[Tuple, List[List[int]]] = {}
+        groups = []
+        for index, hamiltonian in enumerate(hamiltonians):
+            emulator_ir = hamiltonian.emulator_ir
+            key = (emulator_ir.register, emulator_ir.duration)
+
+            for group in candidates.setdefault(key, []):
+                if BatchAnalogGate.compatible(hamiltonians[group[0]], hamiltonian):
+                    group.append(index)
+                    break
+            else:
+                candidates[key].append([index])
+                groups.append(candidates[key][-1])
+
+        return groups
+
+    @property
+    def space(self) -> Space:
+        return self.hamiltonians[0].space
+
+    @property
+    def rydberg(self) -> NDArray:
+        return self.hamiltonians[0].rydberg
+
+    @cached_property
+    def workspace(self) -> HamiltonianWorkspace:
+        return self.hamiltonians[0].workspace
+
+    @cached_property
+    def coefficients(self) -> Tuple[NDArray, NDArray]:
+        workspace = self.workspace
+        n_tasks = len(self.hamiltonians)
+        detuning_coeffs = np.zeros((n_tasks, workspace.detuning_coeffs.size))
+        rabi_coeffs = np.zeros(
+            (n_tasks, workspace.rabi_coeffs.size), dtype=np.complex128
+        )
+        return detuning_coeffs, rabi_coeffs
+
+    @cached_property
+    def buffers(self) -> Tuple[NDArray, NDArray]:
+        # phases and state of the interaction picture
+        phases = np.zeros((self.space.size, 1), dtype=np.complex128)
+        register = np.zeros(
+            (self.space.size, len(self.hamiltonians)), dtype=np.complex128
+        )
+        return phases, register
+
+    @cached_property
+    def piecewise_linear(self) -> Optional[Tuple[PiecewiseLinearTable, NDArray]]:
+        # when all waveforms are piecewise linear the coefficients of all tasks
+        # are looked up at once from a single table, `indices` holds the rows
+        # of the detuning amplitudes, rabi amplitudes and phases of each task
+        table = PiecewiseLinearTable()
+        indices = []
+        for hamiltonian in self.hamiltonians:
+            emulator_ir = hamiltonian.emulator_ir
+            zero = PiecewiseLinearWaveform([0.0, emulator_ir.duration], [0.0, 0.0])
+
+            # same order as the operators generated by `RydbergHamiltonianCodeGen`
+            waveforms = []
+            for fields in emulator_ir.pulses.values():
+                waveforms.extend(term.amplitude for term in fields.detuning)
+            for fields in emulator_ir.pulses.values():
+                waveforms.extend(term.amplitude for term in fields.rabi)
+            for fields in emulator_ir.pulses.values():
+                waveforms.extend(term.phase for term in fields.rabi)
+
+            n_terms = len(hamiltonian.detuning_ops) + 2 * len(hamiltonian.rabi_ops)
+            if len(waveforms) != n_terms:
+                return None
+
+            rows = []
+            for jit_waveform in waveforms:
+                # terms without phase have a zero phase
+                waveform = (
+                    zero if jit_waveform is None else jit_waveform.piecewise_linear
+                )
+                if waveform is None:
+                    return None
+
+                rows.append(table.add(waveform).index)
+
+            indices.append(rows)
+
+        return table, np.array(indices, dtype=np.intp)
+
+    def _update(self, time: float) -> Tuple[NDArray, NDArray]:
+        detuning_coeffs, rabi_coeffs = self.coefficients
+
+        if self.piecewise_linear is not None:
+            table, indices = self.piecewise_linear
+            n_detuning = detuning_coeffs.shape[1]
+            n_rabi = rabi_coeffs.shape[1] // 2
+
+            values = table(time)[indices]
+            detuning_coeffs[:] = values[:, :n_detuning]
+
+            amplitude = values[:, n_detuning : n_detuning + n_rabi] / 2
+            phase = values[:, n_detuning + n_rabi :]
+            rabi_coeffs[:, 0::2] = amplitude * np.exp(-1j * phase)
+            rabi_coeffs[:, 1::2] = np.conj(rabi_coeffs[:, 0::2])
+            return detuning_coeffs, rabi_coeffs
+
+        for t, hamiltonian in enumerate(self.hamiltonians):
+            workspace = hamiltonian.workspace
+            workspace.update(time, hamiltonian.detuning_ops, hamiltonian.rabi_ops)
+            detuning_coeffs[t] = workspace.detuning_coeffs
+            rabi_coeffs[t] = workspace.rabi_coeffs
+
+        return detuning_coeffs, rabi_coeffs
+
+    def _ode_complex_kernel(self, time: float, register: NDArray, output: NDArray):
+        shape = (self.space.size, len(self.hamiltonians))
+        detuning_coeffs, rabi_coeffs = self._update(time)
+        self.workspace.matmat(
+            self.rydberg,
+            detuning_coeffs,
+            rabi_coeffs,
+            register.reshape(shape),
+            output.reshape(shape),
+            scale=-1j,
+        )
+        return output
+
+    def _ode_real_kernel(self, time: float, register: NDArray, output: NDArray):
+        # this is needed to use solver that only work on real-valued states
+        return self._ode_complex_kernel(
+            time, register.view(np.complex128), output
+        ).view(np.float64)
+
+    def _ode_complex_kernel_int(self, time: float, register: NDArray, output: NDArray):
+        shape = (self.space.size, len(self.hamiltonians))
+        detuning_coeffs, rabi_coeffs = self._update(time)
+
+        u, int_register = self.buffers
+        np.multiply(self.rydberg[:, None], -1j * time, out=u)
+        np.exp(u, out=u)
+
+        np.multiply(u, register.reshape(shape), out=int_register)
+        block = output.reshape(shape)
+        self.workspace.matmat(
+            self.workspace.zeros,
+            detuning_coeffs,
+            rabi_coeffs,
+            int_register,
+            block,
+            scale=-1j,
+        )
+
+        np.conj(u, out=u)
+        np.multiply(u, block, out=block)
+        return output
+
+    def _ode_real_kernel_int(self, time: float, register: NDArray, output: NDArray):
+        # this is needed to use solver that only work on real-valued states
+        return self._ode_complex_kernel_int(
+            time, register.view(np.complex128), output
+        ).view(np.float64)
+
+    @beartype
+    def apply(
+        self,
+        states: Optional[List[StateVector]] = None,
+        solver_name: str = "dop853",
+        atol: float = 1e-7,
+        rtol: float = 1e-14,
+        nsteps: int = 2_147_483_647,
+        times: Union[Sequence[float], RealArray] = (),
+        interaction_picture: bool = False,
+    ) -> Iterator[List[StateVector]]:
+        """Evolve one state per Hamiltonian, yielding the states of all
+        Hamiltonians at each time in `times`.
+
+        The states share the steps of the integrator. The error of the solvers
+        is measured as the root mean square over all components, the
+        tolerances are therefore divided by `sqrt(n_tasks)` such that the
+        error of each state stays within the requested tolerances.
+        """
+        space = self.space
+        n_tasks = len(self.hamiltonians)
+        duration = self.hamiltonians[0].emulator_ir.duration
+        times = [duration] if len(times) == 0 else times
+
+        if states is None:
+            states = [space.zero_state(np.complex128) for _ in self.hamiltonians]
+
+        if len(states) != n_tasks:
+            raise ValueError(f"Expecting {n_tasks} states, got {len(states)}.")
+
+        if any(state.space != space for state in states):
+            raise ValueError("State vector not in the same space as the Hamiltonian.")
+
+        if solver_name not in BatchAnalogGate.SUPPORTED_SOLVERS:
+            raise ValueError(f"'{solver_name}' not supported for batches.")
+
+        if any(time > duration or time < 0.0 for time in times):
+            raise ValueError(
+                f"Times must be between 0 and duration {duration}. found {times}"
+            )
+
+        block = np.empty((space.size, n_tasks), dtype=np.complex128)
+        for t, state in enumerate(states):
+            block[:, t] = state.data
+
+        if interaction_picture:
+            kernel = self._ode_real_kernel_int
+        else:
+            kernel = self._ode_real_kernel
+
+        scale = 1 / np.sqrt(n_tasks)
+        solver = ode(kernel)
+        solver.set_f_params(np.zeros(block.size, dtype=np.complex128))
+        solver.set_initial_value(block.reshape(-1).view(np.float64))
+        solver.set_integrator(
+            solver_name, atol=atol * scale, rtol=rtol * scale, nsteps=nsteps
+        )
+
+        for time in times:
+            if solver.t != time:
+                solver.integrate(time)
+                AnalogGate._error_check(solver_name, solver.get_return_code())
+
+            result = solver.y.view(np.complex128).reshape(space.size, n_tasks)
+            if interaction_picture:
+                # go back to the schrodinger picture
+                result = np.exp(-1j * time * self.rydberg)[:, None] * result
+
+            yield [StateVector(result[:, t].copy(), space) for t in range(n_tasks)]
+
+    @beartype
+    def run(
+        self,
+        shots: int = 1,
+        solver_name: str = "dop853",
+        atol: float = 1e-14,
+        rtol: float = 1e-7,
+        nsteps: int = 2_147_483_647,
+        interaction_picture: bool = False,
+        project_hyperfine: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        packed: bool = False,
+    ) -> List[NDArray[np.uint8]]:
+        """Run the emulation of all Hamiltonians with all atoms in the ground
+        state, sampling the final state vectors, see `StateVector.sample`."""
+
+        options = dict(
+            solver_name=solver_name,
+            atol=atol,
+            rtol=rtol,
+            nsteps=nsteps,
+            interaction_picture=interaction_picture,
+        )
+
+        (results,) = self.apply(**options)
+
+        samples = []
+        for result in results:
+            result.normalize()
+            samples.append(
+                result.sample(
+                    shots, project_hyperfine=project_hyperfine, rng=rng, packed=packed
+                )
+            )
+
+        return samples
@@ -0,0 +1,120 @@
+from dataclasses import field, dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.linalg import eigh_tridiagonal
+from beartype.typing import List, Callable
+
+MatVec = Callable[[NDArray, NDArray], NDArray]
+
+CHECK_EVERY = 4
+
+
+def _tridiagonal_expm(alpha: List[float], beta: List[float], tau: float) -> NDArray:
+    # first column of exp(-i tau T) for the symmetric tridiagonal matrix T
+    if len(alpha) == 1:
+        return np.exp(-1j * tau * np.asarray(alpha))
+
+    evals, evecs = eigh_tridiagonal(alpha, beta, check_finite=False)
+    return evecs @ (np.exp(-1j * tau * evals) * evecs[0, :])
+
+
+@dataclass
+class LanczosExpm:
+    """Apply the exponential `exp(-i tau A)` of a hermitian operator `A` to a
+    vector using the Lanczos method.
+
+    The Krylov subspace is grown until the a posteriori error estimate is
+    below the tolerance. If the maximal dimension is reached the time step is
+    split into smaller sub-steps, each reusing the preallocated basis.
+
+    Attributes:
+        size (int): dimension of the vector space.
+        max_krylov_dim (int): maximal dimension of the Krylov subspace.
+            Defaults to 30.
+    """
+
+    size: int
+    max_krylov_dim: int = 30
+    basis: NDArray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.basis = np.zeros((self.max_krylov_dim + 1, self.size), dtype=np.complex128)
+
+    def apply(self, matvec: MatVec, state: NDArray, tau: float, tol: float) -> int:
+        """Replace `state` by `exp(-i tau A) @ state`.
+
+        Args:
+            matvec (Callable[[NDArray, NDArray], NDArray]): function computing
+                `A @ input` into `output`, called as `matvec(input, output)`.
+            state (NDArray): complex vector, updated in place.
+            tau (float): time step of the exponential.
+            tol (float): tolerance on the norm of the error.
+
+        Returns:
+            int: number of calls to `matvec`.
+        """
+        basis = self.basis
+        n_matvec = 0
+        remaining = tau
+
+        while remaining > 0:
+            norm = np.linalg.norm(state)
+            if norm == 0:
+                break
+
+            np.divide(state, norm, out=basis[0])
+
+            alpha, beta = [], []
+            dt = remaining
+            # the error of each sub-step is bound by its share of `tol`
+            step_tol = tol / norm
+
+            m = self.max_krylov_dim
+            for j in range(m):
+                w = basis[j + 1]
+                matvec(basis[j], w)
+                n_matvec += 1
+
+                a = np.vdot(basis[j], w).real
+                w -= a * basis[j]
+                if j > 0:
+                    w -= beta[-1] * basis[j - 1]
+
+                b = np.linalg.norm(w)
+                alpha.append(a)
+
+                if b <= np.finfo(np.float64).eps * max(1.0, abs(a)):
+                    # invariant subspace, the exponential is exact
+                    coeffs = _tridiagonal_expm(alpha, beta, dt)
+                    error = 0.0
+                    break
+
+                beta.append(b)
+                w /= b
+
+                # the error estimate is only checked every few iterations
+                # for large subspaces to limit the overhead
+                if j >= CHECK_EVERY and j % CHECK_EVERY != 0 and j + 1 < m:
+                    continue
+
+                coeffs = _tridiagonal_expm(alpha, beta[:-1], dt)
+
+                # error estimate: b * |e_m^T exp(-i dt T_m) e_1|
+                error = b * abs(coeffs[-1])
+                if error <= step_tol * dt / tau:
+                    break
+            else:
+                # maximal dimension reached, shrink the sub-step instead
+                while error > step_tol * dt / tau:
+                    dt /= 2
+                    coeffs = _tridiagonal_expm(alpha, beta[: len(alpha) - 1], dt)
+                    error = beta[-1] * abs(coeffs[-1])
+
+            np.dot(coeffs, basis[: coeffs.size], out=state)
+            state *= norm
+
+            # avoid a vanishing last sub-step due to rounding
+            remaining = 0.0 if dt >= remaining else remaining - dt
+
+        return n_matvec
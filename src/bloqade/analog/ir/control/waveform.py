@@ -9,6 +9,7 @@ from functools import cached_property
 import numpy as np
 import scipy.integrate as integrate
 from beartype import beartype
+from numpy.typing import NDArray
 from beartype.typing import Any, Dict, List, Tuple, Union, Callable, Container
 from pydantic.v1.dataclasses import dataclass
 
@@ -87,6 +88,23 @@ class Waveform(HashTrait, CanonicalizeTrait):
     def eval_decimal(self, clock_s: Decimal, **kwargs) -> Decimal:
         raise NotImplementedError
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        """Evaluate the waveform element-wise over an array of times.
+
+        Nodes without a vectorized implementation fall back to evaluating
+        each time individually.
+
+        Args:
+            times (NDArray): array of times to evaluate the waveform at.
+
+        Returns:
+            NDArray: float64 array of waveform values with the same shape
+            as `times`.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        values = [self.__call__(time, **kwargs) for time in times.ravel()]
+        return np.asarray(values, dtype=np.float64).reshape(times.shape)
+
     def add(self, other: "Waveform") -> "Waveform":
         return self.canonicalize(Add(self, other))
 
@@ -110,7 +128,7 @@ class Waveform(HashTrait, CanonicalizeTrait):
 
         duration = float(self.duration(**assignments))
         times = np.linspace(0, duration, npoints + 1)
-        values = [self.__call__(time, **assignments) for time in times]
+        values = self.eval_array(times, **assignments).tolist()
         return times, values
 
     def show(self, **assignments):
@@ -295,6 +313,24 @@ class Linear(Instruction):
 
             return ((stop_value - start_value) / duration) * clock_s + start_value
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        start_value = float(self.start(**kwargs))
+        stop_value = float(self.stop(**kwargs))
+        duration = float(self.duration(**kwargs))
+
+        if duration == 0 and np.any(times <= duration):
+            raise ValueError(
+                f"Duration of linear waveform is zero: {duration}. "
+                "Cannot divide by zero."
+            )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (stop_value - start_value) / duration
+
+        values = slope * times + start_value
+        return np.where(times > duration, 0.0, values)
+
     def print_node(self):
         return "Linear"
 
@@ -334,6 +370,12 @@ class Constant(Instruction):
         else:
             return constant_value
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        constant_value = float(self.value(**kwargs))
+        duration = float(self.duration(**kwargs))
+        return np.where(times > duration, 0.0, constant_value)
+
     def print_node(self):
         return "Constant"
 
@@ -381,6 +423,17 @@ class Poly(Instruction):
 
             return value
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        duration = float(self.duration(**kwargs))
+
+        # horner's method, starting from the highest order coefficient
+        values = np.zeros_like(times)
+        for scalar_expr in reversed(self.coeffs):
+            values = values * times + float(scalar_expr(**kwargs))
+
+        return np.where(times > duration, 0.0, values)
+
     def print_node(self) -> str:
         return "Poly"
 
@@ -566,6 +619,15 @@ TriweightKernel = Triweight()
 TricubeKernel = Tricube()
 CosineKernel = Cosine()
 
+# number of points used to integrate the smoothing kernel in `Smooth.eval_array`
+SMOOTH_QUADRATURE_POINTS = 2001
+# maximum number of clock values evaluated at once in `Smooth.eval_array`
+SMOOTH_CHUNK_SIZE = 2**18
+# grid points per smoothing radius used to convolve in `Smooth.eval_array`
+SMOOTH_GRID_RESOLUTION = 256
+# truncation of infinite smoothing kernels, in units of the smoothing radius
+SMOOTH_INFINITE_SUPPORT = 40
+
 
 @dataclass(init=False, frozen=True)
 class Smooth(Waveform):
@@ -641,6 +703,84 @@ class Smooth(Waveform):
         else:
             raise ValueError(f"Invalid kernel: {self.kernel}")
 
+    def _eval_array_quadrature(
+        self, times: NDArray, radius: float, duration: float, **kwargs
+    ) -> NDArray:
+        # midpoint rule over u in (-1, 1), infinite kernels are mapped onto
+        # this interval through s = tan(pi * u / 2).
+        n = SMOOTH_QUADRATURE_POINTS
+        u = (np.arange(n) + 0.5) * (2 / n) - 1
+        if isinstance(self.kernel, FiniteSmoothingKernel):
+            s = u
+            weights = self.kernel(s) * (2 / n)
+        else:
+            s = np.tan(np.pi * u / 2)
+            jacobian = (np.pi / 2) / np.cos(np.pi * u / 2) ** 2
+            weights = self.kernel(s) * jacobian * (2 / n)
+
+        # drop quadrature points that do not contribute to the integral
+        mask = np.abs(weights) > np.finfo(np.float64).eps * np.abs(weights).max()
+        s, weights = s[mask], weights[mask]
+
+        # times are processed in chunks to bound the size of the clock matrix.
+        values = np.empty_like(times)
+        chunk_size = max(1, SMOOTH_CHUNK_SIZE // s.size)
+        for start in range(0, times.size, chunk_size):
+            chunk = times[start : start + chunk_size]
+            clocks = np.clip(chunk[:, None] + radius * s, 0, duration)
+            values[start : start + chunk_size] = (
+                self.waveform.eval_array(clocks, **kwargs) @ weights
+            )
+
+        return values
+
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        from scipy.signal import fftconvolve
+
+        times = np.asarray(times, dtype=np.float64)
+        radius = float(self.radius(**kwargs))
+        duration = float(self.duration(**kwargs))
+
+        if isinstance(self.kernel, FiniteSmoothingKernel):
+            support = 1
+        elif isinstance(self.kernel, InfiniteSmoothingKernel):
+            support = SMOOTH_INFINITE_SUPPORT
+        else:
+            raise ValueError(f"Invalid kernel: {self.kernel}")
+
+        # the waveform is extended with its boundary values outside of
+        # [0, duration], which is exactly what clipping the clock does.
+        flat_times = times.ravel()
+        if radius == 0:
+            kernel_norm = integrate.quad(self.kernel, -support, support)[0]
+            clocks = np.clip(flat_times, 0, duration)
+            values = kernel_norm * self.waveform.eval_array(clocks, **kwargs)
+            return values.reshape(times.shape)
+
+        # smooth the waveform once on a uniform grid and interpolate, outside
+        # of [-width, duration + width] the smoothed waveform is constant.
+        n_kernel = support * SMOOTH_GRID_RESOLUTION
+        step = radius / SMOOTH_GRID_RESOLUTION
+        width = n_kernel * step
+        n_grid = int(np.ceil((duration + 2 * width) / step)) + 1
+
+        if n_grid > SMOOTH_CHUNK_SIZE:
+            values = self._eval_array_quadrature(flat_times, radius, duration, **kwargs)
+            return values.reshape(times.shape)
+
+        # trapezoidal rule for the kernel integral
+        weights = self.kernel(np.arange(-n_kernel, n_kernel + 1) / n_kernel * support)
+        weights = weights * (1 / SMOOTH_GRID_RESOLUTION)
+        weights[[0, -1]] /= 2
+
+        grid = -width + step * np.arange(n_grid)
+        clocks = -2 * width + step * np.arange(n_grid + 2 * n_kernel)
+        samples = self.waveform.eval_array(np.clip(clocks, 0, duration), **kwargs)
+        smoothed = fftconvolve(samples, weights[::-1], mode="valid")
+
+        values = np.interp(np.clip(flat_times, -width, grid[-1]), grid, smoothed)
+        return values.reshape(times.shape)
+
     def print_node(self):
         return f"Smooth: {self.kernel.__class__.__name__}"
 
@@ -672,6 +812,14 @@ class Slice(SliceTrait, Waveform):
         start_time = self.start(**kwargs)
         return self.waveform.eval_decimal(clock_s + start_time, **kwargs)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        duration = float(self.duration(**kwargs))
+        start_time = float(self.start(**kwargs))
+
+        values = self.waveform.eval_array(times + start_time, **kwargs)
+        return np.where(times > duration, 0.0, values)
+
     def print_node(self):
         return "Slice"
 
@@ -707,6 +855,26 @@ class Append(AppendTrait, Waveform):
 
         return Decimal(0)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        durations = [float(waveform.duration(**kwargs)) for waveform in self.waveforms]
+        stop_times = np.cumsum(durations)
+
+        # index of the first waveform with `times <= stop_time`, times past
+        # the end of the last waveform map to `len(self.waveforms)`.
+        waveform_index = np.searchsorted(stop_times, times, side="left")
+
+        values = np.zeros_like(times)
+        for index, waveform in enumerate(self.waveforms):
+            mask = waveform_index == index
+            if not np.any(mask):
+                continue
+
+            start_time = stop_times[index] - durations[index]
+            values[mask] = waveform.eval_array(times[mask] - start_time, **kwargs)
+
+        return values
+
     def print_node(self):
         return "Append"
 
@@ -733,6 +901,9 @@ class Negative(Waveform):
     def eval_decimal(self, clock_s: Decimal, **kwargs) -> Decimal:
         return -self.waveform.eval_decimal(clock_s, **kwargs)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        return -self.waveform.eval_array(times, **kwargs)
+
     def print_node(self):
         return "Negative"
 
@@ -764,6 +935,9 @@ class Scale(Waveform):
     def eval_decimal(self, clock_s: Decimal, **kwargs) -> Decimal:
         return self.scalar(**kwargs) * self.waveform.eval_decimal(clock_s, **kwargs)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        return float(self.scalar(**kwargs)) * self.waveform.eval_array(times, **kwargs)
+
     def print_node(self):
         return "Scale"
 
@@ -791,6 +965,11 @@ class Add(Waveform):
     def eval_decimal(self, clock_s: Decimal, **kwargs) -> Decimal:
         return self.left(clock_s, **kwargs) + self.right(clock_s, **kwargs)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        return self.left.eval_array(times, **kwargs) + self.right.eval_array(
+            times, **kwargs
+        )
+
     def print_node(self):
         return "+"
 
@@ -819,6 +998,9 @@ class Record(Waveform):
     def eval_decimal(self, clock_s: Decimal, **kwargs) -> Decimal:
         return self.waveform(clock_s, **kwargs)
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        return self.waveform.eval_array(times, **kwargs)
+
     def print_node(self):
         return "Record"
 
@@ -888,6 +1070,21 @@ class Sample(Waveform):
             i = bisect_right(times[1:], clock_s)
             return values[i]
 
+    def eval_array(self, times: NDArray, **kwargs) -> NDArray:
+        times = np.asarray(times, dtype=np.float64)
+        sample_times, sample_values = self.samples(**kwargs)
+        sample_times = np.asarray(sample_times, dtype=np.float64)
+        sample_values = np.asarray(sample_values, dtype=np.float64)
+
+        if self.interpolation is Interpolation.Linear:
+            values = np.interp(times, sample_times, sample_values)
+        elif self.interpolation is Interpolation.Constant:
+            i = np.searchsorted(sample_times[1:], times, side="right")
+            values = sample_values[np.minimum(i, sample_values.size - 1)]
+
+        out_of_bounds = np.logical_or(times < 0, times > sample_times[-1])
+        return np.where(out_of_bounds, 0.0, values)
+
     def print_node(self):
         return f"Sample {self.interpolation.value}"
 
@@ -9,6 +9,7 @@ from beartype.typing import (
     Dict,
     List,
     Tuple,
+    Union,
     Callable,
     Iterator,
     Optional,
@@ -21,9 +22,11 @@ from bloqade.analog.task.batch import LocalBatch
 from bloqade.analog.builder.typing import LiteralType
 from bloqade.analog.ir.routine.base import RoutineBase, __pydantic_dataclass_config__
 from bloqade.analog.emulate.ir.emulator import EmulatorProgram
+from bloqade.analog.emulate.ir.observables import Observable
 from bloqade.analog.emulate.ir.state_vector import (
     AnalogGate,
     StateVector,
+    BatchAnalogGate,
     RydbergHamiltonian,
 )
 from bloqade.analog.emulate.codegen.hamiltonian import (
@@ -38,6 +41,23 @@ class BloqadeServiceOptions(RoutineBase):
         return BloqadePythonRoutine(self.source, self.circuit, self.params)
 
 
+def compile_cache_from_option(
+    cache_matrices: Union[bool, str], multiprocessing: bool = False
+) -> Optional[CompileCache]:
+    """Create the compile cache selected by the `cache_matrices` option, a
+    path selects a persistent cache stored in that directory. With
+    multiprocessing the matrices are otherwise shared with the workers
+    through shared memory."""
+    if isinstance(cache_matrices, str):
+        return CompileCache.persistent(cache_matrices)
+    elif cache_matrices and multiprocessing:
+        return CompileCache.shared_memory()
+    elif cache_matrices:
+        return CompileCache()
+    else:
+        return None
+
+
 def cast_to_float(x):
     if isinstance(x, abc.Sequence):
         return [float(i) for i in x]
@@ -112,8 +132,9 @@ class BloqadeEmulation:
         Args:
             state (Optional[StateVector], optional): The initial state vector to
             evolve. if not provided, the zero state will be used. Defaults to None.
-            solver_name (str, optional): Which SciPy Solver to use. Defaults to
-            "dop853".
+            solver_name (str, optional): Which solver to use, one of the SciPy
+            solvers "lsoda", "dop853" and "dopri5" or the Krylov exponential
+            integrators "magnus2" and "magnus4". Defaults to "dop853".
             atol (float, optional): Absolute tolerance for ODE solver. Defaults
             to 1e-14.
             rtol (float, optional): Relative tolerance for adaptive step in
@@ -144,14 +165,81 @@ class BloqadeEmulation:
             interaction_picture=interaction_picture,
         )
 
+    def evolve_observables(
+        self,
+        observables: Dict[str, Observable],
+        times: Sequence[float] = (),
+        state: Optional[StateVector] = None,
+        solver_name: str = "dop853",
+        atol: float = 1e-7,
+        rtol: float = 1e-14,
+        nsteps: int = 2147483647,
+        interaction_picture: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        """Evolve an initial state vector and compute observables at each time.
+
+        The observables are evaluated as soon as the state is available and
+        written into preallocated arrays, the state vectors are not kept.
+
+        Args:
+            observables (Dict[str, Observable]): The observables to compute by
+            name, e.g. `SiteDensities()`, `DensityCorrelations()` or `Energy()`
+            from `bloqade.analog.emulate.ir.observables`.
+            times (Sequence[float], optional): The times to evaluate the
+            observables at. Defaults to (). If not provided the observables are
+            evaluated at the end of the bloqade program.
+            state (Optional[StateVector], optional): The initial state vector to
+            evolve. if not provided, the zero state will be used. Defaults to None.
+            solver_name (str, optional): Which solver to use, see `evolve`.
+            Defaults to "dop853".
+            atol (float, optional): Absolute tolerance for ODE solver. Defaults
+            to 1e-7.
+            rtol (float, optional): Relative tolerance for adaptive step in
+            ODE solver. Defaults to 1e-14.
+            nsteps (int, optional): Maximum number of steps allowed per integration
+            step. Defaults to 2147483647.
+            interaction_picture (bool, optional): Use the interaction picture when
+            solving schrodinger equation. Defaults to False.
+
+        Returns:
+            Dict[str, np.ndarray]: The values of each observable, the first axis
+            of each array runs over the times.
+        """
+        hamiltonian = self.hamiltonian
+        if len(times) == 0:
+            times = [hamiltonian.emulator_ir.duration]
+
+        values = {}
+        evaluators = {}
+        for name, observable in observables.items():
+            shape = (len(times), *observable.shape(hamiltonian))
+            values[name] = np.zeros(shape, dtype=np.float64)
+            evaluators[name] = observable.compile(hamiltonian)
+
+        states = self.evolve(
+            state,
+            solver_name=solver_name,
+            atol=atol,
+            rtol=rtol,
+            nsteps=nsteps,
+            times=times,
+            interaction_picture=interaction_picture,
+        )
+        for index, (time, state_t) in enumerate(zip(times, states)):
+            for name, evaluate in evaluators.items():
+                evaluate(state_t.data, time, values[name][index, ...])
+
+        return values
+
 
 @dataclass(frozen=True, config=__pydantic_dataclass_config__)
 class BloqadePythonRoutine(RoutineBase):
     @staticmethod
     def process_tasks(runner, tasks, results):
-        while not tasks.empty():
+        # `None` marks the end of the tasks, `empty` is not reliable for
+        # multiprocessing queues as the items are sent in the background
+        for task_id, (emulator_ir, metadata) in iter(tasks.get, None):
             try:
-                task_id, (emulator_ir, metadata) = tasks.get()
                 result = runner.run_task(emulator_ir, metadata)
                 results.put((task_id, result))
             except BaseException as e:
@@ -169,18 +257,60 @@ class BloqadePythonRoutine(RoutineBase):
                 compile_cache=self.compile_cache
             ).emit(emulator_ir)
 
-            MetaData = namedtuple("MetaData", metadata_dict.keys())
-            metadata = MetaData(
-                **{k: cast_to_float(v) for k, v in metadata_dict.items()}
-            )
             zero_state = hamiltonian.space.zero_state(np.complex128)
             (wrapped_register,) = AnalogGate(hamiltonian).apply(
                 zero_state, **self.solver_args
             )
+            return self.run_callback(wrapped_register, metadata_dict, hamiltonian)
+
+        def run_callback(self, wrapped_register, metadata_dict, hamiltonian):
+            MetaData = namedtuple("MetaData", metadata_dict.keys())
+            metadata = MetaData(
+                **{k: cast_to_float(v) for k, v in metadata_dict.items()}
+            )
             return self.callback(
                 wrapped_register, metadata, hamiltonian, *self.callback_args
             )
 
+        def run_batch(self, tasks):
+            """Run tasks sharing the same register together, returns a list of
+            `(task_id, result)` with the exception raised by a task as result
+            if it failed."""
+            id_results = []
+            hamiltonians = []
+            for task_id, (emulator_ir, metadata) in tasks:
+                try:
+                    hamiltonian = RydbergHamiltonianCodeGen(
+                        compile_cache=self.compile_cache
+                    ).emit(emulator_ir)
+                    hamiltonians.append((task_id, metadata, hamiltonian))
+                except BaseException as e:
+                    id_results.append((task_id, e))
+
+            groups = BatchAnalogGate.group([h for _, _, h in hamiltonians])
+            for group in groups:
+                group_tasks = [hamiltonians[index] for index in group]
+                try:
+                    gate = BatchAnalogGate([h for _, _, h in group_tasks])
+                    (wrapped_registers,) = gate.apply(**self.solver_args)
+                except BaseException as e:
+                    # the whole group fails with the evolution
+                    id_results.extend((task_id, e) for task_id, _, _ in group_tasks)
+                    continue
+
+                for (task_id, metadata, hamiltonian), wrapped_register in zip(
+                    group_tasks, wrapped_registers
+                ):
+                    try:
+                        result = self.run_callback(
+                            wrapped_register, metadata, hamiltonian
+                        )
+                        id_results.append((task_id, result))
+                    except BaseException as e:
+                        id_results.append((task_id, e))
+
+            return id_results
+
     def _generate_ir(
         self, args, blockade_radius, waveform_runtime, use_hyperfine
     ) -> Iterator[TaskData]:
@@ -207,16 +337,17 @@ class BloqadePythonRoutine(RoutineBase):
         args: Tuple[LiteralType, ...] = (),
         name: Optional[str] = None,
         blockade_radius: LiteralType = 0.0,
-        cache_matrices: bool = False,
+        cache_matrices: Union[bool, str] = False,
         waveform_runtime: str = "interpret",
         use_hyperfine: bool = False,
+        multiprocessing: bool = False,
+        seed: Optional[int] = None,
     ) -> LocalBatch:
         from bloqade.analog.task.bloqade import BloqadeTask
 
-        if cache_matrices:
-            matrix_cache = CompileCache()
-        else:
-            matrix_cache = None
+        matrix_cache = compile_cache_from_option(cache_matrices, multiprocessing)
+        # independent streams for the shots of each task
+        seed_sequence = None if seed is None else np.random.SeedSequence(seed)
 
         tasks = OrderedDict()
         ir_iter = self._generate_ir(
@@ -226,7 +357,14 @@ class BloqadePythonRoutine(RoutineBase):
             task_number = task_data.task_id
             emulator_ir = task_data.emulator_ir
             metadata = task_data.metadata_dict
-            tasks[task_number] = BloqadeTask(shots, emulator_ir, metadata, matrix_cache)
+            task_seed = None if seed is None else seed_sequence.spawn(1)[0]
+            tasks[task_number] = BloqadeTask(
+                shots, emulator_ir, metadata, matrix_cache, seed=task_seed
+            )
+
+            if multiprocessing and matrix_cache is not None:
+                # publish the matrices before the workers receive the cache
+                RydbergHamiltonianCodeGen(matrix_cache).cache_operators(emulator_ir)
 
         return LocalBatch(self.source, tasks, name)
 
@@ -239,13 +377,15 @@ class BloqadePythonRoutine(RoutineBase):
         blockade_radius: float = 0.0,
         waveform_runtime: str = "interpret",
         interaction_picture: bool = False,
-        cache_matrices: bool = False,
+        cache_matrices: Union[bool, str] = False,
         multiprocessing: bool = False,
         num_workers: Optional[int] = None,
         solver_name: str = "dop853",
         atol: float = 1e-7,
         rtol: float = 1e-14,
         nsteps: int = 2_147_483_647,
+        batched: bool = False,
+        seed: Optional[int] = None,
     ) -> LocalBatch:
         """Run the current program using bloqade python backend
 
@@ -256,43 +396,58 @@ class BloqadePythonRoutine(RoutineBase):
             name (Optional[str], optional): Name to give this run. Defaults to None.
             blockade_radius (float, optional): Use the Blockade subspace given a
             particular radius. Defaults to 0.0.
-            waveform_runtime: (bool, optional): Use Numba to compile the waveforms,
-            Defaults to False.
+            waveform_runtime: (str, optional): Specify which runtime to use for
+            waveforms, one of "interpret", "numpy", "python", "numba" or
+            "piecewise_linear". The latter evaluates piecewise linear waveforms
+            from a shared coefficient table and interprets the other waveforms.
+            Defaults to "interpret".
             interaction_picture (bool, optional): Use the interaction picture when
             solving schrodinger equation. Defaults to False.
-            cache_matrices (bool, optional): Reuse previously evaluated matrcies when
-            possible. Defaults to False.
+            cache_matrices (Union[bool, str], optional): Reuse previously evaluated
+            matrcies when possible. If a path is given the matrices are cached on
+            disk in that directory and shared between processes and runs. With
+            multiprocessing the matrices are otherwise computed once and shared
+            with the workers through shared memory. Defaults to False.
             multiprocessing (bool, optional): Use multiple processes to process the
             batches. Defaults to False.
             num_workers (Optional[int], optional): Number of processes to run with
             multiprocessing. Defaults to None.
-            solver_name (str, optional): Which SciPy Solver to use. Defaults to
-            "dop853".
+            solver_name (str, optional): Which solver to use, one of the SciPy
+            solvers "lsoda", "dop853" and "dopri5" or the Krylov exponential
+            integrators "magnus2" and "magnus4". Defaults to "dop853".
             atol (float, optional): Absolute tolerance for ODE solver. Defaults to
             1e-14.
             rtol (float, optional): Relative tolerance for adaptive step in ODE solver.
             Defaults to 1e-7.
             nsteps (int, optional): Maximum number of steps allowed per integration
             step. Defaults to 2_147_483_647, the maximum value.
+            batched (bool, optional): Evolve the tasks sharing the same register,
+            e.g. the tasks of a `batch_assign` sweep, together as a single block of
+            state vectors. Only supported with the SciPy solvers. Defaults to False.
+            seed (Optional[int], optional): Seed of the random number generators
+            sampling the shots, each task samples from an independent stream such
+            that the shots do not depend on multiprocessing or batched. Defaults to
+            None, fresh entropy from the operating system.
 
         Raises:
-            ValueError: Cannot use multiprocessing and cache_matrices at the same time.
+            ValueError: Cannot use multiprocessing and batched at the same time.
 
         Returns:
             LocalBatch: Batch of local tasks that have been executed.
         """
-        if multiprocessing and cache_matrices:
-            raise ValueError(
-                "Cannot use multiprocessing and cache_matrices at the same time."
-            )
+        if multiprocessing and batched:
+            raise ValueError("Cannot use multiprocessing and batched at the same time.")
 
         compile_options = dict(
             shots=shots,
             args=args,
             name=name,
             blockade_radius=blockade_radius,
-            cache_matrices=cache_matrices,
+            # the tasks of a batch share the space and operators
+            cache_matrices=cache_matrices or batched,
             waveform_runtime=waveform_runtime,
+            multiprocessing=multiprocessing,
+            seed=seed,
         )
 
         solver_options = dict(
@@ -303,10 +458,20 @@ class BloqadePythonRoutine(RoutineBase):
             rtol=rtol,
             nsteps=nsteps,
             interaction_picture=interaction_picture,
+            batched=batched,
         )
 
         batch = self._compile(**compile_options)
-        batch._run(**solver_options)
+        # with multiprocessing the tasks are replaced by copies returned by the
+        # workers, the cache is closed through the original tasks
+        compile_caches = [task.compile_cache for task in batch.tasks.values()]
+        try:
+            batch._run(**solver_options)
+        finally:
+            # the tasks share the cache, closing it again does nothing
+            for compile_cache in compile_caches:
+                if compile_cache is not None:
+                    compile_cache.close()
 
         return batch
 
@@ -321,11 +486,13 @@ class BloqadePythonRoutine(RoutineBase):
         interaction_picture: bool = False,
         multiprocessing: bool = False,
         num_workers: Optional[int] = None,
-        cache_matrices: bool = False,
+        cache_matrices: Union[bool, str] = False,
         solver_name: str = "dop853",
         atol: float = 1e-7,
         rtol: float = 1e-14,
         nsteps: int = 2_147_483_647,
+        batched: bool = False,
+        seed: Optional[int] = None,
     ) -> LocalBatch:
         options = dict(
             shots=shots,
@@ -341,6 +508,8 @@ class BloqadePythonRoutine(RoutineBase):
             rtol=rtol,
             nsteps=nsteps,
             interaction_picture=interaction_picture,
+            batched=batched,
+            seed=seed,
         )
         return self.run(**options)
 
@@ -354,7 +523,7 @@ class BloqadePythonRoutine(RoutineBase):
         blockade_radius: float = 0.0,
         waveform_runtime: str = "interpret",
         interaction_picture: bool = False,
-        cache_matrices: bool = False,
+        cache_matrices: Union[bool, str] = False,
         multiprocessing: bool = False,
         num_workers: Optional[int] = None,
         solver_name: str = "dop853",
@@ -362,6 +531,7 @@ class BloqadePythonRoutine(RoutineBase):
         rtol: float = 1e-14,
         nsteps: int = 2_147_483_647,
         use_hyperfine: bool = False,
+        batched: bool = False,
     ) -> List:
         """Run state-vector simulation with a callback to access full state-vector from
         emulator
@@ -380,23 +550,33 @@ class BloqadePythonRoutine(RoutineBase):
             blockade_radius (float, optional): Use the Blockade subspace given a
             particular radius. Defaults to 0.0.
             waveform_runtime: (str, optional): Specify which runtime to use for
-            waveforms. Defaults to "interpret".
+            waveforms, one of "interpret", "numpy", "python", "numba" or
+            "piecewise_linear". The latter evaluates piecewise linear waveforms
+            from a shared coefficient table and interprets the other waveforms.
+            Defaults to "interpret".
             interaction_picture (bool, optional): Use the interaction picture when
             solving schrodinger equation. Defaults to False.
-            cache_matrices (bool, optional): Reuse previously evaluated matrcies when
-            possible. Defaults to False.
+            cache_matrices (Union[bool, str], optional): Reuse previously evaluated
+            matrcies when possible. If a path is given the matrices are cached on
+            disk in that directory and shared between processes and runs. With
+            multiprocessing the matrices are otherwise computed once and shared
+            with the workers through shared memory. Defaults to False.
             multiprocessing (bool, optional): Use multiple processes to process the
             batches. Defaults to False.
             num_workers (Optional[int], optional): Number of processes to run with
             multiprocessing. Defaults to None.
-            solver_name (str, optional): Which SciPy Solver to use. Defaults to
-            "dop853".
+            solver_name (str, optional): Which solver to use, one of the SciPy
+            solvers "lsoda", "dop853" and "dopri5" or the Krylov exponential
+            integrators "magnus2" and "magnus4". Defaults to "dop853".
             atol (float, optional): Absolute tolerance for ODE solver. Defaults to
             1e-14.
             rtol (float, optional): Relative tolerance for adaptive step in ODE solver.
             Defaults to 1e-7.
             nsteps (int, optional): Maximum number of steps allowed per integration
             step. Defaults to 2_147_483_647, the maximum value.
+            batched (bool, optional): Evolve the tasks sharing the same register,
+            e.g. the tasks of a `batch_assign` sweep, together as a single block of
+            state vectors. Only supported with the SciPy solvers. Defaults to False.
 
         Returns:
             List: List of resulting outputs from the callbacks
@@ -404,6 +584,7 @@ class BloqadePythonRoutine(RoutineBase):
         Raises:
             RuntimeError: Raises the first error that occurs, only if
             `ignore_exceptions=False`.
+            ValueError: Cannot use multiprocessing and batched at the same time.
 
         Note:
             For the `callback` function, first argument is the many-body wavefunction
@@ -416,15 +597,17 @@ class BloqadePythonRoutine(RoutineBase):
 
 
         """
+        if multiprocessing and batched:
+            raise ValueError("Cannot use multiprocessing and batched at the same time.")
+
         if multiprocessing:
             from multiprocessing import Queue, Process, cpu_count
         else:
             from queue import Queue
 
-        if cache_matrices:
-            compile_cache = CompileCache()
-        else:
-            compile_cache = None
+        compile_cache = compile_cache_from_option(
+            cache_matrices or batched, multiprocessing
+        )
 
         solver_args = dict(
             solver_name=solver_name,
@@ -455,11 +638,24 @@ class BloqadePythonRoutine(RoutineBase):
             total_tasks += 1
             tasks.put((task_number, (emulator_ir, metadata)))
 
+            if multiprocessing and compile_cache is not None:
+                # publish the matrices before the workers receive the cache
+                RydbergHamiltonianCodeGen(compile_cache).cache_operators(emulator_ir)
+
         workers = []
-        if multiprocessing:
+        if batched:
+            tasks.put(None)
+            batch = list(iter(tasks.get, None))
+
+            for task_id, result in runner.run_batch(batch):
+                results.put((task_id, result))
+        elif multiprocessing:
             num_workers = max(int(num_workers or cpu_count()), 1)
             num_workers = min(total_tasks, num_workers)
 
+            for _ in range(num_workers):
+                tasks.put(None)
+
             for _ in range(num_workers):
                 worker = Process(
                     target=BloqadePythonRoutine.process_tasks,
@@ -469,6 +665,7 @@ class BloqadePythonRoutine(RoutineBase):
 
                 workers.append(worker)
         else:
+            tasks.put(None)
             self.process_tasks(runner, tasks, results)
 
         # blocks until all
@@ -485,6 +682,9 @@ class BloqadePythonRoutine(RoutineBase):
             tasks.close()
             results.close()
 
+        if compile_cache is not None:
+            compile_cache.close()
+
         id_results.sort(key=lambda x: x[0])
         results = []
 
@@ -508,7 +708,7 @@ class BloqadePythonRoutine(RoutineBase):
         blockade_radius: float = 0.0,
         use_hyperfine: bool = False,
         waveform_runtime: str = "interpret",
-        cache_matrices: bool = False,
+        cache_matrices: Union[bool, str] = False,
     ) -> List[BloqadeEmulation]:
         """
         Generates a list of BloqadeEmulation objects which contain the Hamiltonian of your program.
@@ -527,8 +727,11 @@ class BloqadePythonRoutine(RoutineBase):
             blockade_radius (float): The radius in which atoms blockade eachother. Default value is 0.0 micrometers.
             use_hyperfine (bool): Should the Hamiltonian account for hyperfine levels. Default value is False.
             waveform_runtime (str): Specify which runtime to use for waveforms. If "numba" is specify the waveform
-                is compiled, otherwise it is interpreted via the "interpret" argument. Defaults to "interpret".
-            cache_matrices (bool): Speed up Hamiltonian generation by reusing data (when possible) from previously generated Hamiltonians.
+                is compiled, "numpy" evaluates the waveform with vectorized NumPy operations, "piecewise_linear"
+                evaluates piecewise linear waveforms from a shared coefficient table, otherwise it
+                is interpreted via the "interpret" argument. Defaults to "interpret".
+            cache_matrices (Union[bool, str]): Speed up Hamiltonian generation by reusing data (when possible) from previously generated Hamiltonians.
+                If a path is given the data is cached on disk in that directory and shared between processes and runs.
                 Default value is False.
 
         Returns:
@@ -539,10 +742,7 @@ class BloqadePythonRoutine(RoutineBase):
             args, blockade_radius, waveform_runtime, use_hyperfine
         )
 
-        if cache_matrices:
-            compile_cache = CompileCache()
-        else:
-            compile_cache = None
+        compile_cache = compile_cache_from_option(cache_matrices)
 
         return [
             BloqadeEmulation(task_data, compile_cache=compile_cache)
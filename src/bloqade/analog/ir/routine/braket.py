@@ -38,46 +38,38 @@ class BraketHardwareRoutine(RoutineBase):
         use_experimental: bool = False,
         args: Tuple[LiteralType, ...] = (),
         name: Optional[str] = None,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
     ) -> RemoteBatch:
         ## fall passes here ###
-        from bloqade.analog.compiler.passes.hardware import (
-            assign_circuit,
-            analyze_channels,
-            generate_ahs_code,
-            generate_quera_ir,
-            validate_waveforms,
-            canonicalize_circuit,
+        from bloqade.analog.compiler.passes.hardware.pipeline import (
+            compile_quera_tasks,
         )
 
         capabilities = self.backend.get_capabilities(use_experimental)
-
-        circuit, params = self.circuit, self.params
+        compiled_tasks, timings = compile_quera_tasks(
+            self.circuit,
+            self.params,
+            capabilities,
+            shots,
+            args,
+            multiprocessing=multiprocessing,
+            num_workers=num_workers,
+        )
 
         tasks = OrderedDict()
-
-        for task_number, batch_params in enumerate(params.batch_assignments(*args)):
-            assignments = {**batch_params, **params.static_params}
-            final_circuit, metadata = assign_circuit(circuit, assignments)
-
-            level_couplings = analyze_channels(final_circuit)
-            final_circuit = canonicalize_circuit(final_circuit, level_couplings)
-
-            validate_waveforms(level_couplings, final_circuit)
-            ahs_components = generate_ahs_code(
-                capabilities, level_couplings, final_circuit
-            )
-
-            task_ir = generate_quera_ir(ahs_components, shots).discretize(capabilities)
+        for task_number, compiled in enumerate(compiled_tasks):
             tasks[task_number] = BraketTask(
                 None,
                 self.backend,
-                task_ir,
-                metadata,
-                ahs_components.lattice_data.parallel_decoder,
+                compiled.task_ir,
+                compiled.metadata,
+                compiled.parallel_decoder,
                 None,
             )
 
         batch = RemoteBatch(source=self.source, tasks=tasks, name=name)
+        batch.compile_timings = timings
 
         return batch
 
@@ -89,6 +81,8 @@ class BraketHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         """
@@ -104,13 +98,17 @@ class BraketHardwareRoutine(RoutineBase):
             name (str | None): custom name of the batch, defaults to None
             use_experimental (bool): Use experimental hardware capabilities
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
 
         Return:
             RemoteBatch
 
         """
 
-        batch = self._compile(shots, use_experimental, args, name)
+        batch = self._compile(
+            shots, use_experimental, args, name, multiprocessing, num_workers
+        )
         batch._submit(shuffle, **kwargs)
         return batch
 
@@ -122,6 +120,8 @@ class BraketHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         """
@@ -138,13 +138,24 @@ class BraketHardwareRoutine(RoutineBase):
             args (Tuple): additional arguments
             name (str): custom name of the batch
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
 
         Return:
             RemoteBatch
 
         """
 
-        batch = self.run_async(shots, args, name, use_experimental, shuffle, **kwargs)
+        batch = self.run_async(
+            shots,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
+        )
         batch.pull()
         return batch
 
@@ -156,6 +167,8 @@ class BraketHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ):
         """
@@ -172,12 +185,23 @@ class BraketHardwareRoutine(RoutineBase):
             args: additional arguments for args variables.
             name (str): custom name of the batch
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
 
         Return:
             RemoteBatch
 
         """
-        return self.run(shots, args, name, use_experimental, shuffle, **kwargs)
+        return self.run(
+            shots,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
+        )
 
 
 @dataclass(frozen=True, config=__pydantic_dataclass_config__)
@@ -172,46 +172,38 @@ class CustomSubmissionRoutine(RoutineBase):
         use_experimental: bool = False,
         args: Tuple[LiteralType, ...] = (),
         name: Optional[str] = None,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
     ) -> RemoteBatch:
         from bloqade.analog.submission.capabilities import get_capabilities
-        from bloqade.analog.compiler.passes.hardware import (
-            assign_circuit,
-            analyze_channels,
-            generate_ahs_code,
-            generate_quera_ir,
-            validate_waveforms,
-            canonicalize_circuit,
+        from bloqade.analog.compiler.passes.hardware.pipeline import (
+            compile_quera_tasks,
         )
 
         if not issubclass(RemoteTask, CustomRemoteTaskABC):
             raise TypeError(f"{RemoteTask} must be a subclass of CustomRemoteTaskABC.")
 
-        circuit, params = self.circuit, self.params
         capabilities = get_capabilities(use_experimental)
+        compiled_tasks, timings = compile_quera_tasks(
+            self.circuit,
+            self.params,
+            capabilities,
+            shots,
+            args,
+            multiprocessing=multiprocessing,
+            num_workers=num_workers,
+        )
 
         tasks = OrderedDict()
-
-        for task_number, batch_params in enumerate(params.batch_assignments(*args)):
-            assignments = {**batch_params, **params.static_params}
-            final_circuit, metadata = assign_circuit(circuit, assignments)
-
-            level_couplings = analyze_channels(final_circuit)
-            final_circuit = canonicalize_circuit(final_circuit, level_couplings)
-
-            validate_waveforms(level_couplings, final_circuit)
-            ahs_components = generate_ahs_code(
-                capabilities, level_couplings, final_circuit
-            )
-
-            task_ir = generate_quera_ir(ahs_components, shots).discretize(capabilities)
-
+        for task_number, compiled in enumerate(compiled_tasks):
             tasks[task_number] = RemoteTask.from_compile_results(
-                task_ir,
-                metadata,
-                ahs_components.lattice_data.parallel_decoder,
+                compiled.task_ir,
+                compiled.metadata,
+                compiled.parallel_decoder,
             )
 
         batch = RemoteBatch(source=self.source, tasks=tasks, name=name)
+        batch.compile_timings = timings
 
         return batch
 
@@ -224,6 +216,8 @@ class CustomSubmissionRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         """
@@ -236,13 +230,21 @@ class CustomSubmissionRoutine(RoutineBase):
             args (Tuple): additional arguments
             name (str): custom name of the batch
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
 
         Return:
             RemoteBatch
 
         """
         batch = self._compile_custom_batch(
-            shots, RemoteTask, use_experimental, args, name
+            shots,
+            RemoteTask,
+            use_experimental,
+            args,
+            name,
+            multiprocessing,
+            num_workers,
         )
         batch._submit(shuffle, **kwargs)
         return batch
@@ -256,6 +258,8 @@ class CustomSubmissionRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         """Run the custom task and return the result.
@@ -266,6 +270,8 @@ class CustomSubmissionRoutine(RoutineBase):
             args (Tuple): additional arguments for remaining un
             name (str): name of the batch object
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
         """
         if not callable(getattr(RemoteTask, "pull", None)):
             raise TypeError(
@@ -273,7 +279,15 @@ class CustomSubmissionRoutine(RoutineBase):
             )
 
         batch = self.run_async(
-            shots, RemoteTask, args, name, use_experimental, shuffle, **kwargs
+            shots,
+            RemoteTask,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
         )
         batch.pull()
         return batch
@@ -287,13 +301,23 @@ class CustomSubmissionRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         if RemoteTask is None:
             raise ValueError("RemoteTask must be provided for custom submission.")
 
         return self.run(
-            shots, RemoteTask, args, name, use_experimental, shuffle, **kwargs
+            shots,
+            RemoteTask,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
         )
 
 
@@ -307,44 +331,36 @@ class QuEraHardwareRoutine(RoutineBase):
         use_experimental: bool = False,
         args: Tuple[LiteralType, ...] = (),
         name: Optional[str] = None,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
     ) -> RemoteBatch:
-        from bloqade.analog.compiler.passes.hardware import (
-            assign_circuit,
-            analyze_channels,
-            generate_ahs_code,
-            generate_quera_ir,
-            validate_waveforms,
-            canonicalize_circuit,
+        from bloqade.analog.compiler.passes.hardware.pipeline import (
+            compile_quera_tasks,
         )
 
-        circuit, params = self.circuit, self.params
         capabilities = self.backend.get_capabilities(use_experimental)
+        compiled_tasks, timings = compile_quera_tasks(
+            self.circuit,
+            self.params,
+            capabilities,
+            shots,
+            args,
+            multiprocessing=multiprocessing,
+            num_workers=num_workers,
+        )
 
         tasks = OrderedDict()
-
-        for task_number, batch_params in enumerate(params.batch_assignments(*args)):
-            assignments = {**batch_params, **params.static_params}
-            final_circuit, metadata = assign_circuit(circuit, assignments)
-
-            level_couplings = analyze_channels(final_circuit)
-            final_circuit = canonicalize_circuit(final_circuit, level_couplings)
-
-            validate_waveforms(level_couplings, final_circuit)
-            ahs_components = generate_ahs_code(
-                capabilities, level_couplings, final_circuit
-            )
-
-            task_ir = generate_quera_ir(ahs_components, shots).discretize(capabilities)
-
+        for task_number, compiled in enumerate(compiled_tasks):
             tasks[task_number] = QuEraTask(
                 None,
                 self.backend,
-                task_ir,
-                metadata,
-                ahs_components.lattice_data.parallel_decoder,
+                compiled.task_ir,
+                compiled.metadata,
+                compiled.parallel_decoder,
             )
 
         batch = RemoteBatch(source=self.source, tasks=tasks, name=name)
+        batch.compile_timings = timings
 
         return batch
 
@@ -356,6 +372,8 @@ class QuEraHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
         """
@@ -368,12 +386,16 @@ class QuEraHardwareRoutine(RoutineBase):
             args (Tuple): additional arguments
             name (str): custom name of the batch
             shuffle (bool): shuffle the order of jobs
+            multiprocessing (bool): compile the tasks in a pool of processes
+            num_workers (int): number of processes used to compile the tasks
 
         Return:
             RemoteBatch
 
         """
-        batch = self._compile(shots, use_experimental, args, name)
+        batch = self._compile(
+            shots, use_experimental, args, name, multiprocessing, num_workers
+        )
         batch._submit(shuffle, **kwargs)
         return batch
 
@@ -385,9 +407,20 @@ class QuEraHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
-        batch = self.run_async(shots, args, name, use_experimental, shuffle, **kwargs)
+        batch = self.run_async(
+            shots,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
+        )
         batch.pull()
         return batch
 
@@ -399,6 +432,17 @@ class QuEraHardwareRoutine(RoutineBase):
         name: Optional[str] = None,
         use_experimental: bool = False,
         shuffle: bool = False,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
         **kwargs,
     ) -> RemoteBatch:
-        return self.run(shots, args, name, use_experimental, shuffle, **kwargs)
+        return self.run(
+            shots,
+            args,
+            name,
+            use_experimental,
+            shuffle,
+            multiprocessing,
+            num_workers,
+            **kwargs,
+        )
@@ -4,6 +4,7 @@ co-ordinations between Bloqade and Braket"""
 from typing import List, Tuple, Union
 from decimal import Decimal
 
+import numpy as np
 import braket.ir.ahs as braket_ir
 from pydantic.v1 import BaseModel
 from braket.timings import TimeSeries
@@ -17,9 +18,8 @@ from braket.ahs.analog_hamiltonian_simulation import AnalogHamiltonianSimulation
 
 import bloqade.analog.submission.ir.capabilities as cp
 from bloqade.analog.submission.ir.task_results import (
-    QuEraShotResult,
     QuEraTaskResults,
-    QuEraShotStatusCode,
+    PackedShotResults,
     QuEraTaskStatusCode,
 )
 from bloqade.analog.submission.ir.task_specification import (
@@ -170,18 +170,18 @@ def from_braket_task_results(
     Returns:
         An object of the type `Field` in Braket SDK.
     """
-    shot_outputs = []
-    for measurement in braket_task_results.measurements:
-        shot_outputs.append(
-            QuEraShotResult(
-                shot_status=QuEraShotStatusCode.Completed,
-                pre_sequence=list(measurement.pre_sequence),
-                post_sequence=list(measurement.post_sequence),
-            )
-        )
-
-    return QuEraTaskResults(
-        task_status=QuEraTaskStatusCode.Completed, shot_outputs=shot_outputs
+    measurements = braket_task_results.measurements
+    n_sites = len(measurements[0].pre_sequence) if measurements else 0
+
+    pre_sequences = np.zeros((len(measurements), n_sites), dtype=np.uint8)
+    post_sequences = np.zeros_like(pre_sequences)
+    for index, measurement in enumerate(measurements):
+        pre_sequences[index] = measurement.pre_sequence
+        post_sequences[index] = measurement.post_sequence
+
+    return QuEraTaskResults.from_packed(
+        PackedShotResults.from_sequences(pre_sequences, post_sequences),
+        QuEraTaskStatusCode.Completed,
     )
 
 
@@ -1,10 +1,12 @@
+import base64
 from enum import Enum
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple, Optional
 
 import numpy as np
-from pydantic.v1 import BaseModel, conint, conlist
+from pydantic.v1 import BaseModel, PrivateAttr, conint, conlist
 
-__all__ = ["QuEraTaskResults", "TaskProbabilities"]
+__all__ = ["QuEraTaskResults", "TaskProbabilities", "PackedShotResults"]
 
 # TODO: add version to these models.
 
@@ -53,6 +55,174 @@ class QuEraShotResult(BaseModel):
     post_sequence: conlist(conint(ge=0, le=1), min_items=0) = []
 
 
+_SHOT_STATUS_CODES = list(QuEraShotStatusCode)
+_SHOT_STATUS_INDEX = {code: index for index, code in enumerate(_SHOT_STATUS_CODES)}
+_COMPLETED = _SHOT_STATUS_INDEX[QuEraShotStatusCode.Completed]
+
+
+def _encode(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _decode(data: str, shape: Tuple[int, ...]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.uint8).reshape(shape)
+
+
+@dataclass(frozen=True)
+class PackedShotResults:
+    """Columnar storage of the shots of a task.
+
+    The pre and post sequences are stored with the bits of the sites packed
+    along each row as `np.packbits(..., axis=1)`. Whether a sequence is missing
+    follows from the status of the shot, the rows of missing sequences are
+    zero.
+
+    Attributes:
+        n_sites (int): number of sites of the sequences.
+        shot_status (np.ndarray): uint8 array with the position of the status
+            of each shot in `QuEraShotStatusCode`.
+        pre_sequences (np.ndarray): packed pre sequences, uint8 array of shape
+            `(shots, ceil(n_sites / 8))`.
+        post_sequences (np.ndarray): packed post sequences, same shape.
+    """
+
+    n_sites: int
+    shot_status: np.ndarray
+    pre_sequences: np.ndarray
+    post_sequences: np.ndarray
+
+    def __len__(self) -> int:
+        return self.shot_status.size
+
+    @classmethod
+    def from_sequences(
+        cls,
+        pre_sequences: np.ndarray,
+        post_sequences: np.ndarray,
+        shot_status: Optional[np.ndarray] = None,
+    ) -> "PackedShotResults":
+        """Pack arrays of 0 and 1 of shape `(shots, sites)`, all shots are
+        completed if `shot_status` is None."""
+        pre_sequences = np.asarray(pre_sequences, dtype=np.uint8)
+        post_sequences = np.asarray(post_sequences, dtype=np.uint8)
+        if pre_sequences.shape != post_sequences.shape or pre_sequences.ndim != 2:
+            raise ValueError(
+                "pre_sequences and post_sequences must be 2D arrays of the "
+                "same shape."
+            )
+
+        n_shots, n_sites = pre_sequences.shape
+        if shot_status is None:
+            shot_status = np.full(n_shots, _COMPLETED, dtype=np.uint8)
+
+        return cls(
+            n_sites,
+            np.asarray(shot_status, dtype=np.uint8),
+            np.packbits(pre_sequences, axis=1),
+            np.packbits(post_sequences, axis=1),
+        )
+
+    @classmethod
+    def from_shot_outputs(
+        cls, shot_outputs: List["QuEraShotResult"]
+    ) -> "PackedShotResults":
+        """Pack the shots of `QuEraTaskResults.shot_outputs`."""
+        n_shots = len(shot_outputs)
+        n_sites = max(
+            (
+                max(len(shot.pre_sequence), len(shot.post_sequence))
+                for shot in shot_outputs
+            ),
+            default=0,
+        )
+
+        shot_status = np.empty(n_shots, dtype=np.uint8)
+        pre_sequences = np.zeros((n_shots, n_sites), dtype=np.uint8)
+        post_sequences = np.zeros((n_shots, n_sites), dtype=np.uint8)
+        for index, shot in enumerate(shot_outputs):
+            shot_status[index] = _SHOT_STATUS_INDEX[shot.shot_status]
+            for sequences, sequence in [
+                (pre_sequences, shot.pre_sequence),
+                (post_sequences, shot.post_sequence),
+            ]:
+                if len(sequence) == n_sites:
+                    sequences[index] = sequence
+                elif len(sequence) > 0:
+                    raise ValueError(
+                        f"shot {index} has {len(sequence)} sites, expected "
+                        f"{n_sites} or none."
+                    )
+
+        return cls.from_sequences(pre_sequences, post_sequences, shot_status)
+
+    @property
+    def completed(self) -> np.ndarray:
+        """Mask of the completed shots."""
+        return self.shot_status == _COMPLETED
+
+    def unpack(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the pre and post sequences as uint8 arrays of shape
+        `(shots, n_sites)`."""
+        return (
+            np.unpackbits(self.pre_sequences, axis=1, count=self.n_sites),
+            np.unpackbits(self.post_sequences, axis=1, count=self.n_sites),
+        )
+
+    def to_shot_outputs(self) -> List["QuEraShotResult"]:
+        """Build the shots of `QuEraTaskResults.shot_outputs`."""
+        pre_sequences, post_sequences = (
+            sequences.tolist() for sequences in self.unpack()
+        )
+
+        shot_outputs = []
+        for index, status in enumerate(self.shot_status.tolist()):
+            shot_status = _SHOT_STATUS_CODES[status]
+            pre_sequence, post_sequence = pre_sequences[index], post_sequences[index]
+            if shot_status in (
+                QuEraShotStatusCode.MissingPreSequence,
+                QuEraShotStatusCode.MissingMeasurement,
+            ):
+                pre_sequence = []
+
+            if shot_status in (
+                QuEraShotStatusCode.MissingPostSequence,
+                QuEraShotStatusCode.MissingMeasurement,
+            ):
+                post_sequence = []
+
+            # the packed bits are valid by construction
+            shot_outputs.append(
+                QuEraShotResult.construct(
+                    shot_status=shot_status,
+                    pre_sequence=pre_sequence,
+                    post_sequence=post_sequence,
+                )
+            )
+
+        return shot_outputs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the arrays as base64 strings."""
+        return {
+            "n_sites": self.n_sites,
+            "shot_status": _encode(self.shot_status),
+            "pre_sequences": _encode(self.pre_sequences),
+            "post_sequences": _encode(self.post_sequences),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PackedShotResults":
+        n_sites = d["n_sites"]
+        shot_status = _decode(d["shot_status"], (-1,))
+        shape = (shot_status.size, (n_sites + 7) // 8)
+        return cls(
+            n_sites,
+            shot_status,
+            _decode(d["pre_sequences"], shape),
+            _decode(d["post_sequences"], shape),
+        )
+
+
 class TaskProbabilities(BaseModel):
     probabilities: List[Tuple[Tuple[str, str], float]]
 
@@ -82,6 +252,76 @@ class TaskProbabilities(BaseModel):
 class QuEraTaskResults(BaseModel):
     task_status: QuEraTaskStatusCode = QuEraTaskStatusCode.Failed
     shot_outputs: conlist(QuEraShotResult, min_items=0) = []
+    # columnar shots of results built by `from_packed`
+    _packed: Optional[PackedShotResults] = PrivateAttr(None)
+
+    def __getattr__(self, name: str) -> Any:
+        # the shots of results built from packed shots are created on first use
+        if name == "shot_outputs" and self._packed is not None:
+            shot_outputs = self._packed.to_shot_outputs()
+            self.__dict__["shot_outputs"] = shot_outputs
+            return shot_outputs
+
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def _iter(self, *args, **kwargs):
+        # `dict`, `json` and `==` see all fields
+        self.shot_outputs
+        return super()._iter(*args, **kwargs)
+
+    @classmethod
+    def from_packed(
+        cls,
+        packed: PackedShotResults,
+        task_status: QuEraTaskStatusCode = QuEraTaskStatusCode.Completed,
+    ) -> "QuEraTaskResults":
+        """Build the results from packed shots, `shot_outputs` is only
+        created when it is used."""
+        results = cls.construct(
+            _fields_set={"task_status", "shot_outputs"}, task_status=task_status
+        )
+        del results.__dict__["shot_outputs"]
+        results._packed = packed
+        return results
+
+    @classmethod
+    def from_sequences(
+        cls,
+        pre_sequences: np.ndarray,
+        post_sequences: np.ndarray,
+        task_status: QuEraTaskStatusCode = QuEraTaskStatusCode.Completed,
+    ) -> "QuEraTaskResults":
+        """Build the results of completed shots from arrays of shape
+        `(shots, sites)` of 0 and 1, e.g. the samples of the emulator.
+
+        The arrays are trusted, the shots are not validated one by one.
+        """
+        packed = PackedShotResults.from_sequences(pre_sequences, post_sequences)
+        return cls.from_packed(packed, task_status)
+
+    def packed(self) -> PackedShotResults:
+        """The shots in columnar storage, see `PackedShotResults`."""
+        if self._packed is not None:
+            return self._packed
+
+        # `shot_outputs` may be modified, the packed shots are not cached
+        return PackedShotResults.from_shot_outputs(self.shot_outputs)
+
+    def to_compact_dict(self) -> Dict[str, Any]:
+        """Serialize the results with the shots packed into base64 strings."""
+        return {"task_status": self.task_status.value, **self.packed().to_dict()}
+
+    @classmethod
+    def parse_compact_dict(cls, d: Dict[str, Any]) -> "QuEraTaskResults":
+        """Inverse of `to_compact_dict`, the output of `dict` is accepted as
+        well."""
+        if "shot_outputs" in d:
+            return cls(**d)
+
+        packed = PackedShotResults.from_dict(d)
+        return cls.from_packed(packed, QuEraTaskStatusCode(d["task_status"]))
 
     def export_as_probabilities(self) -> TaskProbabilities:
         """converts from shot results to probabilities
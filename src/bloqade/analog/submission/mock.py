@@ -1,12 +1,12 @@
+import json
 import uuid
 
 import numpy as np
 
 from bloqade.analog.submission.base import SubmissionBackend
 from bloqade.analog.submission.ir.task_results import (
-    QuEraShotResult,
     QuEraTaskResults,
-    QuEraShotStatusCode,
+    PackedShotResults,
     QuEraTaskStatusCode,
 )
 from bloqade.analog.submission.ir.task_specification import QuEraTaskSpecification
@@ -23,23 +23,15 @@ def simulate_task_results(task: QuEraTaskSpecification, p_full=0.99, p_empty=0.0
 
     rng = np.random.default_rng()
 
-    shot_outputs = []
-    for shot in range(task.nshots):
-        pre_sequence = rng.binomial(np.ones(natoms, dtype=int), pre_sequence_probs)
-        post_sequence = rng.binomial(
-            np.ones(natoms, dtype=int), pre_sequence * post_sequence_probs
-        )
-
-        shot_outputs.append(
-            QuEraShotResult(
-                shot_status=QuEraShotStatusCode.Completed,
-                pre_sequence=list(pre_sequence),
-                post_sequence=list(post_sequence),
-            )
-        )
-
-    return QuEraTaskResults(
-        task_status=QuEraTaskStatusCode.Completed, shot_outputs=shot_outputs
+    shape = (task.nshots, natoms)
+    pre_sequences = rng.binomial(np.ones(shape, dtype=int), pre_sequence_probs)
+    post_sequences = rng.binomial(
+        np.ones(shape, dtype=int), pre_sequences * post_sequence_probs
+    )
+
+    return QuEraTaskResults.from_packed(
+        PackedShotResults.from_sequences(pre_sequences, post_sequences),
+        QuEraTaskStatusCode.Completed,
     )
 
 
@@ -54,7 +46,7 @@ class MockBackend(SubmissionBackend):
         task_id = str(uuid.uuid4())
         task_results = simulate_task_results(task)
         with open(self.state_file, "a") as IO:
-            IO.write(f"('{task_id}',{task_results.json()})\n")
+            IO.write(f"('{task_id}',{json.dumps(task_results.to_compact_dict())})\n")
 
         return task_id
 
@@ -64,7 +56,7 @@ class MockBackend(SubmissionBackend):
             potential_task_id, task_results = eval(line)
 
             if potential_task_id == task_id:
-                return QuEraTaskResults(**task_results)
+                return QuEraTaskResults.parse_compact_dict(task_results)
 
         raise ValueError(f"unable to fetch results for task_id: {task_id}")
 
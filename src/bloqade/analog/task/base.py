@@ -183,6 +183,59 @@ class LocalTask(Task):
         raise NotImplementedError
 
 
+def _generate_counts(bitstring):
+    output = np.unique(bitstring, axis=0, return_counts=True)
+
+    count_list = [
+        ("".join(map(str, bitstring)), int(count)) for bitstring, count in zip(*output)
+    ]
+    count_list.sort(key=lambda x: x[1], reverse=True)
+    count = OrderedDict(count_list)
+
+    return count
+
+
+def _packed_counts(data: NDArray, bounds: NDArray) -> List[OrderedDict]:
+    # counts of the rows of 0 and 1 of each task, the rows of a task are
+    # `data[bounds[i]:bounds[i + 1]]`. The rows are packed into bytes prefixed
+    # with their task so a single sort counts all tasks, their order is the
+    # order of `np.unique(bitstring, axis=0)`.
+    n_rows, width = data.shape
+    task_codes = np.repeat(np.arange(bounds.size - 1), np.diff(bounds))
+
+    keys = np.concatenate(
+        [
+            task_codes.astype(">u8").view(np.uint8).reshape(n_rows, 8),
+            np.packbits(data.astype(np.uint8), axis=1),
+        ],
+        axis=1,
+    )
+    keys = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.shape[1])))
+    unique_keys, key_counts = np.unique(keys.ravel(), return_counts=True)
+
+    unique_keys = unique_keys.view(np.uint8).reshape(unique_keys.size, keys.itemsize)
+    unique_tasks = unique_keys[:, :8].copy().view(">u8").ravel()
+    if width > 0:
+        rows = np.unpackbits(unique_keys[:, 8:], axis=1, count=width)
+        strings = (rows + ord("0")).view(f"S{width}").ravel().astype(str).tolist()
+    else:
+        strings = [""] * unique_keys.shape[0]
+
+    counts = []
+    task_bounds = np.searchsorted(unique_tasks, np.arange(bounds.size))
+    for start, stop in zip(task_bounds[:-1], task_bounds[1:]):
+        # most frequent first, ties in the order of the bit strings
+        order = start + np.argsort(-key_counts[start:stop], kind="stable")
+        counts.append(
+            OrderedDict(
+                (strings[index], count)
+                for index, count in zip(order.tolist(), key_counts[order].tolist())
+            )
+        )
+
+    return counts
+
+
 class Report:
     """Report is a helper class for organizing and analysing data
 
@@ -233,8 +286,9 @@ class Report:
 
     def __init__(self, data, metas, geos, name="") -> None:
         self.dataframe = data  # df
-        self._bitstrings = None  # bitstring cache
-        self._counts = None  # counts cache
+        self._masks = {}  # filter cache
+        self._bitstrings = {}  # bitstring cache
+        self._counts = {}  # counts cache
         self.metas = metas
         self.geos = geos
         self.name = name + " " + str(datetime.datetime.now())
@@ -264,6 +318,21 @@ class Report:
         """Get the markdown representation of the dataframe"""
         return self.dataframe.to_markdown()
 
+    def _level_codes(self, name: str) -> Tuple[pd.Index, NDArray]:
+        index = self.dataframe.index
+        level = index.names.index(name)
+        return index.levels[level], np.asarray(index.codes[level])
+
+    def _level_code(self, name: str, value) -> int:
+        # code of a value in a level of the index, -1 if the value is missing
+        level, _ = self._level_codes(name)
+        return next((code for code, item in enumerate(level) if item == value), -1)
+
+    @staticmethod
+    def _cache_key(filter_perfect_filling: bool, clusters) -> Tuple:
+        clusters = [clusters] if isinstance(clusters, tuple) else clusters
+        return (filter_perfect_filling, tuple(map(tuple, clusters)))
+
     def _filter(
         self,
         *,
@@ -271,25 +340,59 @@ class Report:
         filter_perfect_filling: bool = True,
         clusters: Union[tuple[int, int], Sequence[Tuple[int, int]]] = [],
     ):
+        key = (task_number,) + self._cache_key(filter_perfect_filling, clusters)
+        if key in self._masks:
+            return self._masks[key].copy()
+
+        # the levels of the index are compared through their integer codes
         mask = np.ones(len(self.dataframe), dtype=bool)
 
         if task_number is not None:
-            task_numbers = self.dataframe.index.get_level_values("task_number")
-            np.logical_and(task_numbers == task_number, mask, out=mask)
+            _, task_codes = self._level_codes("task_number")
+            code = self._level_code("task_number", task_number)
+            np.logical_and(task_codes == code, mask, out=mask)
 
         if filter_perfect_filling:
-            perfect_sorting = self.dataframe.index.get_level_values("perfect_sorting")
-            pre_sequence = self.dataframe.index.get_level_values("pre_sequence")
+            sorting_level, sorting_codes = self._level_codes("perfect_sorting")
+            pre_sequence_level, pre_sequence_codes = self._level_codes("pre_sequence")
+
+            # code of each pre sequence in the perfect sorting level, a missing
+            # pre sequence (code -1) is mapped to -2 which matches no code
+            sorting_indexer = np.append(
+                sorting_level.get_indexer(pre_sequence_level), -2
+            )
+            np.logical_and(
+                sorting_codes == sorting_indexer[pre_sequence_codes], mask, out=mask
+            )
 
-            np.logical_and(perfect_sorting == pre_sequence, mask, out=mask)
+        _, cluster_codes = self._level_codes("cluster")
+        for cluster in key[2]:
+            code = self._level_code("cluster", cluster)
+            np.logical_and(cluster_codes == code, mask, out=mask)
 
-        clusters = [clusters] if isinstance(clusters, tuple) else clusters
+        self._masks[key] = mask
+        return mask.copy()
+
+    def _task_groups(
+        self, filter_perfect_filling: bool, clusters
+    ) -> Tuple[NDArray, NDArray]:
+        # the filtered rows ordered by task and the bounds of each task in
+        # them, the tasks are in the order of their first row
+        mask = self._filter(
+            filter_perfect_filling=filter_perfect_filling, clusters=clusters
+        )
+        _, task_codes = self._level_codes("task_number")
+        task_codes, task_numbers = pd.factorize(task_codes)
 
-        for cluster in clusters:
-            given_clusters = self.dataframe.index.get_level_values("cluster")
-            np.logical_and(given_clusters == cluster, mask, out=mask)
+        data = self.dataframe.to_numpy()[mask]
+        task_codes = task_codes[mask]
+        if np.any(task_codes[1:] < task_codes[:-1]):
+            order = np.argsort(task_codes, kind="stable")
+            data = data[order]
+            task_codes = task_codes[order]
 
-        return mask
+        bounds = np.searchsorted(task_codes, np.arange(len(task_numbers) + 1))
+        return data, bounds
 
     @beartype
     def bitstrings(
@@ -328,23 +431,22 @@ class Report:
 
         """
 
-        task_numbers = self.dataframe.index.get_level_values("task_number").unique()
+        key = self._cache_key(filter_perfect_filling, clusters)
+        if key not in self._bitstrings:
+            data, bounds = self._task_groups(filter_perfect_filling, clusters)
 
-        bitstrings = []
-        for task_number in task_numbers:
-            mask = self._filter(
-                task_number=task_number,
-                filter_perfect_filling=filter_perfect_filling,
-                clusters=clusters,
-            )
-            if np.any(mask):
-                bitstrings.append(self.dataframe.loc[mask].to_numpy())
-            else:
-                bitstrings.append(
-                    np.zeros((0, self.dataframe.shape[1]), dtype=np.uint8)
-                )
+            bitstrings = []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                if start < stop:
+                    bitstrings.append(data[start:stop])
+                else:
+                    bitstrings.append(
+                        np.zeros((0, self.dataframe.shape[1]), dtype=np.uint8)
+                    )
+
+            self._bitstrings[key] = bitstrings
 
-        return bitstrings
+        return [bitstring.copy() for bitstring in self._bitstrings[key]]
 
     def counts(
         self,
@@ -376,21 +478,21 @@ class Report:
 
         """
 
-        def _generate_counts(bitstring):
-            output = np.unique(bitstring, axis=0, return_counts=True)
-
-            count_list = [
-                ("".join(map(str, bitstring)), int(count))
-                for bitstring, count in zip(*output)
-            ]
-            count_list.sort(key=lambda x: x[1], reverse=True)
-            count = OrderedDict(count_list)
+        key = self._cache_key(filter_perfect_filling, clusters)
+        if key not in self._counts:
+            data, bounds = self._task_groups(filter_perfect_filling, clusters)
+            if data.dtype.kind in "iub" and np.all((data == 0) | (data == 1)):
+                counts = _packed_counts(data, bounds)
+            else:
+                # e.g. the padded sites of a report with different registers
+                counts = [
+                    _generate_counts(data[start:stop])
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ]
 
-            return count
+            self._counts[key] = counts
 
-        return list(
-            map(_generate_counts, self.bitstrings(filter_perfect_filling, clusters))
-        )
+        return [OrderedDict(count) for count in self._counts[key]]
 
     @beartype
     def rydberg_densities(
@@ -6,7 +6,6 @@ import traceback
 from typing import Literal
 from decimal import Decimal
 from numbers import Real
-from itertools import product
 from collections import OrderedDict
 from dataclasses import field, dataclass
 from collections.abc import Sequence
@@ -14,7 +13,7 @@ from collections.abc import Sequence
 import numpy as np
 import pandas as pd
 from beartype import beartype
-from beartype.typing import Any, Dict, List, Union, Optional
+from beartype.typing import Any, Dict, List, Tuple, Union, Optional
 
 from bloqade.analog.serialize import Serializer
 from bloqade.analog.task.base import Report, CustomRemoteTaskABC
@@ -26,7 +25,6 @@ from bloqade.analog.builder.typing import LiteralType
 from bloqade.analog.task.braket_simulator import BraketEmulatorTask
 from bloqade.analog.submission.ir.task_results import (
     QuEraTaskResults,
-    QuEraShotStatusCode,
     QuEraTaskStatusCode,
 )
 
@@ -111,6 +109,146 @@ class Filter:
         return self.__class__(**kw)
 
 
+def _factorize_bit_strings(bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # the distinct rows of 0 and 1 as strings such as "0110" and the position
+    # of each row in them, only the distinct rows are converted to strings
+    bits = np.ascontiguousarray(bits, dtype=np.uint8)
+    n_rows, width = bits.shape
+    if width == 0:
+        return np.array([""], dtype=object), np.zeros(n_rows, dtype=np.intp)
+
+    packed = np.ascontiguousarray(np.packbits(bits, axis=1))
+    keys = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+    unique_keys, codes = np.unique(keys, return_inverse=True)
+
+    unique_bits = np.unpackbits(
+        unique_keys.view(np.uint8).reshape(-1, packed.shape[1]), axis=1, count=width
+    )
+    strings = (unique_bits + ord("0")).view(f"S{width}").ravel()
+    return strings.astype(str).astype(object), codes.ravel()
+
+
+def _merge_levels(
+    parts: List[Tuple[np.ndarray, np.ndarray]],
+) -> Tuple[pd.Index, np.ndarray]:
+    # merge `(levels, codes)` pairs into sorted levels and concatenated codes
+    levels = pd.Index(
+        np.concatenate([part_levels for part_levels, _ in parts]),
+        tupleize_cols=False,
+    )
+    levels = levels.unique().sort_values()
+    codes = np.concatenate(
+        [levels.get_indexer(part_levels)[codes] for part_levels, codes in parts]
+    )
+    return levels, codes
+
+
+def _task_report_data(task_number: int, task) -> Dict[str, Any]:
+    # index levels and codes and the post sequences of the completed shots of
+    # a task, one row per shot and cluster with the clusters of a shot in
+    # consecutive rows
+    geometry = task.geometry
+    filling = np.asarray(geometry.filling, dtype=np.uint8)
+    parallel_decoder = geometry.parallel_decoder
+
+    if parallel_decoder:
+        cluster_indices = parallel_decoder.get_cluster_indices()
+    else:
+        cluster_indices = {(0, 0): list(range(len(filling)))}
+
+    packed = task.result().packed()
+    pre_sequences, post_sequences = packed.unpack()
+    completed = packed.completed
+    pre_sequences = pre_sequences[completed]
+    post_sequences = post_sequences[completed]
+    n_shots = pre_sequences.shape[0]
+
+    clusters = np.empty(len(cluster_indices), dtype=object)
+    clusters[:] = list(cluster_indices.keys())
+    sites = list(cluster_indices.values())
+    n_clusters = len(sites)
+    width = max(map(len, sites), default=0)
+
+    if all(len(cluster_sites) == width for cluster_sites in sites):
+        sites = np.array(sites, dtype=np.intp).reshape(n_clusters, width)
+        # (shots, clusters, sites) with rows ordered by shot, then cluster
+        data = post_sequences[:, sites].astype(np.int8).reshape(-1, width)
+        pre_sequence = _factorize_bit_strings(
+            pre_sequences[:, sites].reshape(-1, width)
+        )
+        pfc_levels, pfc_codes = _factorize_bit_strings(filling[sites])
+    else:
+        # clusters of different sizes are padded as in a ragged DataFrame
+        data = np.full((n_shots, n_clusters, width), np.nan)
+        pre_parts = []
+        pfc_parts = []
+        for cluster, cluster_sites in enumerate(sites):
+            data[:, cluster, : len(cluster_sites)] = post_sequences[:, cluster_sites]
+            pre_parts.append(_factorize_bit_strings(pre_sequences[:, cluster_sites]))
+            pfc_parts.append(_factorize_bit_strings(filling[None, cluster_sites]))
+
+        data = data.reshape(-1, width)
+        pre_levels, pre_codes = _merge_levels(pre_parts)
+        # the codes are ordered by cluster, then shot
+        pre_codes = pre_codes.reshape(n_clusters, n_shots).T.ravel()
+        pre_sequence = (pre_levels.to_numpy(), pre_codes)
+        pfc_levels, pfc_codes = _merge_levels(pfc_parts)
+        pfc_levels = pfc_levels.to_numpy()
+
+    n_rows = n_shots * n_clusters
+    return {
+        "task_number": (np.array([task_number]), np.zeros(n_rows, dtype=np.intp)),
+        "cluster": (clusters, np.tile(np.arange(n_clusters), n_shots)),
+        "perfect_sorting": (pfc_levels, np.tile(pfc_codes, n_shots)),
+        "pre_sequence": pre_sequence,
+        "data": data,
+    }
+
+
+def _report_dataframe(tasks: List[Tuple[int, Any]]) -> pd.DataFrame:
+    """Build the DataFrame of a `Report` from `(task_number, task)` pairs.
+
+    The shots are gathered into arrays per task and split into clusters with
+    fancy indexing, the index is built from the codes of its levels.
+    """
+    names = ["task_number", "cluster", "perfect_sorting", "pre_sequence"]
+    if len(tasks) == 0:
+        return pd.DataFrame([], index=pd.MultiIndex.from_tuples([], names=names))
+
+    task_data = [_task_report_data(task_number, task) for task_number, task in tasks]
+
+    width = max(d["data"].shape[1] for d in task_data)
+    blocks = []
+    for d in task_data:
+        data = d["data"]
+        if data.shape[1] < width:
+            # tasks with fewer sites are padded as in a ragged DataFrame
+            padded = np.full((data.shape[0], width), np.nan)
+            padded[:, : data.shape[1]] = data
+            data = padded
+
+        blocks.append(data)
+
+    levels, codes = zip(
+        *(_merge_levels([d[name] for d in task_data]) for name in names)
+    )
+    index = pd.MultiIndex(
+        levels=levels, codes=codes, names=names, verify_integrity=False
+    )
+    data = np.concatenate(blocks)
+    if data.dtype == np.int8:
+        return pd.DataFrame(data, index=index)
+
+    # as in a ragged DataFrame only the padded columns are floats
+    return pd.DataFrame(
+        {
+            column: values if np.isnan(values).any() else values.astype(np.int8)
+            for column, values in enumerate(data.T)
+        },
+        index=index,
+    )
+
+
 @dataclass
 @Serializer.register
 class LocalBatch(Serializable, Filter):
@@ -128,66 +266,10 @@ class LocalBatch(Serializable, Filter):
 
         """
 
-        ## this potentially can be specialize/disatch
-        ## offline
-        index = []
-        data = []
-        metas = []
-        geos = []
-
-        for task_number, task in self.tasks.items():
-            geometry = task.geometry
-            perfect_sorting = "".join(map(str, geometry.filling))
-            parallel_decoder = geometry.parallel_decoder
-
-            if parallel_decoder:
-                cluster_indices = parallel_decoder.get_cluster_indices()
-            else:
-                cluster_indices = {(0, 0): list(range(len(perfect_sorting)))}
-
-            shot_iter = filter(
-                lambda shot: shot.shot_status == QuEraShotStatusCode.Completed,
-                task.result().shot_outputs,
-            )
-
-            for shot, (cluster_coordinate, cluster_index) in product(
-                shot_iter, cluster_indices.items()
-            ):
-                pre_sequence = "".join(
-                    map(
-                        str,
-                        (shot.pre_sequence[index] for index in cluster_index),
-                    )
-                )
-
-                post_sequence = np.asarray(
-                    [shot.post_sequence[index] for index in cluster_index],
-                    dtype=np.int8,
-                )
-
-                pfc_sorting = "".join(
-                    [perfect_sorting[index] for index in cluster_index]
-                )
-
-                key = (
-                    task_number,
-                    cluster_coordinate,
-                    pfc_sorting,
-                    pre_sequence,
-                )
-
-                index.append(key)
-                data.append(post_sequence)
-
-            metas.append(task.metadata)
-            geos.append(task.geometry)
-
-        index = pd.MultiIndex.from_tuples(
-            index, names=["task_number", "cluster", "perfect_sorting", "pre_sequence"]
-        )
-
-        df = pd.DataFrame(data, index=index)
-        df.sort_index(axis="index")
+        tasks = list(self.tasks.items())
+        df = _report_dataframe(tasks)
+        metas = [task.metadata for _, task in tasks]
+        geos = [task.geometry for _, task in tasks]
 
         rept = None
         if self.name is None:
@@ -214,7 +296,11 @@ class LocalBatch(Serializable, Filter):
         )
 
     def _run(
-        self, multiprocessing: bool = False, num_workers: Optional[int] = None, **kwargs
+        self,
+        multiprocessing: bool = False,
+        num_workers: Optional[int] = None,
+        batched: bool = False,
+        **kwargs,
     ):
         """
         Private method to run tasks in the batch.
@@ -224,15 +310,35 @@ class LocalBatch(Serializable, Filter):
                 If False, tasks are run sequentially in a single process. Defaults to False.
             num_workers (Optional[int], optional): The maximum number of processes that can be used to
                 execute the given calls if multiprocessing is True. If None, the number of workers will be the number of processors on the machine.
+            batched (bool, optional): If True, tasks sharing the same register are evolved together,
+                see `BloqadeTask.run_batch`. Only supported for bloqade tasks. Defaults to False.
             **kwargs: Arbitrary keyword arguments passed to the task's run method.
 
         Raises:
             ValueError: If num_workers is not None and multiprocessing is False.
+            ValueError: If batched is True and multiprocessing is True or the batch contains
+                tasks other than bloqade tasks.
 
         Returns:
             self: The instance of the batch with tasks run.
         """
-        if multiprocessing:
+        if batched:
+            if multiprocessing:
+                raise ValueError(
+                    "Cannot use multiprocessing and batched at the same time."
+                )
+
+            if num_workers is not None:
+                raise ValueError(
+                    "num_workers is only used when multiprocessing is enabled."
+                )
+
+            if not all(isinstance(task, BloqadeTask) for task in self.tasks.values()):
+                raise ValueError("batched is only supported for bloqade tasks.")
+
+            BloqadeTask.run_batch(list(self.tasks.values()), **kwargs)
+
+        elif multiprocessing:
             from concurrent.futures import ProcessPoolExecutor as Pool
 
             with Pool(max_workers=num_workers) as pool:
@@ -339,6 +445,8 @@ class RemoteBatch(Serializable, Filter):
         OrderedDict[int, CustomRemoteTaskABC],
     ]
     name: Optional[str] = None
+    # time spent in each stage of the compilation, not serialized
+    compile_timings: Optional[Any] = field(default=None, repr=False, compare=False)
 
     class SubmissionException(Exception):
         pass
@@ -724,13 +832,7 @@ class RemoteBatch(Serializable, Filter):
             Report
 
         """
-        ## this potentially can be specialize/disatch
-        ## offline
-        index = []
-        data = []
-        metas = []
-        geos = []
-
+        tasks = []
         for task_number, task in self.tasks.items():
             ## fliter not existing results tasks:
             if (task.task_id is None) or (not task._result_exists()):
@@ -743,58 +845,11 @@ class RemoteBatch(Serializable, Filter):
             ]:
                 continue
 
-            geometry = task.geometry
-            perfect_sorting = "".join(map(str, geometry.filling))
-            parallel_decoder = geometry.parallel_decoder
-
-            if parallel_decoder:
-                cluster_indices = parallel_decoder.get_cluster_indices()
-            else:
-                cluster_indices = {(0, 0): list(range(len(perfect_sorting)))}
-
-            shot_iter = filter(
-                lambda shot: shot.shot_status == QuEraShotStatusCode.Completed,
-                task.result().shot_outputs,
-            )
-
-            for shot, (cluster_coordinate, cluster_index) in product(
-                shot_iter, cluster_indices.items()
-            ):
-                pre_sequence = "".join(
-                    map(
-                        str,
-                        (shot.pre_sequence[index] for index in cluster_index),
-                    )
-                )
-
-                post_sequence = np.asarray(
-                    [shot.post_sequence[index] for index in cluster_index],
-                    dtype=np.int8,
-                )
-
-                pfc_sorting = "".join(
-                    [perfect_sorting[index] for index in cluster_index]
-                )
-
-                key = (
-                    task_number,
-                    cluster_coordinate,
-                    pfc_sorting,
-                    pre_sequence,
-                )
-
-                index.append(key)
-                data.append(post_sequence)
-
-            metas.append(task.metadata)
-            geos.append(task.geometry)
-
-        index = pd.MultiIndex.from_tuples(
-            index, names=["task_number", "cluster", "perfect_sorting", "pre_sequence"]
-        )
+            tasks.append((task_number, task))
 
-        df = pd.DataFrame(data, index=index)
-        df.sort_index(axis="index")
+        df = _report_dataframe(tasks)
+        metas = [task.metadata for _, task in tasks]
+        geos = [task.geometry for _, task in tasks]
 
         rept = None
         if self.name is None:
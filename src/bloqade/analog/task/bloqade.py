@@ -2,18 +2,16 @@ from typing import Optional
 from dataclasses import dataclass
 
 import numpy as np
-from beartype.typing import Any, Dict
+from beartype.typing import Any, Dict, List
 
 from bloqade.analog.serialize import Serializer
 from bloqade.analog.task.base import Geometry, LocalTask
 from bloqade.analog.builder.base import ParamType
 from bloqade.analog.emulate.ir.emulator import EmulatorProgram
-from bloqade.analog.emulate.ir.state_vector import AnalogGate
+from bloqade.analog.emulate.ir.state_vector import AnalogGate, BatchAnalogGate
 from bloqade.analog.submission.ir.task_results import (
-    QuEraShotResult,
     QuEraTaskResults,
-    QuEraShotStatusCode,
-    QuEraTaskStatusCode,
+    PackedShotResults,
 )
 from bloqade.analog.emulate.codegen.hamiltonian import (
     CompileCache,
@@ -29,6 +27,8 @@ class BloqadeTask(LocalTask):
     metadata: Dict[str, ParamType]
     compile_cache: Optional[CompileCache] = None
     task_result_ir: Optional[QuEraTaskResults] = None
+    # seeds the generator sampling the shots, fresh entropy if `None`
+    seed: Optional[np.random.SeedSequence] = None
 
     def _geometry(self) -> Geometry:
         return self.emulator_ir.register.geometry
@@ -60,32 +60,76 @@ class BloqadeTask(LocalTask):
             interaction_picture=interaction_picture,
         )
         shots_array = AnalogGate(hamiltonian).run(
-            self.shots, project_hyperfine=True, **options
+            self.shots,
+            project_hyperfine=True,
+            rng=np.random.default_rng(self.seed),
+            packed=True,
+            **options,
         )
+        self._set_result(shots_array)
 
-        geometry = self.emulator_ir.register.geometry
+        return self
 
-        filling = np.asarray(geometry.filling, dtype=int)
-        full_shot = np.zeros_like(filling, dtype=int)
+    @staticmethod
+    def run_batch(
+        tasks: List["BloqadeTask"],
+        solver_name: str = "dop853",
+        atol: float = 1e-14,
+        rtol: float = 1e-7,
+        nsteps: int = 2_147_483_647,
+        interaction_picture: bool = False,
+    ) -> List["BloqadeTask"]:
+        """Run tasks sharing the same register together, see `BatchAnalogGate`.
 
-        shot_outputs = []
-        for shot in shots_array[:]:
-            # flip the bits so that 1 = ground state and 0 = excited state
-            # and scatter shot results into the full shot array according to the filling
-            full_shot[filling == 1] = 1 - shot
+        Tasks are grouped by register, the tasks of a group are evolved as a
+        single block of state vectors.
+        """
+        options = dict(
+            solver_name=solver_name,
+            atol=atol,
+            rtol=rtol,
+            nsteps=nsteps,
+            interaction_picture=interaction_picture,
+        )
 
-            shot_result = QuEraShotResult(
-                shot_status=QuEraShotStatusCode.Completed,
-                pre_sequence=filling.tolist(),
-                post_sequence=full_shot.tolist(),
-            )
-            shot_outputs.append(shot_result)
+        hamiltonians = [
+            RydbergHamiltonianCodeGen(task.compile_cache).emit(task.emulator_ir)
+            for task in tasks
+        ]
+
+        for group in BatchAnalogGate.group(hamiltonians):
+            gate = BatchAnalogGate([hamiltonians[index] for index in group])
+            (results,) = gate.apply(**options)
+            for index, result in zip(group, results):
+                result.normalize()
+                task = tasks[index]
+                task._set_result(
+                    result.sample(
+                        task.shots,
+                        project_hyperfine=True,
+                        rng=np.random.default_rng(task.seed),
+                        packed=True,
+                    )
+                )
+
+        return tasks
+
+    def _set_result(self, packed_shots: np.ndarray) -> None:
+        # `packed_shots` are the bit-packed samples of the filled sites
+        geometry = self.emulator_ir.register.geometry
 
-        self.task_result_ir = QuEraTaskResults(
-            task_status=QuEraTaskStatusCode.Completed, shot_outputs=shot_outputs
-        )
+        filling = np.asarray(geometry.filling, dtype=bool)
+        bits = np.unpackbits(packed_shots, axis=1, count=int(filling.sum()))
 
-        return self
+        # flip the bits so that 1 = ground state and 0 = excited state
+        # and scatter shot results into the full shot array according to the filling
+        post_sequences = np.zeros((bits.shape[0], filling.size), dtype=np.uint8)
+        post_sequences[:, filling] = 1 - bits
+        pre_sequences = np.broadcast_to(filling, post_sequences.shape)
+
+        self.task_result_ir = QuEraTaskResults.from_packed(
+            PackedShotResults.from_sequences(pre_sequences, post_sequences)
+        )
 
 
 @BloqadeTask.set_serializer
@@ -94,13 +138,17 @@ def _serialize(obj: BloqadeTask) -> Dict[str, Any]:
         "shots": obj.shots,
         "emulator_ir": obj.emulator_ir,
         "metadata": obj.metadata,
-        "task_result_ir": obj.task_result_ir.dict() if obj.task_result_ir else None,
+        "task_result_ir": (
+            obj.task_result_ir.to_compact_dict() if obj.task_result_ir else None
+        ),
     }
 
 
 @BloqadeTask.set_deserializer
 def _deserialize(d: Dict[str, Any]) -> BloqadeTask:
     d["task_result_ir"] = (
-        QuEraTaskResults(**d["task_result_ir"]) if d["task_result_ir"] else None
+        QuEraTaskResults.parse_compact_dict(d["task_result_ir"])
+        if d["task_result_ir"]
+        else None
     )
     return BloqadeTask(**d)
@@ -145,7 +145,9 @@ def _serialize(obj: BraketTask) -> Dict[str, Any]:
         "parallel_decoder": (
             obj.parallel_decoder.dict() if obj.parallel_decoder else None
         ),
-        "task_result_ir": obj.task_result_ir.dict() if obj.task_result_ir else None,
+        "task_result_ir": (
+            obj.task_result_ir.to_compact_dict() if obj.task_result_ir else None
+        ),
     }
 
 
@@ -157,6 +159,8 @@ def _deserialize(d: Dict[str, Any]) -> BraketTask:
         ParallelDecoder(**d["parallel_decoder"]) if d["parallel_decoder"] else None
     )
     d["task_result_ir"] = (
-        QuEraTaskResults(**d["task_result_ir"]) if d["task_result_ir"] else None
+        QuEraTaskResults.parse_compact_dict(d["task_result_ir"])
+        if d["task_result_ir"]
+        else None
     )
     return BraketTask(**d)
@@ -57,7 +57,9 @@ def _serialize(obj: BraketEmulatorTask) -> Dict[str, Any]:
     return {
         "task_ir": obj.task_ir.dict(),
         "metadata": obj.metadata,
-        "task_result_ir": obj.task_result_ir.dict() if obj.task_result_ir else None,
+        "task_result_ir": (
+            obj.task_result_ir.to_compact_dict() if obj.task_result_ir else None
+        ),
     }
 
 
@@ -65,6 +67,8 @@ def _serialize(obj: BraketEmulatorTask) -> Dict[str, Any]:
 def _serializer(d: Dict[str, Any]) -> BraketEmulatorTask:
     d["task_ir"] = BraketTaskSpecification(**d["task_ir"])
     d["task_result_ir"] = (
-        QuEraTaskResults(**d["task_result_ir"]) if d["task_result_ir"] else None
+        QuEraTaskResults.parse_compact_dict(d["task_result_ir"])
+        if d["task_result_ir"]
+        else None
     )
     return BraketEmulatorTask(**d)
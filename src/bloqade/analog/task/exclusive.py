@@ -369,7 +369,9 @@ def _serialze(obj: ExclusiveRemoteTask) -> Dict[str, ParamType]:
         "parallel_decoder": (
             obj.parallel_decoder.dict() if obj.parallel_decoder else None
         ),
-        "task_result_ir": obj.task_result_ir.dict() if obj.task_result_ir else None,
+        "task_result_ir": (
+            obj.task_result_ir.to_compact_dict() if obj.task_result_ir else None
+        ),
     }
 
 
@@ -382,7 +384,9 @@ def _deserializer(d: Dict[str, any]) -> ExclusiveRemoteTask:
     )
     d1["_metadata"] = d["metadata"]
     d1["_task_result_ir"] = (
-        QuEraTaskResults(**d["task_result_ir"]) if d["task_result_ir"] else None
+        QuEraTaskResults.parse_compact_dict(d["task_result_ir"])
+        if d["task_result_ir"]
+        else None
     )
     d1["_task_id"] = d["task_id"]
 
@@ -151,7 +151,9 @@ def _serialze(obj: QuEraTask) -> Dict[str, ParamType]:
         "parallel_decoder": (
             obj.parallel_decoder.dict() if obj.parallel_decoder else None
         ),
-        "task_result_ir": obj.task_result_ir.dict() if obj.task_result_ir else None,
+        "task_result_ir": (
+            obj.task_result_ir.to_compact_dict() if obj.task_result_ir else None
+        ),
     }
 
 
@@ -159,7 +161,9 @@ def _serialze(obj: QuEraTask) -> Dict[str, ParamType]:
 def _deserializer(d: Dict[str, Any]) -> QuEraTask:
     d["task_ir"] = QuEraTaskSpecification(**d["task_ir"])
     d["task_result_ir"] = (
-        QuEraTaskResults(**d["task_result_ir"]) if d["task_result_ir"] else None
+        QuEraTaskResults.parse_compact_dict(d["task_result_ir"])
+        if d["task_result_ir"]
+        else None
     )
     d["backend"] = (
         QuEraBackend(**d["backend"]["QuEraBackend"])
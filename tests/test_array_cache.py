@@ -0,0 +1,197 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from bloqade.analog import start
+from bloqade.analog.emulate.codegen.array_cache import DiskStore, SharedMemoryStore
+from bloqade.analog.emulate.codegen.hamiltonian import (
+    CompileCache,
+    RydbergHamiltonianCodeGen,
+)
+
+
+def callback(register, *_):
+    return register.data
+
+
+def program():
+    return (
+        start.add_position([(0, 0), (0, 5), (5, 0)])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .phase.location(0)
+        .constant(0.3, 1.0)
+        .detuning.uniform.constant(2.0, 1.0)
+        .location(1, 0.5)
+        .constant(1.0, 1.0)
+        .rabi.amplitude.location([0, 1])
+        .constant(5.0, 1.0)
+    )
+
+
+@pytest.mark.parametrize("blockade_radius", [0.0, 6.0])
+def test_persistent_compile_cache(tmp_path, blockade_radius: float):
+    (emulation,) = (
+        program().bloqade.python().hamiltonian(blockade_radius=blockade_radius)
+    )
+    emulator_ir = emulation.task_data.emulator_ir
+    expected = emulation.hamiltonian
+
+    path = str(tmp_path / "cache")
+    hamiltonian = RydbergHamiltonianCodeGen(CompileCache.persistent(path)).emit(
+        emulator_ir
+    )
+    assert len(os.listdir(path)) > 0
+
+    # a new cache loads the matrices from disk
+    cached = RydbergHamiltonianCodeGen(CompileCache.persistent(path)).emit(emulator_ir)
+    assert isinstance(cached.rydberg, np.memmap)
+    assert isinstance(cached.space.configurations, np.memmap)
+
+    for result in [hamiltonian, cached]:
+        assert result.space == expected.space
+        np.testing.assert_array_equal(result.rydberg, expected.rydberg)
+        for time in [0.1, 0.5]:
+            assert abs(result.tocsr(time) - expected.tocsr(time)).max() == 0
+
+    state = cached.space.zero_state(np.complex128)
+    assert cached.average(state) == pytest.approx(expected.average(state))
+
+
+def test_persistent_compile_cache_positions(tmp_path):
+    # the interaction depends on the positions even without blockade
+    path = str(tmp_path / "cache")
+    program = (
+        start.add_position([(0, 0), (0, "d")])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .batch_assign(d=[5.0, 8.0])
+    )
+
+    expected = program.bloqade.python().hamiltonian()
+    results = program.bloqade.python().hamiltonian(cache_matrices=path)
+
+    for result, expected_result in zip(results, expected):
+        np.testing.assert_array_equal(
+            result.hamiltonian.rydberg, expected_result.hamiltonian.rydberg
+        )
+
+
+def test_disk_store_eviction(tmp_path):
+    store = DiskStore(str(tmp_path), max_bytes=3000)
+    array = np.zeros(100)  # 928 bytes with the header
+
+    for index in range(3):
+        store.save(f"entry-{index}", {}, {"array": array})
+        # make sure the access times differ
+        os.utime(tmp_path / f"entry-{index}" / "meta.json", (index, index))
+
+    assert store.load("entry-0") is not None
+    store.save("entry-3", {}, {"array": array})
+
+    # entry-0 has been used last, entry-1 is evicted
+    digests = sorted(digest for _, _, digest in store.entries())
+    assert digests == ["entry-0", "entry-2", "entry-3"]
+    assert store.load("entry-1") is None
+
+    meta, arrays = store.load("entry-3")
+    assert meta == {"arrays": ["array"]}
+    np.testing.assert_array_equal(arrays["array"], array)
+
+    store.clear()
+    assert store.entries() == []
+
+
+def test_persistent_compile_cache_pickle(tmp_path):
+    path = str(tmp_path / "cache")
+    compile_cache = CompileCache.persistent(path)
+
+    (emulation,) = program().bloqade.python().hamiltonian()
+    RydbergHamiltonianCodeGen(compile_cache).emit(emulation.task_data.emulator_ir)
+    assert len(compile_cache.operator_cache) > 0
+
+    # only the location of the cache is sent to other processes
+    other = pickle.loads(pickle.dumps(compile_cache))
+    assert len(other.operator_cache) == 0
+    assert other.space_cache.store == compile_cache.space_cache.store
+    assert all(key in other.operator_cache for key in compile_cache.operator_cache)
+
+
+def test_persistent_compile_cache_multiprocessing(tmp_path):
+    path = str(tmp_path / "cache")
+    program = (
+        start.add_position([(0, 0), (0, 6.1)])
+        .rydberg.rabi.amplitude.uniform.constant("omega", 1.0)
+        .batch_assign(omega=[10.0, 15.0])
+    )
+
+    batch = program.bloqade.python().run(
+        10, multiprocessing=True, num_workers=2, cache_matrices=path
+    )
+    assert all(len(task.result().shot_outputs) == 10 for task in batch.tasks.values())
+    assert len(os.listdir(path)) > 0
+
+    expected = program.bloqade.python().run_callback(callback)
+    results = program.bloqade.python().run_callback(
+        callback, multiprocessing=True, num_workers=2, cache_matrices=path
+    )
+    for result, expected_result in zip(results, expected):
+        np.testing.assert_array_equal(result, expected_result)
+
+
+def test_shared_memory_store():
+    store = SharedMemoryStore()
+    array = np.arange(10, dtype=np.int64)
+    store.save("entry", {"n": 10}, {"array": array, "empty": np.zeros(0)})
+
+    # a worker attaches to the block published by the owner
+    other = pickle.loads(pickle.dumps(store))
+    assert other.blocks == {}
+    other.pid = -1
+    assert not other.owner
+
+    meta, arrays = other.load("entry")
+    assert meta == {"n": 10}
+    np.testing.assert_array_equal(arrays["array"], array)
+    assert arrays["empty"].shape == (0,)
+    assert not arrays["array"].flags.writeable
+
+    # entries of workers are not published
+    other.save("other", {}, {"array": array})
+    assert "other" not in store.index and "other" not in other.index
+
+    del arrays
+    other.close()
+    store.close()
+    assert store.index == {} and store.closed
+    assert other.load("entry") is None
+
+    # a closed store does not publish entries anymore
+    store.save("entry", {}, {"array": array})
+    assert store.blocks == {}
+
+
+def test_shared_memory_compile_cache_multiprocessing():
+    program = (
+        start.add_position([(0, 0), (0, 6.1), (6.1, 0)])
+        .rydberg.rabi.amplitude.uniform.constant("omega", 1.0)
+        .detuning.location(0)
+        .constant(2.0, 1.0)
+        .batch_assign(omega=[10.0, 15.0, 20.0])
+    )
+
+    expected = program.bloqade.python().run_callback(callback, blockade_radius=6.2)
+    results = program.bloqade.python().run_callback(
+        callback,
+        blockade_radius=6.2,
+        multiprocessing=True,
+        num_workers=2,
+        cache_matrices=True,
+    )
+    for result, expected_result in zip(results, expected):
+        np.testing.assert_array_equal(result, expected_result)
+
+    batch = program.bloqade.python().run(
+        10, multiprocessing=True, num_workers=2, cache_matrices=True
+    )
+    assert all(len(task.result().shot_outputs) == 10 for task in batch.tasks.values())
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from bloqade.analog import var, start
+from bloqade.analog.emulate.ir.state_vector import BatchAnalogGate
+from bloqade.analog.submission.ir.task_results import QuEraTaskResults
+
+
+def callback(register, *_):
+    return register.data
+
+
+def sweep_program():
+    delta = var("delta")
+    return (
+        start.add_position([(0, 0), (0, 5.0), (5.0, 0)])
+        .rydberg.detuning.uniform.piecewise_linear(
+            [0.1, 0.8, 0.1], [-10, -10, delta, delta]
+        )
+        .amplitude.uniform.piecewise_linear([0.1, 0.8, 0.1], [0, 15.7, 15.7, 0])
+        .phase.uniform.constant(0.3, 1.0)
+    )
+
+
+def test_matmat():
+    program = sweep_program().batch_assign(delta=[-5.0, 5.0, 20.0])
+    hamiltonians = [emu.hamiltonian for emu in program.bloqade.python().hamiltonian()]
+
+    gate = BatchAnalogGate(hamiltonians)
+    detuning_coeffs, rabi_coeffs = gate._update(0.7)
+
+    rng = np.random.default_rng(1234)
+    size = gate.space.size
+    block = rng.normal(size=(size, 3)) + 1j * rng.normal(size=(size, 3))
+    output = np.zeros_like(block)
+    gate.workspace.matmat(gate.rydberg, detuning_coeffs, rabi_coeffs, block, output)
+
+    for t, hamiltonian in enumerate(hamiltonians):
+        expected = hamiltonian.tocsr(0.7) @ block[:, t]
+        np.testing.assert_allclose(output[:, t], expected, atol=1e-12)
+
+
+def test_group():
+    program = (
+        sweep_program()
+        .detuning.scale("mask")
+        .constant(1.0, "t")
+        .batch_assign(
+            delta=[-5.0, 5.0, -5.0, 5.0],
+            t=[1.0, 1.0, 1.2, 1.0],
+            mask=[[1, 0, 0], [1, 0, 0], [1, 0, 0], [0, 1, 0]],
+        )
+    )
+    hamiltonians = [emu.hamiltonian for emu in program.bloqade.python().hamiltonian()]
+
+    # different durations or local detunings are evolved separately
+    assert BatchAnalogGate.group(hamiltonians) == [[0, 1], [2], [3]]
+
+    with pytest.raises(ValueError):
+        BatchAnalogGate([hamiltonians[0], hamiltonians[3]])
+
+    with pytest.raises(ValueError):
+        BatchAnalogGate([])
+
+
+@pytest.mark.parametrize("interaction_picture", [False, True])
+def test_run_callback_batched(interaction_picture: bool):
+    program = (
+        sweep_program()
+        .detuning.uniform.constant(1.0, "t")
+        .batch_assign(delta=np.linspace(-10, 20, 6).tolist(), t=[1.0, 1.0, 0.9] * 2)
+    )
+
+    options = dict(atol=1e-10, rtol=1e-10, interaction_picture=interaction_picture)
+    expected = program.bloqade.python().run_callback(callback, **options)
+    results = program.bloqade.python().run_callback(callback, batched=True, **options)
+
+    assert len(results) == len(expected)
+    for result, expected_result in zip(results, expected):
+        np.testing.assert_allclose(result, expected_result, atol=1e-7)
+
+
+def test_run_callback_batched_errors():
+    program = sweep_program().batch_assign(delta=[-5.0, 5.0])
+
+    with pytest.raises(ValueError):
+        program.bloqade.python().run_callback(
+            callback, batched=True, multiprocessing=True
+        )
+
+    # the Krylov solvers evolve a single state
+    results = program.bloqade.python().run_callback(
+        callback, batched=True, solver_name="magnus4", ignore_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_run_batched():
+    program = sweep_program().batch_assign(delta=[-5.0, 5.0, 20.0])
+
+    batch = program.bloqade.python().run(100, batched=True)
+    expected = program.bloqade.python().run(100)
+
+    assert len(batch.tasks) == 3
+    for task, expected_task in zip(batch.tasks.values(), expected.tasks.values()):
+        assert task.metadata == expected_task.metadata
+        assert len(task.result().shot_outputs) == 100
+
+    with pytest.raises(ValueError):
+        program.bloqade.python().run(100, batched=True, multiprocessing=True)
+
+
+def test_batched_positions():
+    # without blockade the registers share the space but not the interaction
+    program = (
+        start.add_position([(0, 0), (0, "d")])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .batch_assign(d=[5.0, 8.0])
+    )
+
+    expected = program.bloqade.python().run_callback(callback)
+    results = program.bloqade.python().run_callback(callback, batched=True)
+
+    for result, expected_result in zip(results, expected):
+        np.testing.assert_allclose(result, expected_result, atol=1e-6)
+
+
+def test_run_seed():
+    program = sweep_program().batch_assign(delta=[-5.0, 5.0])
+
+    batch = program.bloqade.python().run(100, seed=1234)
+    expected = program.bloqade.python().run(100, seed=1234)
+
+    bitstrings = [task.result().shot_outputs for task in batch.tasks.values()]
+    expected_bitstrings = [
+        task.result().shot_outputs for task in expected.tasks.values()
+    ]
+    assert bitstrings == expected_bitstrings
+
+    # the shots are built without validation, they must still be valid
+    for task in batch.tasks.values():
+        result = task.result()
+        assert QuEraTaskResults(**result.dict()) == result
+        assert all(
+            len(shot.pre_sequence) == len(shot.post_sequence) == 3
+            for shot in result.shot_outputs
+        )
@@ -98,3 +98,117 @@ def test_solution(N: int, phi: float, interaction: bool):
         ), f"failed variance_2 at time {time}"
 
     # assert False
+
+
+@pytest.mark.parametrize("interaction_picture", [True, False])
+def test_fused_kernel(interaction_picture: bool):
+    program = (
+        Chain(4, lattice_spacing=6.1)
+        .rydberg.detuning.uniform.piecewise_linear([0.1, 0.8, 0.1], [-10, -10, 5, 5])
+        .location([0, 2], [0.5, 1.0])
+        .constant(2.0, 1.0)
+        .amplitude.uniform.piecewise_linear([0.1, 0.8, 0.1], [0, 15, 15, 0])
+        .location(1)
+        .constant(3.0, 1.0)
+        .phase.location(1)
+        .constant(0.4, 1.0)
+        .hyperfine.rabi.amplitude.location([0, 3])
+        .constant(2.5, 1.0)
+        .phase.uniform.constant(1.2, 1.0)
+    )
+
+    [emu] = program.bloqade.python().hamiltonian()
+    hamiltonian = emu.hamiltonian
+
+    rng = np.random.default_rng(1234)
+    psi = rng.normal(size=hamiltonian.space.size) + 1j * rng.normal(
+        size=hamiltonian.space.size
+    )
+    output = np.zeros_like(psi)
+
+    for time in np.linspace(0, 1.0, 11):
+        h = hamiltonian.tocsr(time)
+        assert np.allclose(hamiltonian._apply(psi, time), h.dot(psi))
+
+        if interaction_picture:
+            u = np.exp(-1j * hamiltonian.rydberg * time)
+            expected = -1j * u.conj() * (h.dot(u * psi) - hamiltonian.rydberg * u * psi)
+            result = hamiltonian._ode_complex_kernel_int(time, psi, output)
+        else:
+            expected = -1j * h.dot(psi)
+            result = hamiltonian._ode_complex_kernel(time, psi, output)
+
+        assert result is output
+        assert np.allclose(result, expected)
+
+
+@pytest.mark.parametrize(
+    ["blockade_radius", "use_hyperfine", "solver_name"],
+    [(0.0, False, "dop853"), (5.5, False, "magnus4"), (0.0, True, "dop853")],
+)
+def test_evolve_observables(blockade_radius, use_hyperfine, solver_name):
+    from bloqade.analog.emulate.ir.observables import (
+        Energy,
+        SiteDensities,
+        DensityCorrelations,
+    )
+
+    program = (
+        start.add_position([(0, 0), (0, 5), (5, 0), (5, 5)])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .detuning.uniform.piecewise_linear([0.5, 0.5], [-5.0, 5.0, 10.0])
+    )
+    if use_hyperfine:
+        program = program.hyperfine.rabi.amplitude.uniform.constant(5.0, 1.0)
+
+    [emu] = program.bloqade.python().hamiltonian(
+        blockade_radius=blockade_radius, use_hyperfine=use_hyperfine
+    )
+
+    times = np.linspace(0, 1, 11)
+    options = dict(solver_name=solver_name, atol=1e-10, rtol=1e-10)
+    observables = {
+        "densities": SiteDensities(),
+        "correlations": DensityCorrelations(),
+        "ground": SiteDensities("g"),
+        "energy": Energy(),
+    }
+    values = emu.evolve_observables(observables, times, **options)
+
+    n_level = 3 if use_hyperfine else 2
+    rydberg = np.zeros((n_level, n_level))
+    rydberg[-1, -1] = 1
+    ground = np.zeros((n_level, n_level))
+    ground[0, 0] = 1
+
+    assert values["densities"].shape == (11, 4)
+    assert values["correlations"].shape == (11, 4, 4)
+    assert values["energy"].shape == (11,)
+
+    for index, (time, state) in enumerate(
+        zip(times, emu.evolve(times=times, **options))
+    ):
+        for i in range(4):
+            expected = state.local_trace(rydberg, i).real
+            assert isclose(values["densities"][index, i], expected, abs_tol=1e-12)
+            assert isclose(
+                values["ground"][index, i],
+                state.local_trace(ground, i).real,
+                abs_tol=1e-12,
+            )
+            for j in range(4):
+                if i == j:
+                    expected = values["densities"][index, i]
+                else:
+                    expected = state.local_trace(np.kron(rydberg, rydberg), (i, j))
+                assert isclose(
+                    values["correlations"][index, i, j], expected.real, abs_tol=1e-12
+                )
+
+        expected = emu.hamiltonian.average(state, time)
+        assert isclose(values["energy"][index], expected, rel_tol=1e-10, abs_tol=1e-10)
+
+    with pytest.raises(ValueError):
+        emu.evolve_observables(
+            {"density": SiteDensities("h" if not use_hyperfine else "x")}
+        )
@@ -298,3 +298,78 @@ def test_errors():
         .bloqade.python()
         .run_callback(callback=error_tests)
     )
+
+
+@pytest.mark.parametrize(
+    "atom_type, blockade_radius",
+    product([TwoLevelAtom, ThreeLevelAtom], [Decimal("0.0"), Decimal("1.0")]),
+)
+def test_site_expectations_and_pair_correlations(atom_type, blockade_radius):
+    from bloqade.analog.emulate.ir.state_vector import StateVector
+
+    sites = [(0.0, 0.0), (0.0, 1.0), (0.0, 5.0), (4.0, 0.0)]
+    space = Space.create(Register(atom_type, sites, blockade_radius))
+
+    rng = np.random.default_rng(1234)
+    n_level = atom_type.n_level
+    psi = rng.normal(size=space.size) + 1j * rng.normal(size=space.size)
+    psi /= np.linalg.norm(psi)
+    state = StateVector(psi, space)
+
+    op = rng.normal(size=(n_level, n_level)) + 1j * rng.normal(size=(n_level, n_level))
+    two_body = rng.normal(size=(n_level**2, n_level**2))
+    two_body[np.abs(two_body) < 0.5] = 0
+
+    sites_values = state.site_expectations(op)
+    one_body_pairs = state.pair_correlations(op)
+    two_body_pairs = state.pair_correlations(two_body)
+
+    for i in range(4):
+        np.testing.assert_allclose(sites_values[i], state.local_trace(op, i))
+        np.testing.assert_allclose(
+            one_body_pairs[i, i], state.local_trace(op @ op, i), atol=1e-12
+        )
+        assert np.isnan(two_body_pairs[i, i])
+
+        for j in range(4):
+            if i == j:
+                continue
+
+            np.testing.assert_allclose(
+                one_body_pairs[i, j], state.local_trace(np.kron(op, op), (i, j))
+            )
+            np.testing.assert_allclose(
+                two_body_pairs[i, j], state.local_trace(two_body, (i, j))
+            )
+
+    with pytest.raises(ValueError):
+        state.site_expectations(np.eye(n_level + 1))
+
+    with pytest.raises(ValueError):
+        state.pair_correlations(np.eye(n_level + 1))
+
+
+def test_site_expectations_empty():
+    (emulation,) = (
+        start.add_position((0, 0))
+        .add_position((0, 6.1), filling=False)
+        .add_position((6.1, 6.1))
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .bloqade.python()
+        .hamiltonian()
+    )
+    (state,) = emulation.evolve()
+
+    density_op = np.array([[0.0, 0.0], [0.0, 1.0]])
+    densities = state.site_expectations(density_op)
+    correlations = state.pair_correlations(density_op)
+
+    assert densities.shape == (3,) and correlations.shape == (3, 3)
+    assert np.isnan(densities[1])
+    assert np.all(np.isnan(correlations[1])) and np.all(np.isnan(correlations[:, 1]))
+    for i in [0, 2]:
+        np.testing.assert_allclose(densities[i], state.local_trace(density_op, i))
+
+    np.testing.assert_allclose(
+        correlations[0, 2], state.local_trace(np.kron(density_op, density_op), (0, 2))
+    )
@@ -1116,3 +1116,32 @@ def test_3_level_multi_atom_complex(sites, L):
     rabi_op_proj = project_to_subspace(rabi, hamiltonian.space.configurations)
 
     assert np.all(hamiltonian.rabi_ops[0].op.tocsr().toarray() == rabi_op_proj)
+
+
+@pytest.mark.parametrize("L", L_VALUES)
+@pytest.mark.parametrize("use_hyperfine", [False, True])
+@pytest.mark.parametrize("interaction_cutoff", [0.0, 2.0])
+def test_rydberg_interaction(L, use_hyperfine, interaction_cutoff):
+    from bloqade.analog.constants import RB_C6
+    from bloqade.analog.emulate.codegen.hamiltonian import RydbergHamiltonianCodeGen
+
+    program = Chain(L, lattice_spacing=6.1).rydberg.detuning.uniform.constant(1.0, 1.0)
+
+    rydberg_op = np.array([0, 0, 1] if use_hyperfine else [0, 1], dtype=int)
+    rydberg = np.zeros(len(rydberg_op) ** L)
+    for i, j in combinations(range(L), 2):
+        interaction = RB_C6 / (6.1 * (j - i)) ** 6
+        if interaction > interaction_cutoff:
+            rydberg = rydberg + interaction * (
+                get_manybody_op(i, L, rydberg_op) * get_manybody_op(j, L, rydberg_op)
+            )
+
+    for blockade_radius in [0.0, 6.2]:
+        (hamiltonian_data,) = program.bloqade.python().hamiltonian(
+            blockade_radius=blockade_radius, use_hyperfine=use_hyperfine
+        )
+        codegen = RydbergHamiltonianCodeGen(interaction_cutoff=interaction_cutoff)
+        hamiltonian = codegen.emit(hamiltonian_data.task_data.emulator_ir)
+
+        expected = project_to_subspace(rydberg, hamiltonian.space.configurations)
+        np.testing.assert_allclose(hamiltonian.rydberg, expected, rtol=1e-12)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from scipy.sparse import diags, random as sparse_random
+from scipy.sparse.linalg import expm_multiply
+
+from bloqade.analog import start
+from bloqade.analog.emulate.krylov import LanczosExpm
+from bloqade.analog.atom_arrangement import Chain
+
+
+@pytest.mark.parametrize(
+    ["tau", "max_krylov_dim"], [(0.01, 30), (0.5, 30), (3.0, 30), (0.5, 10)]
+)
+def test_lanczos_expm(tau: float, max_krylov_dim: int):
+    rng = np.random.default_rng(1234)
+    size = 300
+
+    matrix = sparse_random(size, size, density=0.02, random_state=1234)
+    matrix = (matrix + matrix.T + diags(10 * rng.normal(size=size))).tocsr()
+    state = rng.normal(size=size) + 1j * rng.normal(size=size)
+
+    expected = expm_multiply(-1j * tau * matrix.tocsc(), state)
+
+    def matvec(input, output):
+        np.copyto(output, matrix @ input)
+        return output
+
+    expm = LanczosExpm(size, max_krylov_dim=max_krylov_dim)
+    n_matvec = expm.apply(matvec, state, tau, 1e-10)
+
+    assert n_matvec > 0
+    assert np.allclose(state, expected, atol=1e-8, rtol=0)
+
+
+def test_lanczos_expm_invariant_subspace():
+    matrix = np.diag([1.0, 2.0, 3.0, 4.0])
+    state = np.array([1.0, 1.0, 0.0, 0.0], dtype=np.complex128)
+
+    def matvec(input, output):
+        np.dot(matrix, input, out=output)
+        return output
+
+    expm = LanczosExpm(4)
+    assert expm.apply(matvec, state, 1.0, 1e-12) == 2
+    assert np.allclose(state, np.exp(-1j * np.diag(matrix)) * [1, 1, 0, 0])
+
+
+def magnus_programs():
+    yield (
+        Chain(4, lattice_spacing=6.1)
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 2.0)
+        .detuning.uniform.piecewise_constant([1.0, 1.0], [0.0, 5.0])
+    )
+
+    yield (
+        Chain(4, lattice_spacing=6.1)
+        .rydberg.detuning.uniform.piecewise_linear([0.1, 0.8, 0.1], [-10, -10, 10, 10])
+        .amplitude.uniform.piecewise_linear([0.1, 0.8, 0.1], [0, 15, 15, 0])
+        .phase.location(1)
+        .fn(lambda t: np.sin(3 * t), 1.0)
+    )
+
+    yield (
+        start.add_position([(0, 0), (0, 5)])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .hyperfine.rabi.amplitude.location(0)
+        .piecewise_linear([0.5, 0.5], [0.0, 5.0, 0.0])
+        .phase.uniform.piecewise_constant([0.3, 0.7], [0.0, 1.0])
+    )
+
+
+@pytest.mark.parametrize(
+    ["solver_name", "atol", "max_error"],
+    [("magnus2", 1e-7, 1e-5), ("magnus4", 1e-9, 1e-6)],
+)
+def test_magnus_vs_dop853(solver_name: str, atol: float, max_error: float):
+    for program in magnus_programs():
+        [emu] = program.bloqade.python().hamiltonian()
+        duration = emu.hamiltonian.emulator_ir.duration
+        times = np.linspace(0, duration, 7)
+
+        expected = emu.evolve(times=times, atol=1e-12, rtol=1e-12)
+        result = emu.evolve(times=times, solver_name=solver_name, atol=atol)
+
+        for expected_state, state in zip(expected, result):
+            assert np.linalg.norm(expected_state.data - state.data) < max_error
+
+
+def test_magnus_errors():
+    program = start.add_position(
+        [(0, 0), (0, 5)]
+    ).rydberg.rabi.amplitude.uniform.piecewise_linear([0.5, 0.5], [0, 15, 0])
+    [emu] = program.bloqade.python().hamiltonian()
+
+    with pytest.raises(ValueError):
+        emu.evolve(solver_name="magnus4", interaction_picture=True)
+
+    with pytest.raises(ValueError):
+        list(emu.evolve(solver_name="magnus4", times=[0.5, 0.2]))
+
+    with pytest.raises(RuntimeError):
+        list(emu.evolve(solver_name="magnus4", nsteps=1))
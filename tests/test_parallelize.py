@@ -48,3 +48,44 @@ def test_error_parallel_noatom():
                 "final_detuning",
             ],
         ).parallelize(10.0).quera.mock()._compile(shots=1)
+
+
+def test_compile_pipeline():
+    program = (
+        start.add_position([(0, 0), (0, "distance")])
+        .rydberg.detuning.uniform.piecewise_linear(
+            [0.1, 1.0, 0.1], [-10, -10, "delta", "delta"]
+        )
+        .amplitude.uniform.piecewise_linear([0.1, 1.0, 0.1], [0, 15, 15, 0])
+    )
+
+    # the register only depends on a static variable, its lattice is hoisted
+    routine = (
+        program.assign(distance=6.1)
+        .batch_assign(delta=[0.0, 5.0, 10.0])
+        .parallelize(12.0)
+        .quera.mock()
+    )
+    batch = routine._compile(10)
+    assert batch.compile_timings.n_tasks == 3
+    assert batch.compile_timings.hoisted == ("lattice",)
+
+    parallel_batch = routine._compile(10, multiprocessing=True, num_workers=2)
+    for task, parallel_task in zip(batch.tasks.values(), parallel_batch.tasks.values()):
+        assert parallel_task.task_ir == task.task_ir
+        assert parallel_task.metadata == task.metadata
+        assert parallel_task.parallel_decoder == task.parallel_decoder
+
+    # the register depends on a batch variable, the lattice is built per task
+    routine = (
+        program.batch_assign(delta=[0.0, 5.0], distance=[6.1, 7.0])
+        .parallelize(12.0)
+        .quera.mock()
+    )
+    batch = routine._compile(10)
+    assert batch.compile_timings.hoisted == ()
+    sites = [task.task_ir.lattice.sites for task in batch.tasks.values()]
+    assert sites[0] != sites[1]
+
+    with pytest.raises(ValueError):
+        routine._compile(10, num_workers=2)
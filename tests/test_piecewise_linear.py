@@ -0,0 +1,210 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from bloqade.analog import cast
+from bloqade.analog.ir.control.waveform import (
+    Poly,
+    Slice,
+    Append,
+    Linear,
+    Record,
+    Sample,
+    Constant,
+    PythonFn,
+    Interpolation,
+    GaussianKernel,
+)
+from bloqade.analog.serialize import dumps, loads
+from bloqade.analog.ir.scalar import Interval
+from bloqade.analog.emulate.ir.emulator import JITWaveform, WaveformRuntime
+from bloqade.analog.emulate.ir.piecewise_linear import (
+    PiecewiseLinearTable,
+    PiecewiseLinearWaveform,
+)
+from bloqade.analog.compiler.rewrite.common import AssignBloqadeIR
+from bloqade.analog.compiler.codegen.python.piecewise_linear import (
+    NotPiecewiseLinearError,
+    CodegenPiecewiseLinearWaveform,
+)
+
+
+def my_cos(time, omega):
+    return np.cos(omega * time)
+
+
+def dense_grid(*waveforms):
+    # include every breakpoint to check the value at discontinuities
+    duration = max(float(wf.duration()) for wf in waveforms)
+    breakpoints = np.linspace(0, duration, 7)
+    extra = [0.5, 1.0, 1.5, 2.5, 3.0]
+    grid = np.linspace(0, duration + 0.5, 401)
+    return np.unique(np.concatenate((grid, breakpoints, extra)))
+
+
+def test_pwl_waveform_append_slice_simplify():
+    a = PiecewiseLinearWaveform([0.0, 1.0], [0.0, 1.0])
+    b = PiecewiseLinearWaveform([0.0, 2.0], [2.0, 2.0])
+
+    c = a.append(b)
+    assert c == PiecewiseLinearWaveform([0.0, 1.0, 1.0, 3.0], [0.0, 1.0, 2.0, 2.0])
+    assert c(1.0) == 1.0
+    assert c(1.5) == 2.0
+    assert c(3.0) == 2.0
+    assert c(3.5) == 0.0
+
+    # continuous append drops the repeated breakpoint
+    d = a.append(PiecewiseLinearWaveform([0.0, 1.0], [1.0, 0.0]))
+    assert d == PiecewiseLinearWaveform([0.0, 1.0, 2.0], [0.0, 1.0, 0.0])
+
+    s = c.slice(0.5, 2.0)
+    assert s == PiecewiseLinearWaveform([0.0, 0.5, 0.5, 1.5], [0.5, 1.0, 2.0, 2.0])
+
+    e = PiecewiseLinearWaveform(
+        [0.0, 1.0, 1.0, 1.0, 2.0, 2.0], [0.0, 1.0, 5.0, 3.0, 3.0, 3.0]
+    ).simplify()
+    assert e == PiecewiseLinearWaveform([0.0, 1.0, 1.0, 2.0], [0.0, 1.0, 3.0, 3.0])
+
+    with pytest.raises(ValueError):
+        PiecewiseLinearWaveform([0.0], [1.0])
+
+
+def test_pwl_waveform_merge():
+    a = PiecewiseLinearWaveform([0.0, 1.0, 1.0, 2.0], [0.0, 1.0, 2.0, 2.0])
+    b = PiecewiseLinearWaveform([0.0, 0.5, 3.0], [1.0, 0.0, 5.0])
+
+    times, values = PiecewiseLinearWaveform.merge([a, b])
+    assert np.array_equal(times, [0.0, 0.5, 1.0, 1.0, 2.0, 2.0, 3.0])
+    assert values.shape == (2, times.size)
+
+    grid = np.linspace(0, 3.5, 71)
+    for wf, row in zip([a, b], values):
+        merged = PiecewiseLinearWaveform(times, row)
+        assert np.allclose(merged.eval_left(grid), wf.eval_left(grid))
+
+
+def test_pwl_table():
+    a = PiecewiseLinearWaveform([0.0, 1.0, 1.0, 2.0], [0.0, 1.0, 2.0, 2.0])
+    b = PiecewiseLinearWaveform([0.0, 0.5, 3.0], [1.0, 0.0, 5.0])
+
+    table = PiecewiseLinearTable()
+    coeff_a = table.add(a)
+    coeff_b = table.add(b)
+    assert len(table) == 2
+
+    for time in np.linspace(0, 3.5, 71).tolist() + [1.0, 2.0, 3.0]:
+        assert coeff_a(time) == pytest.approx(a(time))
+        assert coeff_b(time) == pytest.approx(b(time))
+
+    # adding a waveform rebuilds the table
+    c = PiecewiseLinearWaveform([0.0, 4.0], [1.0, -1.0])
+    coeff_c = table.add(c)
+    assert coeff_a(1.0) == pytest.approx(1.0)
+    assert coeff_c(2.0) == pytest.approx(0.0)
+    assert coeff_c(3.5) == pytest.approx(-0.75)
+
+
+def test_codegen_pwl_vs_call():
+    pyfn = PythonFn.create(my_cos, duration=1.0)
+    linear = Linear(start=1.0, stop="b", duration=1.0)
+    constant = Constant(value="a", duration=1.5)
+    poly = Poly(coeffs=[1.0, -2.0], duration=0.5)
+
+    waveforms = [
+        linear,
+        constant,
+        poly,
+        Append([linear, constant, poly]),
+        Append([constant, constant.scale(cast(2.0)), linear]),
+        Slice(Append([linear, constant]), Interval(cast(0.5), cast(2.0))),
+        Slice(Append([linear, constant]), Interval(cast(1.0), None)),
+        Append([linear, constant]) + Append([constant, linear]),
+        linear + poly,
+        -Append([poly, linear]),
+        Record(linear, cast("c")),
+        Sample(pyfn, Interpolation.Linear, cast(0.1)),
+        Append([Sample(pyfn, Interpolation.Linear, cast(0.3)), linear]),
+    ]
+
+    kwargs = dict(a=Decimal("0.5"), b=Decimal("-2.0"), omega=Decimal("2.0"))
+    for wf in waveforms:
+        jit_waveform = JITWaveform(kwargs, wf, WaveformRuntime.PiecewiseLinear)
+        assert CodegenPiecewiseLinearWaveform.can_lower(jit_waveform.canonicalized_ir)
+
+        pwl = jit_waveform.piecewise_linear
+        assert isinstance(pwl, PiecewiseLinearWaveform)
+        assert jit_waveform.emit() is pwl
+
+        for time in dense_grid(wf):
+            expected = float(wf(Decimal(str(time)), **kwargs))
+            assert pwl(time) == pytest.approx(expected, abs=1e-12)
+
+
+def test_codegen_pwl_sample():
+    pyfn = PythonFn.create(my_cos, duration=1.0)
+    wf = Sample(pyfn, Interpolation.Linear, cast(0.15))
+    kwargs = dict(omega=Decimal("2.0"))
+
+    assert CodegenPiecewiseLinearWaveform.can_lower(wf)
+    pwl = CodegenPiecewiseLinearWaveform().emit(AssignBloqadeIR(kwargs).emit(wf))
+
+    for time in dense_grid(wf):
+        expected = float(wf(Decimal(str(time)), **kwargs))
+        assert pwl(time) == pytest.approx(expected, abs=1e-12)
+
+    # constant interpolation takes the value on the right of the sample times
+    wf = Sample(pyfn, Interpolation.Constant, cast(0.15))
+    assert not CodegenPiecewiseLinearWaveform.can_lower(wf)
+
+    with pytest.raises(NotPiecewiseLinearError):
+        CodegenPiecewiseLinearWaveform().emit(AssignBloqadeIR(kwargs).emit(wf))
+
+
+def test_codegen_pwl_not_lowerable():
+    pyfn = PythonFn.create(my_cos, duration=1.0)
+    linear = Linear(start=1.0, stop=2.0, duration=1.0)
+
+    waveforms = [
+        pyfn,
+        Poly(coeffs=[1.0, -2.0, 0.5], duration=2.0),
+        Append([linear, pyfn]),
+        linear.smooth(0.1, GaussianKernel),
+    ]
+
+    for wf in waveforms:
+        assert not CodegenPiecewiseLinearWaveform.can_lower(wf)
+
+        jit_waveform = JITWaveform(
+            dict(omega=Decimal("2.0")), wf, WaveformRuntime.PiecewiseLinear
+        )
+        assert jit_waveform.piecewise_linear is None
+        # falls back to interpreting the waveform
+        assert jit_waveform.emit()(0.5) == pytest.approx(
+            float(wf(Decimal("0.5"), omega=Decimal("2.0")))
+        )
+
+    with pytest.raises(NotPiecewiseLinearError):
+        CodegenPiecewiseLinearWaveform().emit(pyfn)
+
+    # real errors are not swallowed
+    wf = Append([Linear(0.0, 1.0, 0.0), Constant(1.0, 1.0)])
+    with pytest.raises(ValueError):
+        wf(Decimal("0.0"))
+
+    with pytest.raises(ValueError):
+        CodegenPiecewiseLinearWaveform().emit(wf)
+
+
+def test_jit_waveform_pwl_serialize():
+    wf = Append([Linear(0.0, 1.0, 1.0), Constant(2.0, 1.0)])
+    jit_waveform = JITWaveform({}, wf, WaveformRuntime.PiecewiseLinear)
+    pwl = jit_waveform.piecewise_linear
+
+    obj = loads(dumps(jit_waveform))
+    assert obj == jit_waveform
+    assert "piecewise_linear" in obj.__dict__
+    assert obj.piecewise_linear == pwl
+
+    obj = loads(dumps(JITWaveform({}, wf)))
+    assert "piecewise_linear" not in obj.__dict__
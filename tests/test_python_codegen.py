@@ -5,11 +5,14 @@ import numba
 import numpy as np
 
 import bloqade.analog.ir.control.waveform as wf
-from bloqade.analog import start
+from bloqade.analog import cast, start
 from bloqade.analog.factory import piecewise_linear, piecewise_constant
 from bloqade.analog.compiler.codegen.python.waveform import CodegenPythonWaveform
 from bloqade.analog.compiler.rewrite.python.waveform import NormalizeWaveformPython
-from bloqade.analog.compiler.analysis.python.waveform import WaveformScan
+from bloqade.analog.compiler.analysis.python.waveform import (
+    WaveformScan,
+    WaveformBreakpoints,
+)
 from bloqade.analog.compiler.rewrite.common.assign_variables import AssignBloqadeIR
 
 
@@ -267,6 +270,24 @@ def test_python_codegen(randint):
     assert func.__name__ == "__bloqade_waveform_3"
 
 
+def test_waveform_breakpoints():
+    wf1 = wf.Linear(0, 1, 1.0)
+    wf2 = wf.Constant(1.0, 0.5)
+    wf3 = wf.PythonFn.create(f, 2.0)
+    wf4 = wf.Sample(wf3, wf.Interpolation.Linear, cast(0.5))
+
+    def scan(node):
+        return list(map(float, WaveformBreakpoints().scan(node)))
+
+    assert scan(wf1) == [0.0, 1.0]
+    assert scan(wf3) == [0.0, 2.0]
+    assert scan(wf4) == [0.0, 0.5, 1.0, 1.5, 2.0]
+    assert scan(wf.Append([wf1, wf2, wf1])) == [0.0, 1.0, 1.5, 2.5]
+    assert scan(wf.Append([wf1, wf2])[0.5:1.2]) == [0.0, 0.5, 0.7]
+    assert scan(wf1 + wf.Append([wf2, wf1])) == [0.0, 0.5, 1.0, 1.5]
+    assert scan(-wf.Append([wf2, wf1]).scale(2.0)) == [0.0, 0.5, 1.5]
+
+
 def test_interpret_vs_python_vs_numba():
     def phase_function(t):
         return np.sin(t)
@@ -297,11 +318,21 @@ def test_interpret_vs_python_vs_numba():
         collect_callback, waveform_runtime="numba"
     )
 
-    for interp_result, python_result, numba_result in zip(
-        interp_results, python_results, numba_results
+    numpy_results = program.bloqade.python().run_callback(
+        collect_callback, waveform_runtime="numpy"
+    )
+
+    pwl_results = program.bloqade.python().run_callback(
+        collect_callback, waveform_runtime="piecewise_linear"
+    )
+
+    for interp_result, python_result, numba_result, numpy_result, pwl_result in zip(
+        interp_results, python_results, numba_results, numpy_results, pwl_results
     ):
         assert np.allclose(interp_result, python_result)
         assert np.allclose(interp_result, numba_result)
+        assert np.allclose(interp_result, numpy_result)
+        assert np.allclose(interp_result, pwl_result)
 
 
 if __name__ == "__main__":
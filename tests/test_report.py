@@ -1,12 +1,21 @@
 import tempfile
+from types import SimpleNamespace
 from decimal import Decimal
 from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
 
+from bloqade.analog import start
 from bloqade.analog.task.base import Report, Geometry
+from bloqade.analog.task.batch import _report_dataframe
 from bloqade.analog.ir.location import ListOfLocations
+from bloqade.analog.submission.ir.task_results import (
+    QuEraTaskResults,
+    PackedShotResults,
+    QuEraShotStatusCode,
+    QuEraTaskStatusCode,
+)
 
 
 def test_integration_report():
@@ -281,3 +290,147 @@ def test_rydberg_densities():
             filter_perfect_filling=True, clusters=(1, 0)
         ).to_numpy(),
     ), "failed, filter perfect filling and cluster (1, 0)"
+
+
+def reference_dataframe(tasks):
+    # one row per completed shot and cluster
+    index = []
+    data = []
+    for task_number, task in tasks:
+        geometry = task.geometry
+        if geometry.parallel_decoder:
+            cluster_indices = geometry.parallel_decoder.get_cluster_indices()
+        else:
+            cluster_indices = {(0, 0): list(range(len(geometry.filling)))}
+
+        for shot in task.result().shot_outputs:
+            if shot.shot_status != "Completed":
+                continue
+
+            for cluster, sites in cluster_indices.items():
+                index.append(
+                    (
+                        task_number,
+                        cluster,
+                        "".join(str(geometry.filling[site]) for site in sites),
+                        "".join(str(shot.pre_sequence[site]) for site in sites),
+                    )
+                )
+                data.append(
+                    np.asarray([shot.post_sequence[site] for site in sites], np.int8)
+                )
+
+    index = pd.MultiIndex.from_tuples(
+        index, names=["task_number", "cluster", "perfect_sorting", "pre_sequence"]
+    )
+    return pd.DataFrame(data, index=index)
+
+
+def test_parallel_report():
+    prog = (
+        start.add_position([(0, 0), (0, 6.1)], filling=[True, False])
+        .add_position((6.1, 0))
+        .rydberg.detuning.uniform.constant("delta", 1.0)
+        .amplitude.uniform.constant(15.0, 1.0)
+        .batch_assign(delta=[0.0, 5.0, 10.0])
+        .parallelize(10.0)
+    )
+
+    with tempfile.NamedTemporaryFile() as f:
+        batch = prog.quera.mock(state_file=f.name).run(20)
+
+    report = batch.report()
+    expected = reference_dataframe(batch.tasks.items())
+    pd.testing.assert_frame_equal(report.dataframe, expected)
+    assert report.counts()[0] == Report(expected, report.metas, report.geos).counts()[0]
+
+
+class ClusterDecoder:
+    def __init__(self, cluster_indices):
+        self.cluster_indices = cluster_indices
+
+    def get_cluster_indices(self):
+        return self.cluster_indices
+
+
+def test_ragged_report():
+    rng = np.random.default_rng(1234)
+
+    # the last shot of the first task is missing its measurement
+    shot_status = [0] * 9 + [list(QuEraShotStatusCode).index("MissingMeasurement")]
+    packed = PackedShotResults.from_sequences(
+        rng.integers(0, 2, size=(10, 4)), rng.integers(0, 2, size=(10, 4)), shot_status
+    )
+    results = [
+        QuEraTaskResults.from_packed(packed, QuEraTaskStatusCode.Partial),
+        QuEraTaskResults.from_sequences(
+            rng.integers(0, 2, size=(5, 2)), rng.integers(0, 2, size=(5, 2))
+        ),
+    ]
+    geometries = [
+        SimpleNamespace(
+            filling=[1, 1, 0, 1],
+            parallel_decoder=ClusterDecoder({(0, 0): [0, 1, 2], (1, 0): [3]}),
+        ),
+        SimpleNamespace(filling=[1, 1], parallel_decoder=None),
+    ]
+    tasks = [
+        (task_number, SimpleNamespace(geometry=geometry, result=lambda r=result: r))
+        for task_number, geometry, result in zip([0, 2], geometries, results)
+    ]
+
+    pd.testing.assert_frame_equal(_report_dataframe(tasks), reference_dataframe(tasks))
+
+
+def test_cached_counts():
+    rng = np.random.default_rng(1234)
+    n_tasks, n_shots = 7, 200
+
+    index = pd.MultiIndex.from_arrays(
+        [
+            # tasks in a shuffled order with a missing task number
+            np.repeat(rng.permutation([0, 1, 2, 4, 5, 6, 7]), n_shots),
+            [(i % 2, 0) for i in range(n_tasks * n_shots)],
+            ["111"] * (n_tasks * n_shots),
+            rng.choice(["111", "101"], size=n_tasks * n_shots),
+        ],
+        names=["task_number", "cluster", "perfect_sorting", "pre_sequence"],
+    )
+    data = rng.integers(0, 2, size=(n_tasks * n_shots, 3)).astype(np.int8)
+    report = Report(pd.DataFrame(data, index=index), [{}] * n_tasks, [None] * n_tasks)
+
+    for filter_perfect_filling, clusters in [(False, []), (True, (1, 0))]:
+        mask = np.ones(len(data), dtype=bool)
+        if filter_perfect_filling:
+            mask &= index.get_level_values("pre_sequence") == "111"
+        if clusters:
+            mask &= np.array([c == clusters for c in index.get_level_values(1)])
+
+        task_numbers = index.get_level_values("task_number")
+        expected = [
+            data[mask & (task_numbers == task_number)]
+            for task_number in task_numbers.unique()
+        ]
+        bitstrings = report.bitstrings(filter_perfect_filling, clusters)
+        assert len(bitstrings) == n_tasks
+        for bits, expected_bits in zip(bitstrings, expected):
+            np.testing.assert_array_equal(bits, expected_bits)
+
+        expected_counts = []
+        for bits in expected:
+            unique, counts = np.unique(bits, axis=0, return_counts=True)
+            items = [("".join(map(str, u)), int(c)) for u, c in zip(unique, counts)]
+            items.sort(key=lambda x: x[1], reverse=True)
+            expected_counts.append(OrderedDict(items))
+
+        counts = report.counts(filter_perfect_filling, clusters)
+        assert counts == expected_counts
+        assert [list(c) for c in counts] == [list(c) for c in expected_counts]
+
+        # the cached results are not changed through the returned values
+        bitstrings[0][:] = 2
+        counts[0].clear()
+        assert report.counts(filter_perfect_filling, clusters) == expected_counts
+        np.testing.assert_array_equal(
+            report.bitstrings(filter_perfect_filling, clusters)[0], expected[0]
+        )
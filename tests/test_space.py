@@ -3,8 +3,14 @@ from unittest.mock import Mock, patch
 import numpy as np
 import pytest
 
-import bloqade.analog.emulate.ir.space
-from bloqade.analog.emulate.ir.space import Space
+from bloqade.analog.emulate.ir.space import (
+    Space,
+    AliasTable,
+    SpaceType,
+    lookup_index,
+    lookup_indices,
+    blockade_neighbors,
+)
 from bloqade.analog.emulate.ir.emulator import Register
 from bloqade.analog.emulate.ir.atom_type import TwoLevelAtom, ThreeLevelAtom
 
@@ -109,6 +115,84 @@ def test_three_level_subspace_3():
     np.testing.assert_equal(space.configurations, actual_configs)
 
 
+@pytest.mark.parametrize("atom_type", [TwoLevelAtom, ThreeLevelAtom])
+def test_subspace_brute_force(atom_type):
+    rng = np.random.default_rng(42)
+    positions = [tuple(site) for site in rng.uniform(0, 10, size=(8, 2))]
+    register = Register(atom_type, positions, 3.5)
+
+    n_level = atom_type.n_level
+    rydberg = atom_type.State.Rydberg.value
+    pairs = [
+        (i, j)
+        for i in range(len(positions))
+        for j in range(i)
+        if np.linalg.norm(np.subtract(positions[i], positions[j])) <= 3.5
+    ]
+
+    expected = []
+    for config in range(n_level ** len(positions)):
+        digits = [(config // n_level**index) % n_level for index in range(8)]
+        if all(digits[i] != rydberg or digits[j] != rydberg for i, j in pairs):
+            expected.append(config)
+
+    space = Space.create(register)
+    np.testing.assert_array_equal(space.configurations, expected)
+    assert Space.count_configurations(register) == len(expected)
+
+
+def test_blockade_neighbors():
+    # pairs at exactly the blockade radius are blockaded
+    register = Register(TwoLevelAtom, [(0, 0), (0, 1), (1, 0), (5, 5)], 1)
+    indptr, indices = blockade_neighbors(register)
+
+    np.testing.assert_array_equal(indptr, [0, 2, 2, 2, 2])
+    np.testing.assert_array_equal(indices, [1, 2])
+
+    register = Register(TwoLevelAtom, [(0, 0), (0, 1)], 0)
+    assert Space.count_configurations(register) == 4
+    assert Space.count_configurations(Register(TwoLevelAtom, [], 1)) == 1
+
+
+@pytest.mark.parametrize("bucket_size", [None, 0.25, 1.0, 16.0])
+def test_index_table(bucket_size):
+    rng = np.random.default_rng(7)
+    positions = [tuple(site) for site in rng.uniform(0, 10, size=(12, 2))]
+    space = Space.create(Register(ThreeLevelAtom, positions, 3.0))
+    assert space.space_type is SpaceType.SubSpace
+
+    table = space.build_index_table(bucket_size)
+    assert space.index_table is table
+    if bucket_size is None:
+        assert table.size == 0
+    else:
+        assert space.size <= bucket_size * (table.size - 2)
+
+    configurations = space.configurations
+    indices = lookup_indices(configurations, table, configurations)
+    np.testing.assert_array_equal(indices, np.arange(space.size))
+
+    missing = np.setdiff1d(np.arange(3**12, dtype=configurations.dtype), configurations)
+    assert np.all(lookup_indices(configurations, table, missing) == -1)
+
+    for index in [0, 1, space.size - 1]:
+        fock_state = space.index_to_fock_state(index)
+        assert space.fock_state_to_index(fock_state) == index
+
+    with pytest.raises(ValueError):
+        space.fock_state_to_index("|" + "r" * 12 + ">")
+
+    with pytest.raises(ValueError):
+        space.build_index_table(0.0)
+
+
+def test_index_table_full_space():
+    space = Space.create(Register(TwoLevelAtom, [(0, 0), (0, 5), (5, 0)], 0))
+    assert space.index_table.size == 0
+    assert lookup_index(space.configurations, space.index_table, np.uint32(5)) == 5
+    assert lookup_index(space.configurations, space.index_table, np.uint32(8)) == -1
+
+
 def test_two_level_integer_to_string():
     assert TwoLevelAtom.integer_to_string(0, 2) == "|gg>"
     assert TwoLevelAtom.integer_to_string(1, 2) == "|rg>"
@@ -708,16 +792,20 @@ def test_zero_state():
     assert np.all(space.zero_state().data == np.array([1, 0, 0, 0, 0]))
 
 
-@patch("bloqade.analog.emulate.ir.space.np.random.choice")
-def test_sample_state(patch_choice):
+@patch("bloqade.analog.emulate.ir.space.AliasTable.sample")
+def test_sample_state(patch_sample):
     positions = [(0, 0), (0, 1), (1, 0)]
     register = Register(TwoLevelAtom, positions, 1)
     space = Space.create(register)
     print(space)
 
-    bloqade.analog.emulate.ir.space.np.random.choice.return_value = np.array(
-        [0, 1, 2, 3, 4]
-    )
+    # 0. |ggg>
+    # 1. |rgg>
+    # 2. |grg>
+    # 3. |ggr>
+    # 4. |grr>
+
+    patch_sample.return_value = np.array([0, 1, 2, 3, 4])
     state_vector = np.array([0.1, 0.2, 0.3, 0.4, 0.5])
 
     expected_bitstrings = np.array(
@@ -725,8 +813,8 @@ def test_sample_state(patch_choice):
             [0, 0, 0],
             [1, 0, 0],
             [0, 1, 0],
-            [1, 1, 0],
             [0, 0, 1],
+            [0, 1, 1],
         ]
     )
     bitstrings = space.sample_state_vector(state_vector, 5)
@@ -738,9 +826,7 @@ def test_sample_state(patch_choice):
     space = Space.create(register)
     print(space)
 
-    bloqade.analog.emulate.ir.space.np.random.choice.return_value = np.array(
-        [0, 1, 2, 3, 4, 5, 6, 7, 8]
-    )
+    patch_sample.return_value = np.array([0, 1, 2, 3, 4, 5, 6, 7])
 
     # 0. |gg> -> |gg>
     # 1. |hg> -> |gg>
@@ -750,9 +836,8 @@ def test_sample_state(patch_choice):
     # 5. |rh> -> |rg>
     # 6. |gr> -> |gr>
     # 7. |hr> -> |gr>
-    # 8. |rr> -> |rr>
 
-    state_vector = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.1, 0.2, 0.3])
+    state_vector = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.1, 0.2])
 
     expected_bitstrings = np.array(
         [
@@ -764,16 +849,58 @@ def test_sample_state(patch_choice):
             [1, 0],
             [0, 1],
             [0, 1],
-            [1, 1],
         ]
     )
 
-    bitstrings = space.sample_state_vector(state_vector, 9)
+    bitstrings = space.sample_state_vector(state_vector, 8)
     print(bitstrings)
 
     assert np.all(bitstrings == expected_bitstrings)
 
 
+def test_alias_table():
+    weights = np.array([0.0, 1.0, 3.0, 0.0, 0.5, 2.5])
+    table = AliasTable.create(weights)
+    np.testing.assert_array_equal(table.outcomes, [1, 2, 4, 5])
+
+    samples = table.sample(200_000, np.random.default_rng(1234))
+    frequencies = np.bincount(samples, minlength=weights.size) / samples.size
+    np.testing.assert_allclose(frequencies, weights / weights.sum(), atol=5e-3)
+
+    np.testing.assert_array_equal(
+        samples, table.sample(200_000, np.random.default_rng(1234))
+    )
+
+    with pytest.raises(ValueError):
+        AliasTable.create(np.zeros(3))
+
+    with pytest.raises(ValueError):
+        AliasTable.create(np.array([1.0, -1.0, 1.0]))
+
+
+@pytest.mark.parametrize("atom_type", [TwoLevelAtom, ThreeLevelAtom])
+def test_sample_state_packed(atom_type):
+    positions = [(0, 3 * i) for i in range(11)]
+    space = Space.create(Register(atom_type, positions, 3.5))
+
+    rng = np.random.default_rng(1234)
+    state_vector = rng.normal(size=space.size) + 1j * rng.normal(size=space.size)
+    state_vector /= np.linalg.norm(state_vector)
+
+    samples = space.sample_state_vector(state_vector, 100, rng=np.random.default_rng(7))
+    packed = space.sample_state_vector(
+        state_vector, 100, rng=np.random.default_rng(7), packed=True
+    )
+    assert packed.shape == (100, 2)
+    np.testing.assert_array_equal(packed, np.packbits(samples, axis=1))
+
+    if atom_type is ThreeLevelAtom:
+        with pytest.raises(ValueError):
+            space.sample_state_vector(
+                state_vector, 100, project_hyperfine=False, packed=True
+            )
+
+
 def test_str():
     positions = [(0, 0), (0, 1)]
     register = Register(ThreeLevelAtom, positions, 1)
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from bloqade.analog import start
+from bloqade.analog.serialize import dumps, loads
+from bloqade.analog.submission.ir.task_results import (
+    QuEraShotResult,
+    QuEraTaskResults,
+    PackedShotResults,
+    QuEraShotStatusCode,
+    QuEraTaskStatusCode,
+)
+
+
+def shot_outputs():
+    return [
+        QuEraShotResult(
+            shot_status=QuEraShotStatusCode.Completed,
+            pre_sequence=[1, 0, 1, 1, 1, 1, 1, 1, 0, 1],
+            post_sequence=[0, 0, 1, 0, 1, 1, 0, 1, 0, 1],
+        ),
+        QuEraShotResult(
+            shot_status=QuEraShotStatusCode.MissingPostSequence,
+            pre_sequence=[1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        ),
+        QuEraShotResult(shot_status=QuEraShotStatusCode.MissingMeasurement),
+    ]
+
+
+def test_packed_shot_results():
+    results = QuEraTaskResults(
+        task_status=QuEraTaskStatusCode.Partial, shot_outputs=shot_outputs()
+    )
+
+    packed = results.packed()
+    assert len(packed) == 3
+    assert packed.n_sites == 10
+    assert packed.pre_sequences.shape == (3, 2)
+    np.testing.assert_array_equal(packed.completed, [True, False, False])
+
+    pre_sequences, post_sequences = packed.unpack()
+    np.testing.assert_array_equal(
+        pre_sequences[0], results.shot_outputs[0].pre_sequence
+    )
+    np.testing.assert_array_equal(post_sequences[1], np.zeros(10))
+
+    assert packed.to_shot_outputs() == results.shot_outputs
+
+    with pytest.raises(ValueError):
+        PackedShotResults.from_shot_outputs(
+            shot_outputs()
+            + [QuEraShotResult(shot_status="Completed", pre_sequence=[1, 1])]
+        )
+
+
+def test_lazy_shot_outputs():
+    rng = np.random.default_rng(1234)
+    pre_sequences = rng.integers(0, 2, size=(20, 13))
+    post_sequences = rng.integers(0, 2, size=(20, 13))
+
+    results = QuEraTaskResults.from_sequences(pre_sequences, post_sequences)
+    assert "shot_outputs" not in results.__dict__
+
+    expected = QuEraTaskResults(
+        task_status=QuEraTaskStatusCode.Completed,
+        shot_outputs=[
+            QuEraShotResult(
+                shot_status=QuEraShotStatusCode.Completed,
+                pre_sequence=pre.tolist(),
+                post_sequence=post.tolist(),
+            )
+            for pre, post in zip(pre_sequences, post_sequences)
+        ],
+    )
+    assert results == expected
+    assert results.shot_outputs == expected.shot_outputs
+
+
+def test_compact_dict():
+    results = QuEraTaskResults(
+        task_status=QuEraTaskStatusCode.Partial, shot_outputs=shot_outputs()
+    )
+
+    compact = results.to_compact_dict()
+    assert QuEraTaskResults.parse_compact_dict(compact) == results
+    assert QuEraTaskResults.parse_compact_dict(results.dict()) == results
+
+    empty = QuEraTaskResults(task_status=QuEraTaskStatusCode.Enqueued)
+    assert QuEraTaskResults.parse_compact_dict(empty.to_compact_dict()) == empty
+
+
+def test_save_load_batch():
+    batch = (
+        start.add_position([(0, 0), (0, 5.0), (5.0, 0)])
+        .rydberg.rabi.amplitude.uniform.constant(15.0, 1.0)
+        .bloqade.python()
+        .run(1000)
+    )
+
+    data = dumps(batch)
+    # the shots are stored as packed bits instead of lists of integers
+    assert len(data) < 10_000
+
+    loaded = loads(data)
+    for task, loaded_task in zip(batch.tasks.values(), loaded.tasks.values()):
+        assert loaded_task.result() == task.result()
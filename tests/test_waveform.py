@@ -551,6 +551,67 @@ def test_wvfm_sample():
     )
 
 
+def test_wvfm_eval_array():
+    def my_cos(time, omega):
+        return np.cos(omega * time)
+
+    linear = Linear(start=1.0, stop="b", duration=3.0)
+    constant = Constant(value="a", duration=1.5)
+    poly = Poly(coeffs=[1.0, -2.0, "a"], duration=2.0)
+    pyfn = PythonFn.create(my_cos, duration=1.0)
+
+    waveforms = [
+        linear,
+        constant,
+        poly,
+        pyfn,
+        Append([linear, constant, poly]),
+        Slice(Append([linear, constant]), Interval(cast(0.5), cast(3.5))),
+        linear + constant,
+        -poly,
+        constant.scale(cast(2.5)),
+        Record(linear, cast("c")),
+        Sample(pyfn, Interpolation.Linear, cast(0.1)),
+        Sample(pyfn, Interpolation.Constant, cast(0.1)),
+    ]
+
+    times = np.linspace(-0.5, 6.5, 141)
+    kwargs = dict(a=Decimal("0.5"), b=Decimal("-2.0"), omega=Decimal("2.0"))
+    for wf in waveforms:
+        expected = [wf(time, **kwargs) for time in times]
+        values = wf.eval_array(times, **kwargs)
+
+        assert values.shape == times.shape
+        assert np.allclose(values, expected)
+
+    with pytest.raises(ValueError):
+        Linear(start=1.0, stop=2.0, duration=0.0).eval_array(np.zeros(3))
+
+
+def test_wvfm_smooth_eval_array():
+    wv = Append([Linear(0.0, 1.0, 1.0), Constant(1.0, 1.0), Linear(1.0, 0.0, 1.0)])
+    times = np.linspace(0, 3.0, 13)
+
+    kernels = [
+        GaussianKernel,
+        LogisticKernel,
+        SigmoidKernel,
+        TriangleKernel,
+        UniformKernel,
+        ParabolicKernel,
+        BiweightKernel,
+        TriweightKernel,
+        TricubeKernel,
+        CosineKernel,
+    ]
+
+    for kernel in kernels:
+        wf = wv.smooth(radius=0.2, kernel=kernel)
+        expected = [wf(time) for time in times]
+
+        assert np.allclose(wf.eval_array(times), expected, rtol=0, atol=1e-4)
+
+
 """
 print(wf[:0.5].duration)
 print(wf[1.0:].duration)